@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Detección de cambios y reglas de alerta del scraper del BCV
+Compara cada tasa nueva con el índice del historial en memoria (puesto al día
+leyendo solo los bytes agregados), descarta los registros repetidos y decide
+si la variación merece una notificación.
+"""
+
+import logging
+from bisect import bisect_left
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from config import ScraperConfig
+from history import RateIndex, load_index, update_index, get_rate, get_rate_as_of, to_date_key
+
+# Índices del historial por moneda, reutilizados entre guardados (modo daemon)
+HISTORY_INDEXES: Dict[str, RateIndex] = {}
+
+
+def get_history_index(currency: str = 'USD') -> RateIndex:
+    """Índice de una moneda, cargado una vez y actualizado con la cola del historial"""
+    index = HISTORY_INDEXES.get(currency)
+    index = load_index(currency=currency) if index is None else update_index(index, currency=currency)
+    HISTORY_INDEXES[currency] = index
+    return index
+
+
+def is_duplicate(index: RateIndex, price_date: str, price: float) -> bool:
+    """Indica si la fecha_precio ya está guardada con la misma tasa"""
+    return get_rate(index, price_date) == price
+
+
+def percent_change(previous: float, current: float) -> float:
+    """Variación porcentual entre dos tasas"""
+    return (current / previous - 1.0) * 100.0 if previous else 0.0
+
+
+def evaluate_rules(index: RateIndex, price_date: str, price: float) -> List[str]:
+    """
+    Reglas de alerta que cumple una tasa nueva (lista vacía si ninguna).
+
+    - Variación absoluta (ALERT_ABS_CHANGE) o porcentual (ALERT_PCT_CHANGE)
+      respecto a la última tasa guardada
+    - Nuevo máximo histórico (ALERT_ALL_TIME_HIGH)
+    - Variación porcentual en los últimos ALERT_WINDOW_DAYS días
+      (ALERT_WINDOW_PCT_CHANGE)
+    """
+    date_key = to_date_key(price_date)
+    previous = get_rate_as_of(index, date_key)
+    if previous is None:
+        return ["Primer registro del historial"]
+
+    alerts = []
+    previous_date, previous_price = previous
+    change = price - previous_price
+    change_pct = percent_change(previous_price, price)
+    abs_fired = ScraperConfig.ALERT_ABS_CHANGE > 0 and abs(change) >= ScraperConfig.ALERT_ABS_CHANGE
+    pct_fired = ScraperConfig.ALERT_PCT_CHANGE > 0 and abs(change_pct) >= ScraperConfig.ALERT_PCT_CHANGE
+    if abs_fired or pct_fired:
+        alerts.append(f"Variación de {change:+,.2f} Bs ({change_pct:+.2f}%) respecto al {previous_date}")
+
+    if ScraperConfig.ALERT_ALL_TIME_HIGH:
+        high = max(index.prices[:bisect_left(index.dates, date_key)], default=None)
+        if high is not None and price > high:
+            alerts.append(f"Nuevo máximo histórico (anterior: {high:,.2f} Bs)")
+
+    if ScraperConfig.ALERT_WINDOW_DAYS > 0 and ScraperConfig.ALERT_WINDOW_PCT_CHANGE > 0:
+        start = date.fromisoformat(date_key) - timedelta(days=ScraperConfig.ALERT_WINDOW_DAYS)
+        reference = get_rate_as_of(index, start)
+        if reference is not None:
+            window_pct = percent_change(reference[1], price)
+            if abs(window_pct) >= ScraperConfig.ALERT_WINDOW_PCT_CHANGE:
+                alerts.append(f"Variación de {window_pct:+.2f}% en {ScraperConfig.ALERT_WINDOW_DAYS} días "
+                              f"(desde el {reference[0]})")
+    return alerts
+
+
+def should_notify(alerts: List[str]) -> bool:
+    """Se notifica si alguna regla se cumplió (o siempre, si las alertas están deshabilitadas)"""
+    return bool(alerts) or not ScraperConfig.ALERTS_ENABLED
+
+
+def check_new_rate(price_date: str, price: float, currency: str = 'USD') -> Optional[List[str]]:
+    """
+    Etapa de detección de cambios previa al guardado.
+
+    Devuelve None si el registro es repetido (no hay que guardarlo) o la
+    lista de alertas que cumple la tasa nueva.
+    """
+    index = get_history_index(currency)
+    if is_duplicate(index, to_date_key(price_date), price):
+        logging.info(f"La tasa del {to_date_key(price_date)} ya está guardada; se omite")
+        return None
+    alerts = evaluate_rules(index, price_date, price) if ScraperConfig.ALERTS_ENABLED else []
+    for alert in alerts:
+        logging.info(f"🚨 {alert}")
+    return alerts
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Análisis del historial de tasas del BCV
+Carga el historial en arreglos columnares (días desde 1970 + precios float64)
+y ofrece operaciones vectorizadas: variación porcentual, media y desviación
+móviles, remuestreo semanal/mensual y detección de huecos.
+
+Usa NumPy si está instalado; si no, recurre a `array` de la librería estándar.
+"""
+
+import argparse
+import math
+from array import array
+from typing import List, NamedTuple, Sequence, Tuple
+from config import ScraperConfig
+from history import load_index, RateIndex, to_epoch_day, from_epoch_day
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class RateSeries(NamedTuple):
+    """Serie columnar: días desde 1970-01-01 (int64) y precios (float64) paralelos"""
+    days: Sequence[int]
+    prices: Sequence[float]
+
+
+def make_series(days: Sequence[int], prices: Sequence[float]) -> RateSeries:
+    """Crea una serie en el formato columnar disponible (NumPy o array)"""
+    if np is not None:
+        return RateSeries(np.asarray(days, dtype=np.int64), np.asarray(prices, dtype=np.float64))
+    return RateSeries(array('q', days), array('d', prices))
+
+
+def series_from_index(index: RateIndex) -> RateSeries:
+    """Crea la serie a partir del índice del historial (ya ordenado y sin duplicados)"""
+    return make_series([to_epoch_day(d) for d in index.dates], index.prices)
+
+
+def load_series(currency: str = 'USD') -> RateSeries:
+    """Carga la serie de una moneda: de la instantánea binaria si está al día, si no del historial"""
+    from snapshot import read_snapshot, is_current
+
+    snapshot = read_snapshot(currency=currency)
+    if snapshot is not None and is_current(snapshot):
+        return snapshot.series
+    return series_from_index(load_index(currency=currency))
+
+
+def pct_change(prices: Sequence[float]) -> Sequence[float]:
+    """Variación porcentual entre observaciones consecutivas (n - 1 valores)"""
+    if np is not None:
+        values = np.asarray(prices, dtype=np.float64)
+        return (values[1:] / values[:-1] - 1.0) * 100.0
+    return array('d', ((b / a - 1.0) * 100.0 for a, b in zip(prices, prices[1:])))
+
+
+def cumulative_change(prices: Sequence[float]) -> Sequence[float]:
+    """Devaluación acumulada (%) respecto a la primera observación"""
+    if len(prices) == 0:
+        return prices
+    if np is not None:
+        values = np.asarray(prices, dtype=np.float64)
+        return (values / values[0] - 1.0) * 100.0
+    first = prices[0]
+    return array('d', ((p / first - 1.0) * 100.0 for p in prices))
+
+
+def rolling_mean(prices: Sequence[float], window: int) -> Sequence[float]:
+    """Media móvil de `window` observaciones (n - window + 1 valores)"""
+    if window <= 0 or len(prices) < window:
+        return make_series([], []).prices
+    if np is not None:
+        sums = np.cumsum(np.concatenate(([0.0], np.asarray(prices, dtype=np.float64))))
+        return (sums[window:] - sums[:-window]) / window
+
+    result = array('d')
+    total = sum(prices[:window])
+    result.append(total / window)
+    for i in range(window, len(prices)):
+        total += prices[i] - prices[i - window]
+        result.append(total / window)
+    return result
+
+
+def rolling_std(prices: Sequence[float], window: int) -> Sequence[float]:
+    """Desviación estándar móvil (poblacional) de `window` observaciones"""
+    if window <= 0 or len(prices) < window:
+        return make_series([], []).prices
+    if np is not None:
+        values = np.asarray(prices, dtype=np.float64)
+        windows = np.lib.stride_tricks.sliding_window_view(values, window)
+        return windows.std(axis=1)
+
+    means = rolling_mean(prices, window)
+    squares = rolling_mean(array('d', (p * p for p in prices)), window)
+    return array('d', (math.sqrt(max(sq - m * m, 0.0)) for m, sq in zip(means, squares)))
+
+
+def volatility(prices: Sequence[float], window: int) -> Sequence[float]:
+    """Volatilidad: desviación estándar móvil de la variación porcentual diaria"""
+    return rolling_std(pct_change(prices), window)
+
+
+def period_keys(days: Sequence[int], period: str) -> Sequence[int]:
+    """Clave de periodo por observación: día de inicio de la semana (lunes) o del mes"""
+    if period == 'semanal':
+        # 1970-01-01 fue jueves: se desplaza 3 días para que las semanas inicien en lunes
+        if np is not None:
+            values = np.asarray(days, dtype=np.int64)
+            return values - (values + 3) % 7
+        return array('q', (d - (d + 3) % 7 for d in days))
+    if period == 'mensual':
+        if np is not None:
+            months = np.asarray(days, dtype=np.int64).astype('datetime64[D]').astype('datetime64[M]')
+            return months.astype('datetime64[D]').astype(np.int64)
+        return array('q', (to_epoch_day(from_epoch_day(d).replace(day=1).isoformat()) for d in days))
+    raise ValueError(f"Periodo no soportado: {period}")
+
+
+def resample(series: RateSeries, period: str, how: str = 'last') -> RateSeries:
+    """
+    Remuestrea la serie a 'semanal' o 'mensual'.
+
+    `how` = 'last' toma la última tasa del periodo (cierre); 'mean' el promedio.
+    """
+    if len(series.days) == 0:
+        return series
+    keys = period_keys(series.days, period)
+    if np is not None:
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        if how == 'mean':
+            sums = np.add.reduceat(series.prices, starts)
+            counts = np.diff(np.append(starts, len(keys)))
+            values = sums / counts
+        else:
+            ends = np.append(starts[1:], len(keys)) - 1
+            values = series.prices[ends]
+        return RateSeries(keys[starts], values)
+
+    out_days, out_prices, bucket = array('q'), array('d'), []
+    for i, key in enumerate(keys):
+        if out_days and out_days[-1] == key:
+            bucket.append(series.prices[i])
+            continue
+        if bucket:
+            out_prices.append(sum(bucket) / len(bucket) if how == 'mean' else bucket[-1])
+        out_days.append(key)
+        bucket = [series.prices[i]]
+    out_prices.append(sum(bucket) / len(bucket) if how == 'mean' else bucket[-1])
+    return RateSeries(out_days, out_prices)
+
+
+def detect_gaps(days: Sequence[int], max_gap_days: int = 1) -> List[Tuple[int, int, int]]:
+    """
+    Huecos en la serie: (día_anterior, día_siguiente, días_faltantes) cuando dos
+    observaciones consecutivas están separadas por más de `max_gap_days`.
+    """
+    if len(days) < 2:
+        return []
+    if np is not None:
+        values = np.asarray(days, dtype=np.int64)
+        diffs = np.diff(values)
+        positions = np.flatnonzero(diffs > max_gap_days)
+        return [(int(values[i]), int(values[i + 1]), int(diffs[i] - 1)) for i in positions]
+    return [(a, b, b - a - 1) for a, b in zip(days, days[1:]) if b - a > max_gap_days]
+
+
+def print_summary(series: RateSeries, currency: str) -> None:
+    """Resumen del historial: rango, último valor, variación y devaluación acumulada"""
+    if len(series.days) == 0:
+        print("Historial vacío")
+        return
+    changes = pct_change(series.prices)
+    cumulative = cumulative_change(series.prices)
+    print(f"📊 {currency}: {len(series.days)} observaciones "
+          f"({from_epoch_day(series.days[0])} → {from_epoch_day(series.days[-1])})")
+    print(f"💰 Última tasa: {series.prices[-1]:,.4f} Bs")
+    if len(changes):
+        print(f"📈 Última variación: {changes[-1]:+.2f}%")
+    print(f"📉 Devaluación acumulada: {cumulative[-1]:+.2f}%")
+
+
+def main():
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Análisis del historial de tasas del BCV")
+    parser.add_argument('--currency', default='USD', choices=list(ScraperConfig.CURRENCY_DIV_IDS))
+    parser.add_argument('--rolling', type=int, metavar='N', help="Media y desviación móviles de N observaciones")
+    parser.add_argument('--resample', choices=['semanal', 'mensual'], help="Tasa de cierre por periodo")
+    parser.add_argument('--gaps', type=int, nargs='?', const=3, metavar='DÍAS',
+                        help="Huecos mayores a DÍAS (por defecto 3, para ignorar fines de semana)")
+    args = parser.parse_args()
+
+    series = load_series(args.currency)
+    print_summary(series, args.currency)
+
+    if args.rolling:
+        means = rolling_mean(series.prices, args.rolling)
+        stds = rolling_std(series.prices, args.rolling)
+        vols = volatility(series.prices, args.rolling)
+        offset = args.rolling - 1
+        print(f"\n📐 Ventana móvil de {args.rolling} observaciones:")
+        for i in range(max(len(means) - 10, 0), len(means)):
+            vol = vols[i - 1] if 0 < i <= len(vols) else float('nan')
+            print(f"  {from_epoch_day(series.days[i + offset])}  media {means[i]:,.4f}  "
+                  f"desv {stds[i]:,.4f}  volatilidad {vol:.3f}%")
+
+    if args.resample:
+        resampled = resample(series, args.resample)
+        print(f"\n🗓️  Cierre {args.resample}:")
+        for day, price in zip(resampled.days, resampled.prices):
+            print(f"  {from_epoch_day(day)}  {price:,.4f} Bs")
+
+    if args.gaps is not None:
+        gaps = detect_gaps(series.days, args.gaps)
+        print(f"\n🕳️  Huecos mayores a {args.gaps} días: {len(gaps)}")
+        for before, after, missing in gaps:
+            print(f"  {from_epoch_day(before)} → {from_epoch_day(after)} ({missing} días)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Importación masiva de tasas históricas del BCV
+Procesa en paralelo (un proceso por archivo) los libros .xls trimestrales que
+publica el BCV y copias archivadas de su página de inicio, descarta las fechas
+que ya están en el historial y agrega el resto en una sola escritura. Si hay
+fechas anteriores a la última guardada, el historial se reescribe ordenado.
+Al terminar regenera la publicación de datos/ y las instantáneas.
+
+Uso:
+    python backfill.py archivos/2_1_2a25_smc.xls paginas/*.html
+"""
+
+import argparse
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from config import ScraperConfig
+from history import load_index
+from storage import store_records, rewrite_records, read_records, ensure_history_file
+
+try:
+    import xlrd
+except ImportError:
+    xlrd = None
+
+# Fecha valor en las hojas del BCV: "Fecha Valor: 24/10/2025"
+FECHA_VALOR_TEXT = re.compile(r'Fecha\s+Valor:?\s*(\d{1,2})/(\d{1,2})/(\d{4})', re.IGNORECASE)
+# Fecha valor en la página de inicio: <span class="date-display-single" content="2025-10-24T00:00:00-04:00">
+FECHA_VALOR_HTML = re.compile(rb'date-display-single[^>]*content="(\d{4}-\d{2}-\d{2})')
+
+# Filas de un archivo: (fecha YYYY-MM-DD, {código: tasa})
+ParsedRows = List[Tuple[str, Dict[str, float]]]
+
+
+def to_float(value) -> Optional[float]:
+    """Convierte una celda (número o texto con coma decimal) a float"""
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    text = str(value).strip()
+    if ',' in text:
+        text = text.replace('.', '').replace(',', '.')
+    try:
+        number = float(text)
+        return number if number > 0 else None
+    except ValueError:
+        return None
+
+
+def parse_xls_sheet(sheet) -> Optional[Tuple[str, Dict[str, float]]]:
+    """
+    Extrae la fecha valor y las tasas de una hoja del libro del BCV.
+
+    Cada fila de moneda tiene el código ISO en alguna celda y la tasa de venta
+    (Bs/divisa) como último valor numérico de la fila.
+    """
+    price_date, rates = None, {}
+    codes = set(ScraperConfig.CURRENCY_DIV_IDS)
+    for row_index in range(sheet.nrows):
+        row = sheet.row_values(row_index)
+        for cell in row:
+            match = FECHA_VALOR_TEXT.search(str(cell))
+            if match and price_date is None:
+                day, month, year = (int(g) for g in match.groups())
+                price_date = f"{year:04d}-{month:02d}-{day:02d}"
+        code = next((str(c).strip().upper() for c in row if str(c).strip().upper() in codes), None)
+        if code and code not in rates:
+            numbers = [n for n in map(to_float, row) if n is not None]
+            if numbers:
+                rates[code] = numbers[-1]
+    if price_date and 'USD' in rates:
+        return price_date, rates
+    return None
+
+
+def parse_xls_file(path: str) -> ParsedRows:
+    """Todas las fechas de un libro .xls (una hoja por día hábil)"""
+    if xlrd is None:
+        raise RuntimeError("Se requiere 'xlrd' para leer archivos .xls (pip install xlrd)")
+    workbook = xlrd.open_workbook(path, on_demand=True)
+    try:
+        rows = []
+        for sheet_index in range(workbook.nsheets):
+            parsed = parse_xls_sheet(workbook.sheet_by_index(sheet_index))
+            if parsed:
+                rows.append(parsed)
+            workbook.unload_sheet(sheet_index)
+        return rows
+    finally:
+        workbook.release_resources()
+
+
+def parse_html_file(path: str) -> ParsedRows:
+    """Fecha valor y tasas de una copia archivada de la página de inicio"""
+    from bcv_scraper import find_rates_in_content
+
+    with open(path, 'rb') as f:
+        content = f.read()
+    match = FECHA_VALOR_HTML.search(content)
+    if not match:
+        logging.warning(f"Sin fecha valor en {path}; se omite")
+        return []
+    rates = find_rates_in_content(content)
+    return [(match.group(1).decode(), rates)] if 'USD' in rates else []
+
+
+def parse_archive_file(path: str) -> ParsedRows:
+    """Parsea un archivo histórico según su extensión (se ejecuta en un proceso aparte)"""
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == '.xls':
+            return parse_xls_file(path)
+        if extension in ('.html', '.htm'):
+            return parse_html_file(path)
+        logging.warning(f"Extensión no soportada: {path}")
+    except Exception as e:
+        logging.error(f"Error al procesar {path}: {e}")
+    return []
+
+
+def parse_archives(paths: List[str], workers: Optional[int] = None) -> ParsedRows:
+    """Parsea los archivos en paralelo con un pool de procesos"""
+    if len(paths) <= 1 or workers == 1:
+        return [row for path in paths for row in parse_archive_file(path)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return [row for rows in executor.map(parse_archive_file, paths) for row in rows]
+
+
+def build_backfill_records(rows: ParsedRows, known_dates: set) -> List[Dict]:
+    """
+    Convierte las filas en registros del historial, descartando fechas repetidas
+    (ya presentes en el historial o duplicadas entre archivos).
+    """
+    from bcv_scraper import PriceRow, rows_to_entries, get_timezone
+
+    venezuela_tz = get_timezone()
+    price_rows, seen = [], set(known_dates)
+    for date_key, rates in sorted(rows, key=lambda row: row[0]):
+        if date_key in seen:
+            continue
+        seen.add(date_key)
+        price_date = datetime.strptime(date_key, '%Y-%m-%d').replace(tzinfo=venezuela_tz)
+        price_rows.append(PriceRow(rates['USD'], price_date, price_date, rates))
+    return rows_to_entries(price_rows)
+
+
+def save_backfill_records(records: List[Dict], last_date: Optional[str]) -> bool:
+    """
+    Guarda los registros importados manteniendo el historial ordenado por
+    fecha: se agregan al final si son todos posteriores a la última fecha
+    guardada y, si no, se reescribe el historial completo.
+    """
+    if last_date is None or records[0]['fecha_precio'][:10] > last_date:
+        return store_records(records)
+    logging.info(f"Hay fechas anteriores al {last_date}: se reescribe el historial ordenado")
+    # Los índices (persistidos y en memoria) detectan el archivo nuevo por su inodo
+    return rewrite_records(read_records() + records)
+
+
+def backfill(paths: List[str], workers: Optional[int] = None, dry_run: bool = False) -> int:
+    """Importa los archivos al historial y regenera lo derivado; devuelve los registros nuevos"""
+    ensure_history_file()
+    rows = parse_archives(paths, workers)
+    known_dates = load_index().dates
+    records = build_backfill_records(rows, set(known_dates))
+    logging.info(f"{len(rows)} fechas leídas, {len(records)} nuevas")
+
+    if records and not dry_run:
+        if not save_backfill_records(records, known_dates[-1] if known_dates else None):
+            raise RuntimeError("No se pudieron guardar los registros importados")
+        from publish import publish_all
+        from snapshot import update_snapshots
+        changed = publish_all()
+        logging.info(f"Publicación regenerada: {len(changed)} archivos actualizados")
+        update_snapshots(ScraperConfig.CURRENCY_DIV_IDS)
+    return len(records)
+
+
+def main():
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Importación de tasas históricas del BCV")
+    parser.add_argument('paths', nargs='+', help="Archivos .xls del BCV o páginas .html archivadas")
+    parser.add_argument('--workers', type=int, help="Procesos en paralelo (por defecto, núcleos disponibles)")
+    parser.add_argument('--dry-run', action='store_true', help="Solo contar, sin escribir el historial")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=ScraperConfig.LOG_FORMAT)
+    added = backfill(args.paths, args.workers, args.dry_run)
+    print(f"✅ {added} registros {'por importar' if args.dry_run else 'importados'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,55 +10,75 @@ Aplicando paradigma funcional:
 ✅ Código más simple y directo
 """
 
-import requests
-from bs4 import BeautifulSoup
-import json
-import os
+from __future__ import annotations
+
+import argparse
 import logging
 import re
-import urllib3
-from datetime import datetime
-import pytz
-from typing import Optional, List, Dict, Any, Tuple
-from functools import partial
+import time
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from itertools import repeat
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Iterable, NamedTuple, Tuple
+from functools import lru_cache, partial
+import config
 from config import ScraperConfig
-from notifications import send_notifications
+from alerts import check_new_rate, should_notify
+from storage import store_records, read_records, ensure_history_file
+from metrics import timed, increment, set_gauge, emit_event, setup_event_log, write_textfile
+
+# requests, BeautifulSoup, urllib3 y smtplib se importan solo en las funciones
+# que los usan: las consultas del historial arrancan sin cargarlos
+if TYPE_CHECKING:
+    import requests
+    from bs4 import BeautifulSoup
+    from page_cache import ParsedPage
 
 # Configuración desde el módulo centralizado
 BCV_URLS = ScraperConfig.BCV_URLS
 HTTP_HEADERS = ScraperConfig.HTTP_HEADERS
 DATA_FILE = ScraperConfig.DATA_FILE
+HISTORY_FILE = ScraperConfig.HISTORY_FILE
 LOG_FILE = ScraperConfig.LOG_FILE
 REQUEST_TIMEOUT = ScraperConfig.REQUEST_TIMEOUT
 TIMEZONE = ScraperConfig.TIMEZONE
-USD_KEYWORDS = ScraperConfig.USD_KEYWORDS
+CURRENCY_DIV_IDS = ScraperConfig.CURRENCY_DIV_IDS
 PRICE_PATTERN = re.compile(ScraperConfig.PRICE_PATTERN)
 
-# Deshabilitar advertencias SSL
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 
 def setup_logging() -> None:
-    """Configura el sistema de logging"""
+    """Configura el sistema de logging (archivo rotativo por tamaño y eventos JSON)"""
+    from logging.handlers import RotatingFileHandler
+
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler(LOG_FILE),
+            RotatingFileHandler(LOG_FILE, maxBytes=ScraperConfig.LOG_MAX_BYTES,
+                                backupCount=ScraperConfig.LOG_BACKUP_COUNT, encoding='utf-8'),
             logging.StreamHandler()
         ]
     )
+    setup_event_log()
+    if config.LOCAL_ENV_LOADED:
+        logging.info("Variables de entorno cargadas desde configurar_env.py")
 
 
-def get_venezuela_time() -> datetime:
-    """Obtiene la hora actual de Venezuela"""
-    venezuela_tz = pytz.timezone(TIMEZONE)
-    return datetime.now(venezuela_tz)
+@lru_cache(maxsize=None)
+def get_timezone() -> tzinfo:
+    """Zona horaria de Venezuela (se resuelve una sola vez por proceso)"""
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+    try:
+        return ZoneInfo(TIMEZONE)
+    except ZoneInfoNotFoundError:
+        # Windows sin el paquete tzdata: Venezuela usa UTC-4 fijo desde 2016
+        logging.warning(f"Zona horaria {TIMEZONE} no disponible; se usa UTC-4")
+        return timezone(timedelta(hours=-4), 'VET')
 
-def format_timestamp(dt: datetime) -> str:
-    """Formatea un datetime a string legible"""
-    return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+def get_venezuela_time() -> datetime:
+    """Obtiene la hora actual de Venezuela"""
+    return datetime.now(get_timezone())
 
 
 def get_iso_timestamp(dt: datetime) -> str:
@@ -66,19 +86,16 @@ def get_iso_timestamp(dt: datetime) -> str:
     return dt.isoformat()
 
 
+def format_iso_timestamp(iso: str) -> str:
+    """Fecha y hora legibles (YYYY-MM-DD HH:MM:SS) recortando un isoformat() ya calculado"""
+    return f"{iso[:10]} {iso[11:19]}"
+
+
 def clean_text(text: str) -> str:
     """Limpia texto eliminando espacios extra"""
     return text.strip() if text else ""
 
 
-def contains_any_keyword(text: str, keywords: List[str]) -> bool:
-    """Verifica si un texto contiene alguna palabra clave"""
-    if not text or not keywords:
-        return False
-    text_upper = text.upper()
-    return any(keyword.upper() in text_upper for keyword in keywords)
-
-
 def extract_price_from_text(text: str) -> Optional[str]:
     """Extrae un precio de un texto usando regex"""
     if not text:
@@ -99,118 +116,224 @@ def parse_price_to_float(price_text: str) -> Optional[float]:
         return None
 
 
-def make_http_request(url: str) -> Optional[requests.Response]:
-    """Realiza una petición HTTP"""
-    try:
-        logging.info(f"Accediendo a {url}")
-        response = requests.get(
-            url,
-            headers=HTTP_HEADERS,
-            timeout=REQUEST_TIMEOUT,
-            verify=False
-        )
-        response.raise_for_status()
-        return response
-    except Exception as e:
-        logging.warning(f"Error con {url}: {e}")
+def find_dollar_price(soup: BeautifulSoup) -> Optional[float]:
+    """
+    Busca el precio del dólar usando múltiples estrategias.
+
+    Todas las estrategias se evalúan en un único recorrido del documento
+    (ver extraction.collect_price_candidates) y el resultado respeta el orden
+    de prioridad: div#dolar, texto USD, tablas y selectores CSS.
+    """
+    match = find_dollar_price_match(soup)
+    if match is None:
         return None
+    record_strategy(match[1])
+    return match[0]
 
 
-def fetch_page_content() -> Optional[BeautifulSoup]:
-    """Obtiene el contenido HTML de la página del BCV"""
-    for url in BCV_URLS:
-        response = make_http_request(url)
-        if response:
-            return BeautifulSoup(response.content, 'html.parser')
+def find_dollar_price_match(soup: BeautifulSoup) -> Optional[Tuple[float, str]]:
+    """Precio del dólar y la estrategia que lo encontró, sin registrar métricas"""
+    if not soup:
+        return None
     
-    logging.error("No se pudo acceder a ninguna URL del BCV")
-    return None
-
+    from extraction import collect_price_candidates
 
-def search_in_dollar_div(soup: BeautifulSoup) -> Optional[str]:
-    """Busca precio en el div específico con id='dolar'"""
-    dolar_div = soup.find('div', id='dolar')
-    if not dolar_div:
-        return None
+    try:
+        candidates = collect_price_candidates(
+            soup, accept=lambda text: parse_price_to_float(text) is not None
+        )
+    except Exception as e:
+        logging.warning(f"Error en estrategia de búsqueda: {e}")
+        candidates = []
     
-    strong_element = dolar_div.find('strong')
-    if not strong_element:
-        return None
+    for strategy, price_text in candidates:
+        price_float = parse_price_to_float(price_text)
+        if price_float:
+            logging.info(f"Precio encontrado: {price_text} (estrategia: {strategy})")
+            return price_float, strategy
     
-    price_text = clean_text(strong_element.get_text())
-    return extract_price_from_text(price_text)
-
-
-def search_in_usd_text(soup: BeautifulSoup) -> Optional[str]:
-    """Busca precio en texto que contenga palabras clave de USD"""
-    for keyword in USD_KEYWORDS:
-        elements = soup.find_all(string=lambda text: keyword.lower() in text.lower() if text else False)
-        for element in elements:
-            if element.parent:
-                price_text = clean_text(element.parent.get_text())
-                price = extract_price_from_text(price_text)
-                if price:
-                    return price
+    logging.warning("No se encontró el precio del dólar en la página")
     return None
 
 
-def search_in_tables(soup: BeautifulSoup) -> Optional[str]:
-    """Busca precio en tablas HTML"""
-    tables = soup.find_all('table')
-    for table in tables:
-        rows = table.find_all('tr')
-        for row in rows:
-            cells = row.find_all(['td', 'th'])
-            for cell in cells:
-                cell_text = clean_text(cell.get_text())
-                if contains_any_keyword(cell_text, USD_KEYWORDS):
-                    price = extract_price_from_text(cell_text)
-                    if price:
-                        return price
-    return None
+def record_strategy(strategy: str, **fields) -> None:
+    """Registra qué estrategia encontró el precio del dólar"""
+    increment('bcv_extraction_strategy_total', strategy=strategy)
+    emit_event('extraction', strategy=strategy, **fields)
 
 
-def search_with_css_selectors(soup: BeautifulSoup) -> Optional[str]:
-    """Busca precio usando selectores CSS específicos"""
-    selectors = ScraperConfig.PRICE_SELECTORS
-    
-    for selector in selectors:
-        elements = soup.select(selector)
-        for element in elements:
-            text = clean_text(element.get_text())
-            price = extract_price_from_text(text)
-            if price:
-                return price
-    return None
+def get_target_div_ids() -> List[str]:
+    """Ids de los divs a extraer según el modo multimoneda"""
+    if ScraperConfig.MULTI_CURRENCY_ENABLED:
+        return list(CURRENCY_DIV_IDS.values())
+    return [CURRENCY_DIV_IDS['USD']]
 
 
-def find_dollar_price(soup: BeautifulSoup) -> Optional[float]:
-    """Busca el precio del dólar usando múltiples estrategias"""
-    if not soup:
+def parse_rate_texts(texts: Dict[str, str]) -> Dict[str, float]:
+    """Convierte {id_del_div: texto} en {código_moneda: precio}"""
+    rates = {}
+    for code, div_id in CURRENCY_DIV_IDS.items():
+        price_text = extract_price_from_text(texts.get(div_id, ''))
+        price = parse_price_to_float(price_text) if price_text else None
+        if price:
+            rates[code] = price
+    return rates
+
+
+def parse_page(content: bytes) -> ParsedPage:
+    """
+    Busca todas las tasas oficiales publicadas en el HTML crudo.
+
+    Primero escanea los divs de monedas sin construir el árbol; solo si el USD
+    no aparece se parsea la página una vez, se leen los divs de monedas y el
+    USD se busca con todas las estrategias de find_dollar_price.
+    """
+    from page_cache import ParsedPage
+    from extraction import scan_currency_divs
+
+    div_ids = get_target_div_ids()
+    rates = parse_rate_texts(scan_currency_divs(content, div_ids))
+    if 'USD' in rates:
+        logging.info(f"Tasas encontradas (ruta rápida): {rates}")
+        return ParsedPage(rates, 'ruta_rapida')
+
+    from bs4 import BeautifulSoup
+    from extraction import find_currency_texts_in_soup, get_html_parser
+
+    soup = BeautifulSoup(content, get_html_parser())
+    rates = parse_rate_texts(find_currency_texts_in_soup(soup, div_ids))
+    if 'USD' in rates:
+        return ParsedPage(rates, 'divs_monedas')
+    match = find_dollar_price_match(soup)
+    if match is None:
+        return ParsedPage(rates, None)
+    rates['USD'] = match[0]
+    return ParsedPage(rates, match[1])
+
+
+def extract_page(content: bytes, digest: Optional[str] = None) -> ParsedPage:
+    """
+    Tasas de una página, parseándola solo si su hash no está en el LRU.
+
+    El mismo cuerpo servido por otro espejo o en otra consulta del daemon
+    cuesta un hash en lugar de un parseo.
+    """
+    from page_cache import hash_content, get_parsed, remember_parsed
+
+    digest = digest or hash_content(content)
+    page = get_parsed(digest)
+    if page is not None:
+        logging.info(f"Página ya parseada (estrategia: {page.strategy}); se reutilizan las tasas {page.rates}")
+        if page.strategy:
+            record_strategy('cache', matched=page.strategy)
+        return page
+
+    page = parse_page(content)
+    remember_parsed(digest, page)
+    if page.strategy:
+        record_strategy(page.strategy)
+    return page
+
+
+def find_rates_in_content(content: bytes) -> Dict[str, float]:
+    """Busca todas las tasas oficiales publicadas en el HTML crudo (ver parse_page)"""
+    return dict(extract_page(content).rates)
+
+
+def find_price_in_content(content: bytes) -> Optional[float]:
+    """Busca el precio del dólar en el HTML crudo"""
+    return find_rates_in_content(content).get('USD')
+
+
+def parse_response_rates(url: str, response: requests.Response,
+                         cache: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, float]]:
+    """
+    Extrae las tasas de una respuesta HTTP (None si no hay precio del dólar).
+
+    Si el servidor respondió 304 o el cuerpo es idéntico al último visto para
+    esa URL (o para otro espejo), se reutilizan las tasas guardadas sin
+    construir el árbol HTML.
+    """
+    from page_cache import get_cached_rates, get_entry_rates, find_entry_by_hash, build_entry, hash_content
+
+    entry = cache.get(url)
+    digest = hash_content(response.content)
+    cached_rates = get_cached_rates(entry, response.status_code, digest)
+    if cached_rates is not None:
+        logging.info(f"Página sin cambios en {url}; se reutilizan las tasas {cached_rates}")
+        record_strategy('cache', matched=entry.get('strategy'))
+        return cached_rates
+    if response.status_code == 304:
         return None
-    
-    # Estrategias de búsqueda en orden de prioridad
-    search_strategies = [
-        search_in_dollar_div,
-        search_in_usd_text,
-        search_in_tables,
-        search_with_css_selectors
-    ]
-    
-    for strategy in search_strategies:
-        try:
-            price_text = strategy(soup)
-            if price_text:
-                price_float = parse_price_to_float(price_text)
-                if price_float:
-                    logging.info(f"Precio encontrado: {price_text}")
-                    return price_float
-        except Exception as e:
-            logging.warning(f"Error en estrategia de búsqueda: {e}")
-            continue
-    
-    logging.warning("No se encontró el precio del dólar en la página")
-    return None
+
+    twin = find_entry_by_hash(cache, digest)
+    if twin is not None:
+        rates, strategy = get_entry_rates(twin), twin.get('strategy')
+        logging.info(f"{url} sirve la misma página que otro espejo; se reutilizan las tasas {rates}")
+        record_strategy('cache', matched=strategy)
+    else:
+        with timed('parse', url=url, bytes=len(response.content)) as details:
+            rates, strategy = extract_page(response.content, digest)
+            details['found'] = 'USD' in rates
+    if 'USD' not in rates:
+        from dead_letter import capture_response
+        capture_response(url, response, 'sin precio del dólar', digest)
+        return None
+    cache[url] = build_entry(response.headers, digest, rates, strategy)
+    return dict(rates)
+
+
+def fetch_rates() -> Optional[Dict[str, float]]:
+    """
+    Obtiene las tasas del primer espejo que devuelva un precio del dólar válido.
+
+    En modo escalonado los espejos se consultan en paralelo y gana la primera
+    respuesta válida; si no, se prueban en secuencia como respaldo. Con la caché
+    de páginas activa se envían peticiones condicionales (ETag/Last-Modified).
+    Los espejos con el circuito abierto se omiten, y los que vencieron su
+    enfriamiento se sondean con un solo intento (circuit_breaker.py).
+    """
+    from http_client import fetch_url, fetch_hedged, get_url_stats, get_failure_code, NO_RESPONSE
+    from page_cache import load_cache, save_cache, get_conditional_headers
+    from circuit_breaker import load_circuits, save_circuits, plan_requests, record_result
+
+    cache = load_cache() if ScraperConfig.PAGE_CACHE_ENABLED else {}
+    circuits = load_circuits() if ScraperConfig.CIRCUIT_BREAKER_ENABLED else {}
+    plan = plan_requests(BCV_URLS, circuits)
+    urls = [url for url, _ in plan]
+    headers = {url: get_conditional_headers(cache.get(url)) for url in urls}
+    options = {url: {'capture_errors': True, **({'max_retries': 0} if probe else {})} for url, probe in plan}
+    validate = partial(parse_response_rates, cache=cache)
+    reached: Dict[str, bool] = {}  # Por URL: si respondió (aunque fuera un 4xx o una página sin el precio)
+    rates = None
+
+    if ScraperConfig.HEDGED_REQUESTS:
+        result = fetch_hedged(urls, validate, headers=headers, options=options)
+        for attempt in result.attempts:
+            status = '✅' if attempt['ok'] else f"❌ {attempt['error']}"
+            logging.info(f"Espejo {attempt['url']}: {attempt['elapsed']:.3f}s {status}")
+            if attempt['error'] != 'cancelado':
+                reached[attempt['url']] = attempt['error'] != NO_RESPONSE
+        rates = result.value
+    else:
+        for url in urls:
+            logging.info(f"Accediendo a {url}")
+            response = fetch_url(url, headers=headers[url], **options[url])
+            reached[url] = response is not None or get_failure_code(url) != NO_RESPONSE
+            rates = validate(url, response) if response is not None else None
+            if rates is not None:
+                break
+
+    if ScraperConfig.CIRCUIT_BREAKER_ENABLED and reached:
+        errors = get_url_stats()
+        for url, ok in reached.items():
+            record_result(circuits, url, ok, None if ok else errors.get(url, {}).get('last_error'))
+        save_circuits(circuits)
+    if rates is None:
+        logging.error("No se pudo obtener el precio de ninguna URL del BCV")
+    elif ScraperConfig.PAGE_CACHE_ENABLED:
+        save_cache(dict(cache))
+    return rates
 
 
 def calculate_price_date(extraction_time: datetime) -> datetime:
@@ -222,84 +345,154 @@ def calculate_price_date(extraction_time: datetime) -> datetime:
     Si se extrae después de las 6:00 AM, el precio corresponde al día siguiente.
     """
     # Si es antes de las 6:00 AM, el precio corresponde al día actual
-    if extraction_time.hour < 6:
+    if extraction_time.hour < ScraperConfig.PUBLICATION_HOUR:
         return extraction_time.replace(hour=0, minute=0, second=0, microsecond=0)
     else:
         # Si es después de las 6:00 AM, el precio corresponde al día siguiente
-        from datetime import timedelta
         next_day = extraction_time + timedelta(days=1)
         return next_day.replace(hour=0, minute=0, second=0, microsecond=0)
 
 
-def create_price_entry(price: float) -> Dict[str, Any]:
-    """Crea una entrada de datos con timestamp y fecha del precio"""
-    now_venezuela = get_venezuela_time()
-    price_date = calculate_price_date(now_venezuela)
-    
-    return {
-        'fecha_extraccion': format_timestamp(now_venezuela),
-        'fecha_precio': format_timestamp(price_date),
-        'precio_dolar': price,
-        'timestamp_extraccion': get_iso_timestamp(now_venezuela),
-        'timestamp_precio': get_iso_timestamp(price_date),
-        'zona_horaria': f'{TIMEZONE} (UTC-4)',
-        'nota': 'Precio corresponde al día indicado en fecha_precio'
-    }
+class PriceRow(NamedTuple):
+    """Registro compacto: cada instante una sola vez, sin los textos derivados"""
+    price: float
+    extraction_time: datetime
+    price_date: datetime
+    rates: Optional[Dict[str, float]] = None
+
+
+def build_price_rows(pairs: Iterable[Tuple[float, datetime]],
+                     rates: Optional[Iterable[Optional[Dict[str, float]]]] = None) -> List[PriceRow]:
+    """
+    Crea registros compactos para muchos pares (precio, hora de extracción).
+
+    La fecha_precio se calcula una vez por día (y por lado de la hora de
+    publicación); `rates` es opcional y va en paralelo a `pairs`.
+    """
+    price_dates: Dict[Tuple[date, bool, Optional[tzinfo]], datetime] = {}
+    rows = []
+    for (price, extraction_time), row_rates in zip(pairs, repeat(None) if rates is None else rates):
+        key = (extraction_time.date(), extraction_time.hour < ScraperConfig.PUBLICATION_HOUR,
+               extraction_time.tzinfo)
+        price_date = price_dates.get(key)
+        if price_date is None:
+            price_date = price_dates[key] = calculate_price_date(extraction_time)
+        rows.append(PriceRow(price, extraction_time, price_date, row_rates))
+    return rows
+
+
+def rows_to_entries(rows: Iterable[PriceRow]) -> List[Dict[str, Any]]:
+    """
+    Convierte registros compactos al diccionario del historial.
+
+    Es el único paso que genera las cuatro representaciones de fecha; las de
+    fecha_precio se formatean una vez por día.
+    """
+    zone = f'{TIMEZONE} (UTC-4)'
+    note = 'Precio corresponde al día indicado en fecha_precio'
+    price_fields: Dict[datetime, Tuple[str, str]] = {}
+    entries = []
+    for row in rows:
+        fields = price_fields.get(row.price_date)
+        if fields is None:
+            iso = get_iso_timestamp(row.price_date)
+            fields = price_fields[row.price_date] = (format_iso_timestamp(iso), iso)
+        extraction_iso = get_iso_timestamp(row.extraction_time)
+        entry = {
+            'fecha_extraccion': format_iso_timestamp(extraction_iso),
+            'fecha_precio': fields[0],
+            'precio_dolar': row.price,
+            'timestamp_extraccion': extraction_iso,
+            'timestamp_precio': fields[1],
+            'zona_horaria': zone,
+            'nota': note
+        }
+        if row.rates:
+            other_rates = {code: value for code, value in row.rates.items() if code != 'USD'}
+            if other_rates:
+                entry['tasas'] = other_rates
+        entries.append(entry)
+    return entries
+
+
+def create_price_entry(price: float, rates: Optional[Dict[str, float]] = None,
+                       extraction_time: Optional[datetime] = None,
+                       price_date: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Crea una entrada de datos con timestamp y fecha del precio.
+
+    Las demás monedas publicadas se guardan en 'tasas' ({código: precio});
+    el dólar permanece en 'precio_dolar' para compatibilidad. Por defecto se
+    usa la hora actual; las importaciones históricas pasan sus propias fechas
+    (para muchos registros, build_price_rows + rows_to_entries).
+    """
+    now_venezuela = extraction_time or get_venezuela_time()
+    price_date = price_date or calculate_price_date(now_venezuela)
+    return rows_to_entries([PriceRow(price, now_venezuela, price_date, rates)])[0]
 
 
 def load_existing_data() -> List[Dict[str, Any]]:
-    """Carga datos existentes del archivo JSON"""
-    if not os.path.exists(DATA_FILE):
-        return []
-    
-    try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
-        logging.warning(f"Error al cargar datos existentes: {e}")
-        return []
+    """Carga datos existentes del historial"""
+    ensure_history_file()
+    return read_records()
 
 
-def save_price_to_file(data: List[Dict[str, Any]]) -> bool:
-    """Escribe datos al archivo JSON"""
-    try:
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-        return True
-    except Exception as e:
-        logging.error(f"Error al escribir archivo: {e}")
-        return False
+def save_price_to_file(data_entry: Dict[str, Any]) -> bool:
+    """Agrega un registro al historial sin reescribir los anteriores"""
+    ensure_history_file()
+    return store_records([data_entry])
 
 
-def save_dollar_price(price: float) -> bool:
-    """Guarda el precio del dólar en el archivo JSON"""
+def save_dollar_price(price: float, rates: Optional[Dict[str, float]] = None) -> bool:
+    """
+    Guarda el precio del dólar (y las demás tasas, si las hay) en el historial.
+
+    Si la fecha_precio ya está guardada con la misma tasa no se escribe nada;
+    solo se notifica cuando la tasa nueva cumple alguna regla de alerta.
+    """
     try:
-        data_entry = create_price_entry(price)
-        existing_data = load_existing_data()
-        updated_data = existing_data + [data_entry]  # Inmutabilidad
-        
-        success = save_price_to_file(updated_data)
+        data_entry = create_price_entry(price, rates)
+        with timed('detect') as details:
+            alerts = check_new_rate(data_entry['fecha_precio'], price)
+            details['duplicate'] = alerts is None
+        if alerts is None:
+            return True
+        with timed('persist', backend=ScraperConfig.STORAGE_BACKEND) as details:
+            success = save_price_to_file(data_entry)
+            details['ok'] = success
         if success:
             logging.info(f"Precio guardado: {price} Bs")
+            for code, rate in (rates or {'USD': price}).items():
+                set_gauge('bcv_last_rate', rate, currency=code)
+            from snapshot import update_snapshots
+            update_snapshots(rates or ['USD'])
+            if ScraperConfig.PUBLISH_ENABLED:
+                from publish import publish_records
+                changed = publish_records([data_entry])
+                logging.info(f"Publicación actualizada: {', '.join(changed) or 'sin cambios'}")
             
-            # Enviar notificaciones si está habilitado
-            if ScraperConfig.NOTIFICATIONS_ENABLED:
+            # Enviar notificaciones en segundo plano si está habilitado
+            if ScraperConfig.NOTIFICATIONS_ENABLED and should_notify(alerts):
                 try:
-                    notification_results = send_notifications(
+                    notification = dict(
                         price=price,
                         price_date=data_entry['fecha_precio'],
-                        extraction_time=data_entry['fecha_extraccion']
+                        extraction_time=data_entry['fecha_extraccion'],
+                        rates=data_entry.get('tasas'),
+                        alerts=alerts
                     )
-                    
-                    # Log de resultados de notificaciones
-                    if notification_results.get('email'):
-                        logging.info("✅ Notificación por email enviada")
-                    if notification_results.get('telegram'):
-                        logging.info("✅ Notificación por Telegram enviada")
-                        
+                    if ScraperConfig.OUTBOX_ENABLED:
+                        from outbox import enqueue_update, start_background_drain
+                        enqueue_update(**notification)
+                        start_background_drain()
+                    else:
+                        from notifications import dispatch_notifications
+                        dispatch_notifications(**notification)
                 except Exception as e:
                     logging.warning(f"Error al enviar notificaciones: {e}")
                     # No fallar el proceso principal por errores de notificación
+            elif ScraperConfig.NOTIFICATIONS_ENABLED:
+                logging.info("Sin cambios relevantes; no se envían notificaciones")
         
         return success
         
@@ -311,34 +504,53 @@ def save_dollar_price(price: float) -> bool:
 def extract_and_save_price() -> bool:
     """Función principal que extrae y guarda el precio del dólar"""
     logging.info("Iniciando extracción del precio del dólar del BCV")
+    # Migrar el historial antes del consenso y la detección: ambos comparan con la última tasa guardada
+    ensure_history_file()
+    from outbox import drain_pending_in_background
+    drain_pending_in_background()  # Reintentos pendientes de ejecuciones anteriores
     
-    # Paso 1: Obtener contenido de la página
-    soup = fetch_page_content()
-    if not soup:
-        logging.error("No se pudo obtener el contenido de la página")
-        return False
-    
-    # Paso 2: Extraer precio del dólar
-    price = find_dollar_price(soup)
-    if price is None:
-        logging.error("No se pudo obtener el precio del dólar")
-        return False
-    
-    # Paso 3: Guardar precio
-    success = save_dollar_price(price)
-    if not success:
-        logging.error("Error al guardar el precio")
-        return False
+    with timed('run') as run:
+        # Pasos 1 y 2: Consultar las fuentes en paralelo y validar las tasas por consenso
+        with timed('fetch') as details:
+            from sources import fetch_validated_rates
+            rates = fetch_validated_rates()
+            details['ok'] = rates is not None
+        if rates is None:
+            logging.error("No se pudo obtener el precio del dólar")
+            run['outcome'] = 'sin_precio'
+        
+        # Paso 3: Guardar precio
+        elif not save_dollar_price(rates['USD'], rates):
+            logging.error("Error al guardar el precio")
+            run['outcome'] = 'error_guardado'
+        
+        else:
+            logging.info("Proceso completado exitosamente")
+            run['outcome'] = 'ok'
+            set_gauge('bcv_last_success_timestamp_seconds', time.time())
     
-    logging.info("Proceso completado exitosamente")
-    return True
+    increment('bcv_runs_total', outcome=run['outcome'])
+    return run['outcome'] == 'ok'
 
 
-def main():
-    """Función principal del script"""
+def run_scrape(daemon: bool = False, publish: bool = False, accept_unconfirmed: bool = False) -> None:
+    """Subcomando `scrape`: extrae y guarda el precio (o queda residente con --daemon)"""
     setup_logging()
+    if publish:
+        ScraperConfig.PUBLISH_ENABLED = True
+    if accept_unconfirmed:
+        ScraperConfig.PLAUSIBLE_CHANGE_PCT = 0
     
+    if daemon:
+        from scheduler import run_daemon
+        run_daemon()
+        return
+    
+    from notifications import wait_for_notifications
+
     success = extract_and_save_price()
+    wait_for_notifications()
+    write_textfile()
     
     if success:
         print("Precio del dólar extraído y guardado exitosamente")
@@ -347,5 +559,106 @@ def main():
         exit(1)
 
 
+def show_latest(currency: str) -> None:
+    """Subcomando `latest`: última tasa guardada, sin tocar la red"""
+    from history import load_index, get_latest_rate
+
+    result = get_latest_rate(load_index(currency=currency))
+    if result is None:
+        print("Historial vacío")
+        exit(1)
+    print(f"{result[0]}  {result[1]:,.4f} Bs")
+
+
+def show_health() -> None:
+    """
+    Subcomando `health`: estado de los espejos, atraso del historial y
+    páginas fallidas, sin tocar la red. Sale con 1 si todos los espejos
+    están abiertos o la última fecha_precio tiene más de HEALTH_MAX_AGE_DAYS
+    días de atraso.
+    """
+    from circuit_breaker import load_circuits, describe_circuit, get_state, STATE_OPEN
+    from dead_letter import list_captures
+    from history import load_index, get_latest_rate
+
+    circuits = load_circuits()
+    print("Espejos del BCV:")
+    for url in BCV_URLS:
+        print(f"  {describe_circuit(url, circuits.get(url))}")
+    all_open = all(get_state(circuits.get(url)) == STATE_OPEN for url in BCV_URLS)
+
+    latest = get_latest_rate(load_index())
+    stale = True
+    if latest is None:
+        print("Última tasa: historial vacío")
+    else:
+        behind = (get_venezuela_time().date() - datetime.strptime(latest[0], '%Y-%m-%d').date()).days
+        stale = behind > ScraperConfig.HEALTH_MAX_AGE_DAYS
+        print(f"Última tasa: {latest[1]:,.4f} Bs para {latest[0]} "
+              f"({'al día' if behind <= 0 else f'{behind} día(s) de atraso'})")
+
+    captures = list_captures()
+    if captures:
+        meta = captures[-1].meta
+        print(f"Páginas fallidas: {len(captures)} en {ScraperConfig.DEAD_LETTER_DIR}/ "
+              f"(última {meta.get('captured_at', '?')}: {meta.get('reason', '?')})")
+    else:
+        print("Páginas fallidas: ninguna")
+
+    if all_open or stale:
+        print("Estado: ❌ DEGRADADO" + (" (todos los espejos abiertos)" if all_open else " (historial atrasado)"))
+        exit(1)
+    print("Estado: ✅ OK")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Línea de comandos con subcomandos (sin subcomando equivale a `scrape`)"""
+    from history import add_query_arguments
+
+    parser = argparse.ArgumentParser(description="Extractor del precio del dólar del BCV")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Mantenerse residente y consultar según la ventana de publicación")
+    subparsers = parser.add_subparsers(dest='command', metavar='{scrape,latest,history,notify-test,health}')
+
+    scrape = subparsers.add_parser('scrape', help="Extraer y guardar el precio (comando por defecto)")
+    scrape.add_argument('--daemon', action='store_true', default=argparse.SUPPRESS,
+                        help="Mantenerse residente y consultar según la ventana de publicación")
+    scrape.add_argument('--publish', action='store_true',
+                        help=f"Actualizar la partición del mes y latest.json en {ScraperConfig.PUBLISH_DIR}/")
+    scrape.add_argument('--accept-unconfirmed', action='store_true',
+                        help="Aceptar una tasa de una sola fuente aunque se aleje mucho de la última guardada")
+
+    latest = subparsers.add_parser('latest', help="Mostrar la última tasa guardada")
+    latest.add_argument('--currency', default='USD', choices=list(CURRENCY_DIV_IDS),
+                        help="Moneda a consultar (por defecto USD)")
+
+    history = subparsers.add_parser('history', help="Consultar el historial por fecha o rango")
+    add_query_arguments(history)
+
+    subparsers.add_parser('notify-test', help="Enviar una notificación de prueba por cada canal")
+    subparsers.add_parser('health', help="Resumen de espejos, atraso del historial y páginas fallidas")
+    return parser
+
+
+def main():
+    """Función principal del script"""
+    args = build_parser().parse_args()
+    command = args.command or 'scrape'
+
+    if command == 'scrape':
+        run_scrape(args.daemon, getattr(args, 'publish', False), getattr(args, 'accept_unconfirmed', False))
+    elif command == 'latest':
+        show_latest(args.currency)
+    elif command == 'history':
+        from history import run_query
+        run_query(args)
+    elif command == 'health':
+        show_health()
+    elif command == 'notify-test':
+        from notifications import test_notifications
+        logging.basicConfig(level=logging.INFO, format=ScraperConfig.LOG_FORMAT)
+        test_notifications()
+
+
 if __name__ == "__main__":
     main()
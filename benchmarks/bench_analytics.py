@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark de analytics.py sobre un historial sintético de 10 años
+Compara los bucles ad-hoc sobre la lista de diccionarios contra las
+operaciones columnares (NumPy si está instalado, si no `array`).
+
+Uso:
+    python benchmarks/bench_analytics.py [años]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+from analytics import make_series, to_epoch_day, pct_change, rolling_mean, rolling_std, resample, detect_gaps
+
+WINDOW = 30
+
+
+def build_history(years: int) -> List[Dict[str, Any]]:
+    """Historial sintético con el formato de create_price_entry (sin campos irrelevantes)"""
+    random.seed(42)
+    start, price, records = date(2016, 1, 1), 10.0, []
+    for offset in range(years * 365):
+        price *= 1 + random.gauss(0.002, 0.01)
+        day = start + timedelta(days=offset)
+        records.append({'fecha_precio': f"{day.isoformat()} 00:00:00", 'precio_dolar': round(price, 4)})
+    return records
+
+
+def adhoc_analysis(records: List[Dict[str, Any]]) -> None:
+    """Análisis como en los scripts ad-hoc: bucles sobre la lista de diccionarios"""
+    prices = [r['precio_dolar'] for r in records]
+    [(prices[i] / prices[i - 1] - 1) * 100 for i in range(1, len(prices))]
+    [statistics.mean(prices[i - WINDOW:i]) for i in range(WINDOW, len(prices) + 1)]
+    [statistics.pstdev(prices[i - WINDOW:i]) for i in range(WINDOW, len(prices) + 1)]
+    monthly: Dict[str, float] = {}
+    for r in records:
+        monthly[r['fecha_precio'][:7]] = r['precio_dolar']
+    days = [date.fromisoformat(r['fecha_precio'][:10]) for r in records]
+    [(a, b) for a, b in zip(days, days[1:]) if (b - a).days > 3]
+
+
+def columnar_analysis(series) -> None:
+    """Mismo análisis con las funciones de analytics.py"""
+    pct_change(series.prices)
+    rolling_mean(series.prices, WINDOW)
+    rolling_std(series.prices, WINDOW)
+    resample(series, 'mensual')
+    detect_gaps(series.days, 3)
+
+
+def timed(label: str, func) -> float:
+    """Ejecuta y reporta el tiempo en milisegundos"""
+    started = time.perf_counter()
+    func()
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"  {label:<40} {elapsed:>10.2f} ms")
+    return elapsed
+
+
+def main() -> None:
+    """Ejecuta el benchmark"""
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    records = build_history(years)
+    backend = 'NumPy' if analytics.np is not None else 'array'
+    print(f"📊 Historial sintético: {len(records)} registros ({years} años), backend {backend}")
+
+    timed('Bucles ad-hoc (lista de dicts)', lambda: adhoc_analysis(records))
+    series = None
+
+    def load():
+        nonlocal series
+        series = make_series([to_epoch_day(r['fecha_precio']) for r in records],
+                             [r['precio_dolar'] for r in records])
+
+    timed('Carga a columnas', load)
+    timed('Análisis columnar', lambda: columnar_analysis(series))
+
+
+if __name__ == "__main__":
+    main()
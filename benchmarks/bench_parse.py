@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark de extracción: árbol completo de BeautifulSoup vs. escaneo rápido
+Mide tiempo de parseo y memoria pico sobre copias guardadas de la página del BCV,
+y el costo del respaldo sin div#dolar (estrategias en secuencia vs. una pasada).
+
+Uso:
+    python benchmarks/bench_parse.py pagina1.html pagina2.html
+    python benchmarks/bench_parse.py            # usa una página sintética
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+from bs4 import BeautifulSoup
+from bcv_scraper import find_dollar_price, find_price_in_content, parse_price_to_float
+from extraction import fast_dollar_price_text, collect_price_candidates
+from legacy_strategies import STRATEGIES
+
+CURRENCY_BLOCK = (
+    '<div id="{div_id}" class="col-sm-12 col-xs-12 "><div class="field-content">'
+    '<div class="row recuadrotsmc"><div class="col-sm-6 col-xs-6"><span> {code} </span></div>'
+    '<div class="col-sm-6 col-xs-6 centrado"><strong> {price} </strong> </div></div></div></div>\n'
+)
+
+
+def build_synthetic_page(filler_blocks: int = 2000, with_dollar_div: bool = True) -> bytes:
+    """Página sintética con el tamaño y la forma aproximada del home del BCV"""
+    filler = ''.join(
+        f'<div class="views-row"><a href="/noticia/{i}">Noticia {i}</a>'
+        f'<p>Texto de relleno {i} con cifras 1.234,{i % 100:02d} y tablas.</p></div>\n'
+        for i in range(filler_blocks)
+    )
+    rates = ''.join(
+        CURRENCY_BLOCK.format(div_id=div_id, code=code, price=price)
+        for div_id, code, price in [('euro', 'EUR', '905,12345678'), ('yuan', 'CNY', '109,55500000'),
+                                    ('lira', 'TRY', '18,44000000'), ('rublo', 'RUB', '9,80000000'),
+                                    ('dolar', 'USD', '779,95220000')]
+    )
+    if not with_dollar_div:
+        rates = rates.replace('id="dolar"', 'id="usd-rediseno"')
+    return f'<html><head><title>BCV</title></head><body>{filler}{rates}{filler}</body></html>'.encode('utf-8')
+
+
+def measure(func: Callable[[], object], repeat: int) -> Tuple[float, int]:
+    """Devuelve (ms promedio por llamada, memoria pico en KB)"""
+    func()  # Calentamiento
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak // 1024
+
+
+def bench_page(name: str, content: bytes, repeat: int) -> None:
+    """Compara ambos caminos sobre una página"""
+    full_tree = lambda: find_dollar_price(BeautifulSoup(content, 'html.parser'))
+    fast_path = lambda: fast_dollar_price_text(content)
+    pipeline = lambda: find_price_in_content(content)
+
+    print(f"\n📄 {name} ({len(content) // 1024} KB)")
+    for label, func in [('Árbol completo (antes)', full_tree),
+                        ('Escaneo rápido', fast_path),
+                        ('find_price_in_content (después)', pipeline)]:
+        elapsed_ms, peak_kb = measure(func, repeat)
+        print(f"  {label:<34} {elapsed_ms:>9.3f} ms   pico {peak_kb:>8} KB")
+
+
+def sequential_strategies(soup: BeautifulSoup):
+    """Estrategias originales, una tras otra (un recorrido completo cada una)"""
+    for strategy in STRATEGIES:
+        price_text = strategy(soup)
+        if price_text and parse_price_to_float(price_text):
+            return price_text
+    return None
+
+
+def bench_fallback(repeat: int) -> None:
+    """Compara el respaldo sin div#dolar: estrategias en secuencia vs. una pasada"""
+    soup = BeautifulSoup(build_synthetic_page(with_dollar_div=False), 'html.parser')
+    print("\n📄 respaldo sin div#dolar (árbol ya construido)")
+    for label, func in [('Estrategias en secuencia (antes)', lambda: sequential_strategies(soup)),
+                        ('Una sola pasada (después)', lambda: collect_price_candidates(soup))]:
+        elapsed_ms, peak_kb = measure(func, repeat)
+        print(f"  {label:<34} {elapsed_ms:>9.3f} ms   pico {peak_kb:>8} KB")
+
+
+def main(paths: List[str]) -> None:
+    """Ejecuta el benchmark sobre las páginas indicadas"""
+    logging.disable(logging.CRITICAL)
+    repeat = int(os.getenv('BENCH_REPEAT', '20'))
+    if not paths:
+        bench_page('página sintética', build_synthetic_page(), repeat)
+        bench_fallback(repeat)
+    for path in paths:
+        with open(path, 'rb') as f:
+            bench_page(os.path.basename(path), f.read(), repeat)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Estrategias de búsqueda originales del scraper, como implementación de referencia
+Cada una recorre el documento completo por separado; el scraper las reemplazó
+por el recorrido único de extraction.collect_price_candidates. Se conservan
+solo para que los benchmarks midan ambos caminos sobre el mismo árbol.
+"""
+
+import os
+import sys
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from bcv_scraper import clean_text, extract_price_from_text
+from config import ScraperConfig
+
+USD_KEYWORDS = ScraperConfig.USD_KEYWORDS
+
+
+def contains_any_keyword(text: str, keywords: List[str]) -> bool:
+    """Verifica si un texto contiene alguna palabra clave"""
+    if not text or not keywords:
+        return False
+    text_upper = text.upper()
+    return any(keyword.upper() in text_upper for keyword in keywords)
+
+
+def search_in_dollar_div(soup: BeautifulSoup) -> Optional[str]:
+    """Busca precio en el div específico con id='dolar'"""
+    dolar_div = soup.find('div', id='dolar')
+    if not dolar_div:
+        return None
+
+    strong_element = dolar_div.find('strong')
+    if not strong_element:
+        return None
+
+    price_text = clean_text(strong_element.get_text())
+    return extract_price_from_text(price_text)
+
+
+def search_in_usd_text(soup: BeautifulSoup) -> Optional[str]:
+    """Busca precio en texto que contenga palabras clave de USD"""
+    for keyword in USD_KEYWORDS:
+        elements = soup.find_all(string=lambda text: keyword.lower() in text.lower() if text else False)
+        for element in elements:
+            if element.parent:
+                price_text = clean_text(element.parent.get_text())
+                price = extract_price_from_text(price_text)
+                if price:
+                    return price
+    return None
+
+
+def search_in_tables(soup: BeautifulSoup) -> Optional[str]:
+    """Busca precio en tablas HTML"""
+    tables = soup.find_all('table')
+    for table in tables:
+        rows = table.find_all('tr')
+        for row in rows:
+            cells = row.find_all(['td', 'th'])
+            for cell in cells:
+                cell_text = clean_text(cell.get_text())
+                if contains_any_keyword(cell_text, USD_KEYWORDS):
+                    price = extract_price_from_text(cell_text)
+                    if price:
+                        return price
+    return None
+
+
+def search_with_css_selectors(soup: BeautifulSoup) -> Optional[str]:
+    """Busca precio usando selectores CSS específicos"""
+    selectors = ScraperConfig.PRICE_SELECTORS
+
+    for selector in selectors:
+        elements = soup.select(selector)
+        for element in elements:
+            text = clean_text(element.get_text())
+            price = extract_price_from_text(text)
+            if price:
+                return price
+    return None
+
+
+# En el orden de prioridad del scraper
+STRATEGIES = [search_in_dollar_div, search_in_usd_text, search_in_tables, search_with_css_selectors]
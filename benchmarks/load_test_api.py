@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de la API local de tasas (rate_api.py)
+Abre conexiones keep-alive en paralelo y reporta peticiones por segundo y
+latencias. Si no se indica --url, levanta la API en un puerto libre.
+
+Uso:
+    python benchmarks/load_test_api.py --requests 20000 --concurrency 8
+    python benchmarks/load_test_api.py --url http://127.0.0.1:8080
+"""
+
+import argparse
+import http.client
+import os
+import sys
+import threading
+import time
+from typing import List
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PATHS = ['/latest', '/rate?date=2025-12-01', '/range?start=2025-11-01&end=2025-11-30']
+
+
+def worker(host: str, port: int, count: int, latencies: List[float]) -> None:
+    """Hace `count` peticiones por una sola conexión keep-alive"""
+    connection = http.client.HTTPConnection(host, port)
+    for i in range(count):
+        started = time.perf_counter()
+        connection.request('GET', PATHS[i % len(PATHS)])
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+
+
+def main() -> None:
+    """Ejecuta la prueba de carga"""
+    parser = argparse.ArgumentParser(description="Prueba de carga de rate_api.py")
+    parser.add_argument('--url', help="API ya levantada (por defecto se levanta una local)")
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        from rate_api import create_server
+        server = create_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+
+    per_worker = args.requests // args.concurrency
+    latencies: List[float] = []
+    threads = [threading.Thread(target=worker, args=(host, port, per_worker, latencies))
+               for _ in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"🚀 {total} peticiones en {elapsed:.2f}s → {total / elapsed:,.0f} req/s "
+          f"({args.concurrency} conexiones)")
+    print(f"⏱️  p50 {latencies[total // 2] * 1000:.2f} ms   "
+          f"p99 {latencies[int(total * 0.99)] * 1000:.2f} ms")
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks y regresión del pipeline descarga → extracción → guardado
+Trabaja sin red sobre el corpus de páginas guardadas (benchmarks/corpus) y un
+servidor local que las sirve. Mide:
+
+- extracción: tiempo de cada estrategia original (legacy_strategies.py)
+  frente al recorrido único de find_dollar_price, del escaneo
+  rápido y de find_rates_in_content (parseando y con el LRU por hash),
+  memoria pico del parseo, y verifica las tasas esperadas de cada página
+  (corpus/expected.json)
+- extremo a extremo: latencia de fetch_rates contra el servidor local y de
+  la validación por consenso (sources.py) con una réplica JSON lenta o caída
+- registros: create_price_entry uno por uno frente a la API por lotes
+  (build_price_rows + rows_to_entries), verificando que den lo mismo
+- persistencia: costo de agregar, indexar y leer con historiales sintéticos
+  de 1k a 1M registros (JSON Lines y SQLite) y de escribir y abrir la
+  instantánea binaria
+
+Los resultados se escriben en JSON. El proceso termina con código 1 si
+alguna tasa no coincide o si falla alguna proporción medida en la misma
+ejecución (RATIO_LIMITS: ruta rápida frente al parseo completo, índice
+incremental frente al frío...), que no depende de la máquina. Con --baseline
+los tiempos absolutos se comparan contra una ejecución anterior solo como
+informe: cambian con la CPU y con el parser HTML instalado.
+
+Uso:
+    python benchmarks/run_benchmarks.py --output benchmarks/results.json
+    python benchmarks/run_benchmarks.py --quick --baseline benchmarks/baseline.json --tolerance 1.0
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bs4 import BeautifulSoup
+import bcv_scraper
+from bcv_scraper import (create_price_entry, find_dollar_price, find_rates_in_content, fetch_rates, parse_page,
+                         build_price_rows, rows_to_entries, get_timezone)
+from bench_parse import measure
+from config import ScraperConfig
+from extraction import scan_currency_divs, collect_price_candidates, get_html_parser
+from history import empty_index, update_index, merge_entries
+from legacy_strategies import (search_in_dollar_div, search_in_usd_text, search_in_tables,
+                               search_with_css_selectors)
+from snapshot import write_snapshot, read_snapshot
+from sources import RateSource, url_source, fetch_consensus
+from storage import append_records, load_records, serialize_record
+from stub_server import CORPUS_DIR, start_stub_server
+
+QUICK_SIZES = [1_000, 10_000]
+FULL_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+MAX_FULL_LOAD = 100_000  # load_records arma un dict por registro: no se mide con historiales mayores
+CHUNK = 50_000
+NOISE_FLOOR_MS = 0.05  # Tiempos menores no se comparan contra la línea base
+MIN_REGRESSION_MS = 0.5  # Además de la tolerancia, empeorar al menos esto (el ruido de tiempos sub-ms)
+MIN_RATIO_SIZE = 10_000  # Con historiales menores el costo fijo domina las proporciones de persistencia
+
+# Proporciones máximas entre dos tiempos de la misma ejecución: (numerador, denominador) → límite.
+# Cada una resguarda una optimización y tiene margen amplio sobre lo medido (entre 10 y 100 veces menos).
+RATIO_LIMITS = {
+    ('fast_scan_ms', 'parse_tree_ms'): 0.25,
+    ('find_rates_in_content_memo_ms', 'parse_tree_ms'): 0.25,
+    ('find_rates_in_content_ms', 'parse_tree_ms'): 0.25,  # Solo páginas resueltas por la ruta rápida
+    ('compact_rows_ms', 'per_record_ms'): 0.6,
+    ('index_incremental_ms', 'index_cold_ms'): 0.05,
+    ('snapshot_read_ms', 'load_all_ms'): 0.1,
+}
+
+
+def load_corpus() -> Dict[str, bytes]:
+    """Páginas del corpus por nombre de archivo"""
+    pages = {}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if name.endswith('.html'):
+            with open(os.path.join(CORPUS_DIR, name), 'rb') as f:
+                pages[name] = f.read()
+    return pages
+
+
+def load_expected() -> Dict[str, Dict[str, float]]:
+    """Tasas esperadas por página ({} = la página no trae precio)"""
+    with open(os.path.join(CORPUS_DIR, 'expected.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def bench_extraction(pages: Dict[str, bytes], expected: Dict[str, Dict[str, float]],
+                     repeat: int, failures: List[str]) -> Dict[str, Any]:
+    """Tiempo por estrategia y memoria pico del parseo para cada página del corpus"""
+    div_ids = list(ScraperConfig.CURRENCY_DIV_IDS.values())
+    memo_size = ScraperConfig.PARSE_MEMO_SIZE
+    results = {}
+    for name, content in pages.items():
+        rates = find_rates_in_content(content)
+        if name in expected and (rates != expected[name] or find_rates_in_content(content) != rates):
+            failures.append(f"{name}: se esperaba {expected[name]}, se obtuvo {rates}")
+
+        soup = BeautifulSoup(content, get_html_parser())
+        functions: Dict[str, Callable[[], object]] = {
+            'parse_tree': lambda: BeautifulSoup(content, get_html_parser()),
+            'fast_scan': lambda: scan_currency_divs(content, div_ids),
+            'search_in_dollar_div': lambda: search_in_dollar_div(soup),
+            'search_in_usd_text': lambda: search_in_usd_text(soup),
+            'search_in_tables': lambda: search_in_tables(soup),
+            'search_with_css_selectors': lambda: search_with_css_selectors(soup),
+            'single_pass_candidates': lambda: collect_price_candidates(soup),
+            'find_dollar_price': lambda: find_dollar_price(soup),
+            'find_rates_in_content': lambda: find_rates_in_content(content),
+            'find_rates_in_content_memo': lambda: find_rates_in_content(content),
+        }
+        timings, memory = {}, {}
+        for label, func in functions.items():
+            # Sin el LRU por hash, salvo en la medición que lo usa a propósito
+            ScraperConfig.PARSE_MEMO_SIZE = memo_size if label.endswith('_memo') else 0
+            elapsed_ms, peak_kb = measure(func, repeat)
+            timings[f"{label}_ms"] = round(elapsed_ms, 4)
+            if label in ('parse_tree', 'find_rates_in_content'):
+                memory[f"{label}_peak_kb"] = peak_kb
+        strategy = parse_page(content).strategy
+        results[name] = {'bytes': len(content), 'rates': rates, 'strategy': strategy, **timings, **memory}
+    ScraperConfig.PARSE_MEMO_SIZE = memo_size
+    return results
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50 y p95 en milisegundos"""
+    ordered = sorted(samples)
+    return {'p50_ms': round(statistics.median(ordered) * 1000, 3),
+            'p95_ms': round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000, 3)}
+
+
+def bench_end_to_end(pages: Dict[str, bytes], expected: Dict[str, Dict[str, float]],
+                     repeat: int, failures: List[str]) -> Dict[str, Any]:
+    """Latencia de fetch_rates contra el servidor local, por página y con un espejo lento"""
+    server = start_stub_server()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    scenarios = {name: [f"{base}/{name}"] for name in pages}
+    scenarios['espejo_lento+rapido'] = [f"{base}/bcv_actual.html?delay=0.3", f"{base}/bcv_actual.html"]
+    scenarios['espejo_caido+rapido'] = [f"{base}/bcv_actual.html?status=503", f"{base}/bcv_actual.html"]
+
+    original = (bcv_scraper.BCV_URLS, ScraperConfig.PAGE_CACHE_ENABLED, ScraperConfig.MAX_RETRIES,
+                ScraperConfig.CIRCUIT_BREAKER_ENABLED, ScraperConfig.DEAD_LETTER_ENABLED)
+    ScraperConfig.PAGE_CACHE_ENABLED = False
+    ScraperConfig.MAX_RETRIES = 0
+    # Cada repetición debe consultar los mismos espejos, sin dejar estado en el directorio
+    ScraperConfig.CIRCUIT_BREAKER_ENABLED = ScraperConfig.DEAD_LETTER_ENABLED = False
+    results = {}
+    try:
+        for name, urls in scenarios.items():
+            bcv_scraper.BCV_URLS = urls
+            samples, rates = [], None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rates = fetch_rates()
+                samples.append(time.perf_counter() - started)
+            want = expected.get(name, expected['bcv_actual.html'])
+            if (rates or {}) != want:
+                failures.append(f"extremo a extremo {name}: se esperaba {want}, se obtuvo {rates}")
+            results[name] = percentiles(samples)
+
+        # Pipeline completo: descarga, extracción y registro agregado al historial
+        bcv_scraper.BCV_URLS = scenarios['bcv_actual.html']
+        with tempfile.TemporaryDirectory(prefix='bcv-bench-') as directory:
+            history_path = os.path.join(directory, 'history.jsonl')
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rates = fetch_rates()
+                append_records([create_price_entry(rates['USD'], rates)], history_path)
+                samples.append(time.perf_counter() - started)
+            results['descarga+extraccion+guardado'] = percentiles(samples)
+
+        # Consenso: la página del BCV más una réplica JSON (rápida, lenta o caída)
+        replicas = {'consenso_replica': 'replica_latest.json',
+                    'consenso_replica_lenta': 'replica_latest.json?delay=0.3',
+                    'consenso_replica_caida': 'replica_latest.json?status=503'}
+        for name, path in replicas.items():
+            sources = [RateSource('bcv', fetch_rates),
+                       url_source('replica', f"{base}/{path}", 'json')]
+            samples, outcome = [], None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                outcome = fetch_consensus(sources, grace=0.1, last_price=expected['bcv_actual.html']['USD'])
+                samples.append(time.perf_counter() - started)
+            if outcome.rates != expected['bcv_actual.html']:
+                failures.append(f"extremo a extremo {name}: se obtuvo {outcome.rates} ({outcome.reason})")
+            results[name] = percentiles(samples)
+    finally:
+        (bcv_scraper.BCV_URLS, ScraperConfig.PAGE_CACHE_ENABLED, ScraperConfig.MAX_RETRIES,
+         ScraperConfig.CIRCUIT_BREAKER_ENABLED, ScraperConfig.DEAD_LETTER_ENABLED) = original
+        server.shutdown()
+    return results
+
+
+def bench_records(sizes: List[int], failures: List[str]) -> Dict[str, Any]:
+    """Construcción de registros: uno por uno frente a la API por lotes"""
+    start = datetime(2024, 1, 1, tzinfo=get_timezone())
+    rates = {'USD': 36.5, 'EUR': 39.1, 'CNY': 5.1}
+    results = {}
+    for size in sizes:
+        # Varias extracciones por día, como en una reimportación de ejecuciones horarias
+        pairs = [(rates['USD'], start + timedelta(hours=7 * i)) for i in range(size)]
+        rates_list = [rates] * size
+        per_record = [create_price_entry(price, rates, extraction_time=moment) for price, moment in pairs]
+        if rows_to_entries(build_price_rows(pairs, rates_list)) != per_record:
+            failures.append(f"registros {size}: la API por lotes no coincide con create_price_entry")
+        results[str(size)] = {
+            'per_record_ms': time_ms(lambda: [create_price_entry(price, rates, extraction_time=moment)
+                                              for price, moment in pairs]),
+            'batch_ms': time_ms(lambda: rows_to_entries(build_price_rows(pairs, rates_list))),
+            'compact_rows_ms': time_ms(lambda: build_price_rows(pairs, rates_list)),
+        }
+    return results
+
+
+def synthetic_records(count: int) -> Iterator[Dict[str, Any]]:
+    """Registros sintéticos con el formato del historial, un día por registro"""
+    start, price = date(1, 1, 1), 1.0
+    for offset in range(count):
+        day = (start + timedelta(days=offset)).isoformat()
+        price *= 1.0001
+        yield {'fecha_extraccion': f"{day} 16:00:00", 'fecha_precio': f"{day} 00:00:00",
+               'precio_dolar': round(price, 4), 'tasas': {'EUR': round(price * 1.16, 4)}}
+
+
+def chunked(records: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Agrupa un iterador en listas de `size` elementos"""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def time_ms(func: Callable[[], object], repeat: int = 1) -> float:
+    """Milisegundos promedio por llamada"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return round((time.perf_counter() - started) * 1000 / repeat, 4)
+
+
+def new_record(size: int, i: int) -> Dict[str, Any]:
+    """Registro posterior a todo el historial sintético"""
+    day = (date(1, 1, 1) + timedelta(days=size + i)).isoformat()
+    return {'fecha_extraccion': f"{day} 16:00:00", 'fecha_precio': f"{day} 00:00:00",
+            'precio_dolar': 1.0 + i, 'tasas': {'EUR': 1.2 + i}}
+
+
+def bench_jsonl(size: int, directory: str, appends: int) -> Dict[str, Any]:
+    """Costo del historial JSON Lines con `size` registros"""
+    path = os.path.join(directory, f"history_{size}.jsonl")
+    with open(path, 'w', encoding='utf-8') as f:
+        for chunk in chunked(synthetic_records(size), CHUNK):
+            f.write(''.join(serialize_record(record) for record in chunk))
+
+    result = {'file_bytes': os.path.getsize(path)}
+    started = time.perf_counter()
+    index = update_index(empty_index(), path)
+    result['index_cold_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    counter = iter(range(appends))
+    result['append_one_ms'] = time_ms(lambda: append_records([new_record(size, next(counter))], path), appends)
+    append_records([new_record(size, appends)], path)
+    result['index_incremental_ms'] = time_ms(lambda: update_index(index, path))
+    if size <= MAX_FULL_LOAD:
+        result['load_all_ms'] = time_ms(lambda: load_records(path))
+
+    # Instantánea binaria: lo que paga un consumidor en lugar de leer el historial
+    snapshot_path = os.path.join(directory, f"history_{size}.bin")
+    result['snapshot_write_ms'] = time_ms(lambda: write_snapshot(index, 'USD', snapshot_path))
+    read_snapshot(snapshot_path)  # La primera lectura importa analytics (y NumPy)
+    result['snapshot_read_ms'] = time_ms(lambda: read_snapshot(snapshot_path), 20)
+    result['snapshot_bytes'] = os.path.getsize(snapshot_path)
+    os.remove(snapshot_path)
+    os.remove(path)
+    return result
+
+
+def bench_sqlite(size: int, directory: str, appends: int) -> Dict[str, Any]:
+    """Costo del historial SQLite con `size` registros"""
+    from sqlite_storage import upsert_records, read_new_rates, load_all_records, close_connections
+
+    path = os.path.join(directory, f"history_{size}.db")
+    started = time.perf_counter()
+    for chunk in chunked(synthetic_records(size), CHUNK):
+        upsert_records(chunk, path)
+    result = {'bulk_load_ms': round((time.perf_counter() - started) * 1000, 3)}
+
+    started = time.perf_counter()
+    entries, offset = read_new_rates(0, 'USD', path)
+    index = merge_entries(empty_index(), entries, offset)
+    result['index_cold_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    counter = iter(range(appends))
+    result['append_one_ms'] = time_ms(lambda: upsert_records([new_record(size, next(counter))], path), appends)
+    upsert_records([new_record(size, appends)], path)
+    result['index_incremental_ms'] = time_ms(
+        lambda: merge_entries(index, *read_new_rates(index.offset, 'USD', path)))
+    if size <= MAX_FULL_LOAD:
+        result['load_all_ms'] = time_ms(lambda: load_all_records(path))
+    close_connections()
+    result['file_bytes'] = sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+    return result
+
+
+def bench_persistence(sizes: List[int], appends: int) -> Dict[str, Any]:
+    """Costo de persistencia por tamaño de historial y backend"""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='bcv-bench-') as directory:
+        for size in sizes:
+            results[str(size)] = {'jsonl': bench_jsonl(size, directory, appends),
+                                  'sqlite': bench_sqlite(size, directory, appends)}
+            print(f"  persistencia con {size} registros lista", file=sys.stderr)
+    return results
+
+
+def get_metadata() -> Dict[str, Any]:
+    """Entorno de la ejecución, para comparar resultados entre máquinas"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=BENCH_DIR, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'commit': commit,
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'html_parser': get_html_parser()}
+
+
+def flatten_timings(results: Dict[str, Any], prefix: str = '') -> Dict[str, float]:
+    """Métricas de tiempo (*_ms) con su ruta completa: {'extraction.bcv_actual.html.fast_scan_ms': 0.1}"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_timings(value, f"{path}."))
+        elif key.endswith('_ms') and isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def get_ratio(group: Dict[str, Any], numerator: str, denominator: str) -> Optional[float]:
+    """Cociente entre dos tiempos de un mismo grupo de resultados (None si falta alguno)"""
+    if not group.get(numerator) or not group.get(denominator):
+        return None
+    return round(group[numerator] / group[denominator], 4)
+
+
+def check_ratios(results: Dict[str, Any], failures: List[str]) -> Dict[str, float]:
+    """
+    Proporciones de RATIO_LIMITS medidas en esta ejecución; agrega a
+    `failures` las que superan su límite. Al comparar tiempos de la misma
+    máquina y el mismo parser, valen igual en un runner compartido que en
+    una máquina de desarrollo.
+    """
+    groups = {f"extraction.{name}": page for name, page in results.get('extraction', {}).items()}
+    groups.update({f"records.{size}": group for size, group in results.get('records', {}).items()})
+    for size, backends in results.get('persistence', {}).items():
+        if int(size) >= MIN_RATIO_SIZE:
+            groups.update({f"persistence.{size}.{backend}": group for backend, group in backends.items()})
+
+    ratios = {}
+    for path, group in groups.items():
+        for (numerator, denominator), limit in RATIO_LIMITS.items():
+            if numerator == 'find_rates_in_content_ms' and group.get('strategy') != 'ruta_rapida':
+                continue
+            ratio = get_ratio(group, numerator, denominator)
+            if ratio is None:
+                continue
+            label = f"{path}.{numerator[:-3]}/{denominator[:-3]}"
+            ratios[label] = ratio
+            if ratio > limit:
+                failures.append(f"{label}: {ratio} (máximo {limit})")
+    return ratios
+
+
+def compare_with_baseline(results: Dict[str, Any], baseline_path: str, tolerance: float) -> List[str]:
+    """
+    Métricas que empeoraron más que `tolerance` (0.5 = 50 %) respecto a la
+    línea base. Solo informativo: los tiempos absolutos dependen de la CPU y
+    del parser HTML, así que no se comparan entre máquinas.
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        payload = json.load(f)
+    baseline = flatten_timings(payload)
+    regressions = []
+    parser = payload.get('metadata', {}).get('html_parser')
+    if parser != results['metadata']['html_parser']:
+        regressions.append(f"línea base medida con {parser}, esta ejecución con {results['metadata']['html_parser']}")
+    for path, value in flatten_timings(results).items():
+        before = baseline.get(path)
+        if (before is not None and before >= NOISE_FLOOR_MS and value > before * (1 + tolerance)
+                and value - before >= MIN_REGRESSION_MS):
+            regressions.append(f"{path}: {before} ms → {value} ms")
+    return regressions
+
+
+def main() -> None:
+    """Ejecuta la suite y escribe los resultados"""
+    parser = argparse.ArgumentParser(description="Benchmarks y regresión del pipeline del BCV")
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results.json'))
+    parser.add_argument('--quick', action='store_true', help="Menos repeticiones e historiales de hasta 10k")
+    parser.add_argument('--sizes', type=int, nargs='+', help="Tamaños de historial a medir")
+    parser.add_argument('--repeat', type=int, help="Repeticiones por medición")
+    parser.add_argument('--skip', nargs='+', default=[], choices=['extraction', 'end_to_end', 'records', 'persistence'])
+    parser.add_argument('--baseline', help="Resultados anteriores con los que comparar tiempos (solo informe)")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="Empeoramiento a informar (0.5 = 50 %%)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=ScraperConfig.LOG_FORMAT, stream=sys.stderr)
+    logging.getLogger().setLevel(logging.CRITICAL)  # Silenciar el scraper durante las mediciones
+    repeat = args.repeat or (5 if args.quick else 20)
+    sizes = args.sizes or (QUICK_SIZES if args.quick else FULL_SIZES)
+
+    pages, expected = load_corpus(), load_expected()
+    failures: List[str] = []
+    results: Dict[str, Any] = {'metadata': get_metadata()}
+    if 'extraction' not in args.skip:
+        results['extraction'] = bench_extraction(pages, expected, repeat, failures)
+    if 'end_to_end' not in args.skip:
+        results['end_to_end'] = bench_end_to_end(pages, expected, repeat, failures)
+    if 'records' not in args.skip:
+        results['records'] = bench_records([size for size in sizes if size <= MAX_FULL_LOAD], failures)
+    if 'persistence' not in args.skip:
+        results['persistence'] = bench_persistence(sizes, appends=max(repeat, 5))
+
+    results['ratios'] = check_ratios(results, failures)
+    results['failures'] = failures
+    results['regressions'] = compare_with_baseline(results, args.baseline, args.tolerance) if args.baseline else []
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+    print(f"📄 Resultados en {args.output}")
+    for message in results['regressions']:
+        print(f"🐢 {message} (informativo)")
+    for message in failures:
+        print(f"❌ {message}")
+    if failures:
+        sys.exit(1)
+    print("✅ Tasas del corpus y proporciones correctas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita al BCV sirviendo las páginas del corpus
+Permite medir el pipeline completo sin red: latencia y fallos controlados
+por parámetros de la URL.
+
+    /bcv_actual.html                  página del corpus
+    /bcv_actual.html?delay=0.2        responde después de 200 ms
+    /bcv_actual.html?status=503       responde con error
+
+Uso:
+    python benchmarks/stub_server.py --port 8081
+"""
+
+import argparse
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+def make_handler(corpus_dir: str):
+    """Crea la clase manejadora que sirve los archivos de `corpus_dir`"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            parsed = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+            if 'delay' in params:
+                time.sleep(float(params['delay']))
+
+            path = os.path.join(corpus_dir, os.path.basename(parsed.path))
+            status = int(params.get('status', 200))
+            body = b''
+            if status == 200:
+                if os.path.isfile(path):
+                    with open(path, 'rb') as f:
+                        body = f.read()
+                else:
+                    status = 404
+
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return StubHandler
+
+
+def start_stub_server(corpus_dir: str = CORPUS_DIR, port: int = 0) -> ThreadingHTTPServer:
+    """Levanta el servidor en un hilo (puerto 0 = libre aleatorio) y lo devuelve"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(corpus_dir))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-bcv", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    """Sirve el corpus hasta Ctrl+C"""
+    parser = argparse.ArgumentParser(description="Servidor local con el corpus de páginas del BCV")
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--corpus', default=CORPUS_DIR)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.corpus, args.port)
+    print(f"Sirviendo {args.corpus} en http://127.0.0.1:{server.server_address[1]}/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker por espejo del BCV, persistido entre ejecuciones
+Tras CIRCUIT_FAILURE_THRESHOLD fallos de red seguidos el circuito de una URL
+se abre y esa URL se omite durante CIRCUIT_COOLDOWN segundos; después queda
+semiabierta y se prueba con un solo intento sin reintentos. Un éxito lo
+cierra y un fallo lo vuelve a abrir. Si todos los espejos están abiertos se
+prueba igualmente el que lleva más tiempo abierto, para no quedar a ciegas.
+
+Solo cuentan los fallos de transporte (sin conexión, timeouts, 5xx y 429):
+un 4xx definitivo (http_client.CLIENT_ERROR) o una página que llega pero no
+trae el precio no abren el circuito, y van a la carpeta de páginas fallidas.
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from config import ScraperConfig
+from metrics import increment, set_gauge
+from storage import write_atomically
+
+STATE_CLOSED = 'cerrado'
+STATE_OPEN = 'abierto'
+STATE_HALF_OPEN = 'semiabierto'
+
+Circuits = Dict[str, Dict[str, Any]]
+
+
+def load_circuits(path: Optional[str] = None) -> Circuits:
+    """Carga el estado de los circuitos (vacío si no existe o está corrupto)"""
+    path = path or ScraperConfig.CIRCUIT_FILE
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logging.warning(f"Estado de circuitos inválido, se ignora: {e}")
+        return {}
+
+
+def save_circuits(circuits: Circuits, path: Optional[str] = None) -> None:
+    """Guarda el estado de los circuitos"""
+    path = path or ScraperConfig.CIRCUIT_FILE
+    try:
+        write_atomically(path, json.dumps(circuits, ensure_ascii=False, indent=2))
+    except OSError as e:
+        logging.warning(f"No se pudo guardar el estado de los circuitos: {e}")
+
+
+def get_state(circuit: Optional[Dict[str, Any]], now: Optional[float] = None) -> str:
+    """Estado de un circuito: cerrado, abierto o semiabierto (enfriamiento vencido)"""
+    if not circuit or circuit.get('opened_at') is None:
+        return STATE_CLOSED
+    now = time.time() if now is None else now
+    if now - circuit['opened_at'] < ScraperConfig.CIRCUIT_COOLDOWN:
+        return STATE_OPEN
+    return STATE_HALF_OPEN
+
+
+def plan_requests(urls: List[str], circuits: Circuits,
+                  now: Optional[float] = None) -> List[Tuple[str, bool]]:
+    """
+    URLs a consultar como (url, es_sonda), primero las de circuito cerrado.
+
+    Las sondas (circuito semiabierto, o el más antiguo si todos están
+    abiertos) se consultan con un solo intento.
+    """
+    now = time.time() if now is None else now
+    states = {url: get_state(circuits.get(url), now) for url in urls}
+    closed = [(url, False) for url in urls if states[url] == STATE_CLOSED]
+    probes = [(url, True) for url in urls if states[url] == STATE_HALF_OPEN]
+    skipped = [url for url in urls if states[url] == STATE_OPEN]
+
+    if not closed and not probes and skipped:
+        oldest = min(skipped, key=lambda url: circuits[url]['opened_at'])
+        skipped.remove(oldest)
+        probes.append((oldest, True))
+    for url in skipped:
+        reopen = datetime.fromtimestamp(circuits[url]['opened_at'] + ScraperConfig.CIRCUIT_COOLDOWN)
+        logging.info(f"Circuito abierto para {url} hasta {reopen:%H:%M:%S}; se omite")
+        increment('bcv_circuit_skips_total', url=url)
+    return closed + probes
+
+
+def record_result(circuits: Circuits, url: str, ok: bool, error: Optional[str] = None,
+                  now: Optional[float] = None) -> None:
+    """Actualiza el circuito de una URL con el resultado de una consulta"""
+    now = time.time() if now is None else now
+    circuit = circuits.setdefault(url, {'failures': 0, 'opened_at': None, 'last_error': None,
+                                        'last_failure': None, 'last_success': None})
+    if ok:
+        if circuit.get('opened_at') is not None:
+            logging.info(f"Circuito cerrado para {url}: volvió a responder")
+        circuit.update(failures=0, opened_at=None, last_success=now)
+    else:
+        was_open = circuit.get('opened_at') is not None
+        circuit.update(failures=circuit.get('failures', 0) + 1, last_error=error, last_failure=now)
+        if was_open or circuit['failures'] >= ScraperConfig.CIRCUIT_FAILURE_THRESHOLD:
+            circuit['opened_at'] = now
+            logging.warning(f"Circuito abierto para {url} ({circuit['failures']} fallos seguidos): "
+                            f"se omitirá {ScraperConfig.CIRCUIT_COOLDOWN}s")
+    set_gauge('bcv_circuit_open', 0 if circuit['opened_at'] is None else 1, url=url)
+
+
+def describe_circuit(url: str, circuit: Optional[Dict[str, Any]], now: Optional[float] = None) -> str:
+    """Una línea con el estado de un espejo para el resumen de salud"""
+    state = get_state(circuit, now)
+    if state == STATE_CLOSED:
+        failures = circuit.get('failures', 0) if circuit else 0
+        suffix = f" ({failures} fallo(s) reciente(s): {circuit['last_error']})" if failures else ""
+        return f"✅ {url}  {state}{suffix}"
+    if state == STATE_OPEN:
+        reopen = datetime.fromtimestamp(circuit['opened_at'] + ScraperConfig.CIRCUIT_COOLDOWN)
+        return (f"❌ {url}  {state} hasta {reopen:%Y-%m-%d %H:%M:%S} "
+                f"({circuit['failures']} fallos seguidos: {circuit['last_error']})")
+    return f"🔄 {url}  {state}: se probará en la próxima consulta ({circuit['last_error']})"
@@ -6,13 +6,14 @@ Aplicando principios de Clean Code: configuración separada y clara
 from typing import List, Dict, Any
 import os
 
-# Intentar cargar configuración local si existe
+# Intentar cargar configuración local si existe (sin imprimir: el resultado
+# se registra en el log al iniciar el scraper)
 try:
     from configurar_env import configurar_variables
     configurar_variables()
-    print("✅ Variables de entorno cargadas desde configurar_env.py")
+    LOCAL_ENV_LOADED = True
 except ImportError:
-    print("⚠️  configurar_env.py no encontrado - usando variables de entorno del sistema")
+    LOCAL_ENV_LOADED = False  # Se usan las variables de entorno del sistema
 
 
 class ScraperConfig:
@@ -31,19 +32,68 @@ class ScraperConfig:
     }
     
     # Configuración de archivos
-    DATA_FILE = 'precio_dolar_bcv.json'
+    DATA_FILE = 'precio_dolar_bcv.json'  # Formato heredado (se exporta bajo demanda)
+    HISTORY_FILE = 'precio_dolar_bcv.jsonl'  # Historial de solo escritura al final
+    INDEX_FILE = 'precio_dolar_bcv.idx.json'  # Índice por fecha_precio (derivado)
+    SNAPSHOT_FILE = 'precio_dolar_bcv.bin'  # Instantánea binaria para consumidores (snapshot.py)
+    SNAPSHOT_ENABLED = True
+    PUBLISH_DIR = 'datos'  # Particiones mensuales y latest.json para el repositorio (publish.py)
+    PUBLISH_ENABLED = os.getenv('BCV_PUBLISH', '') == '1'  # También con `scrape --publish`
     LOG_FILE = 'bcv_scraper.log'
+    STORAGE_BACKEND = os.getenv('BCV_STORAGE', 'jsonl')  # 'jsonl' o 'sqlite'
+    SQLITE_FILE = 'precio_dolar_bcv.db'  # Historial con STORAGE_BACKEND = 'sqlite'
+    SQLITE_BUSY_TIMEOUT = 30  # Segundos de espera si otra ejecución está escribiendo
+    PAGE_CACHE_FILE = 'bcv_page_cache.json'  # ETag/Last-Modified y hash por URL
+    PAGE_CACHE_ENABLED = True
+    PARSE_MEMO_SIZE = 32  # Páginas parseadas recordadas en memoria por hash del cuerpo (0 = desactivado)
+    CIRCUIT_BREAKER_ENABLED = True  # Omitir por un tiempo los espejos que fallan seguido
+    CIRCUIT_FILE = 'bcv_circuitos.json'  # Estado del circuit breaker por URL
+    CIRCUIT_FAILURE_THRESHOLD = 2  # Fallos de red seguidos (cada uno ya con sus reintentos) para abrir
+    CIRCUIT_COOLDOWN = 1800  # Segundos que se omite un espejo abierto antes de sondearlo
+    DEAD_LETTER_ENABLED = True  # Guardar las páginas que no dieron el precio (dead_letter.py)
+    DEAD_LETTER_DIR = 'paginas_fallidas'
+    DEAD_LETTER_MAX_FILES = 50  # Páginas distintas conservadas (se borran las más antiguas)
+    HEALTH_MAX_AGE_DAYS = 2  # Días de atraso de la última fecha_precio para considerar el scraper caído
     
     # Configuración de red
-    REQUEST_TIMEOUT = 60
+    REQUEST_TIMEOUT = 30  # Tiempo máximo total por URL, incluyendo reintentos
+    CONNECT_TIMEOUT = 5
+    READ_TIMEOUT = 15
     MAX_RETRIES = 3
+    BACKOFF_BASE = 0.5  # Segundos; se duplica en cada reintento
+    BACKOFF_MAX = 4
+    HTTP_POOL_SIZE = 4
+    HEDGED_REQUESTS = True  # Consultar los espejos en paralelo (gana el primero válido)
+    HEDGE_STAGGER = 0.5  # Segundos entre el arranque de cada espejo
     
     # Configuración de zona horaria
     TIMEZONE = 'America/Caracas'
     
+    # Publicación del BCV: a esta hora el precio pasa a corresponder al día siguiente
+    PUBLICATION_HOUR = 6
+    
+    # Modo daemon: consultas frecuentes durante la ventana de publicación
+    FAST_POLL_WINDOW_HOURS = 3
+    FAST_POLL_INTERVAL = 30  # Segundos
+    SLOW_POLL_INTERVAL = 900  # Segundos
+    
     # Configuración de logging
     LOG_LEVEL = 'INFO'
     LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+    LOG_MAX_BYTES = 1_000_000  # Tamaño máximo de cada log antes de rotar
+    LOG_BACKUP_COUNT = 5  # Archivos rotados que se conservan
+    
+    # Métricas e instrumentación (metrics.py)
+    EVENTS_LOG_FILE = 'bcv_events.jsonl'  # Eventos JSON por etapa ('' = deshabilitado)
+    METRICS_TEXTFILE = 'bcv_metrics.prom'  # Para el textfile collector ('' = deshabilitado)
+    METRICS_PORT = 0  # Endpoint /metrics en modo daemon (0 = deshabilitado)
+    
+    # API HTTP local de tasas (rate_api.py)
+    API_HOST = '127.0.0.1'
+    API_PORT = 8080
+    API_RELOAD_INTERVAL = 1.0  # Segundos entre verificaciones de cambios del historial
+    API_LATEST_MAX_AGE = 60  # Cache-Control para datos que pueden cambiar
+    API_HISTORY_MAX_AGE = 86400  # Cache-Control para fechas ya publicadas
     
     # Selectores CSS para búsqueda de precios
     PRICE_SELECTORS = [
@@ -51,6 +101,31 @@ class ScraperConfig:
         '[class*="dolar"]', '[class*="usd"]', '[class*="price"]'
     ]
     
+    # Divs de monedas en la página del BCV (código ISO -> id del div)
+    CURRENCY_DIV_IDS = {
+        'USD': 'dolar',
+        'EUR': 'euro',
+        'CNY': 'yuan',
+        'TRY': 'lira',
+        'RUB': 'rublo'
+    }
+    
+    # Extraer todas las monedas publicadas en la misma descarga
+    MULTI_CURRENCY_ENABLED = True
+    
+    # Fuentes adicionales para validar las tasas por consenso (sources.py).
+    # La página de inicio del BCV (BCV_URLS) siempre es la primera fuente.
+    # parser: 'bcv' (mismo formato que la página del BCV) o 'json'
+    # ({"USD": 36.5, ...} o la respuesta de /latest de rate_api.py), p. ej.:
+    # {'name': 'replica', 'url': 'http://10.0.0.5:8080/latest', 'parser': 'json'}
+    RATE_SOURCES: List[Dict[str, str]] = []
+    CONSENSUS_MIN_AGREEING = 2  # Fuentes que deben coincidir si hay suficientes configuradas
+    CONSENSUS_TOLERANCE_PCT = 0.5  # Diferencia máxima entre fuentes para considerarlas iguales
+    CONSENSUS_GRACE = 2.0  # Segundos de espera por una confirmación tras la primera tasa
+    # Variación máxima sin confirmación vs la última guardada, por día transcurrido
+    # desde su fecha_precio (compuesta). 0 = sin límite; también `scrape --accept-unconfirmed`
+    PLAUSIBLE_CHANGE_PCT = float(os.getenv('BCV_PLAUSIBLE_CHANGE_PCT', '25.0'))
+    
     # Palabras clave para búsqueda de USD
     USD_KEYWORDS = ['USD', 'Dólar', 'Dollar']
     
@@ -66,13 +141,40 @@ class ScraperConfig:
     EMAIL_SMTP_PORT = 587
     EMAIL_FROM = os.getenv('EMAIL_FROM', '')
     EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD', '')
-    EMAIL_TO = os.getenv('EMAIL_TO', '')
+    EMAIL_TO = os.getenv('EMAIL_TO', '')  # Uno o varios, separados por coma
     EMAIL_SUBJECT = 'Precio del Dólar BCV - Actualización'
+    EMAIL_USE_TLS = True
+    EMAIL_TIMEOUT = 20  # Segundos por operación SMTP
     
     # Configuración de Telegram (desde variables de entorno)
     TELEGRAM_ENABLED = True
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
-    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')
+    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')  # Uno o varios, separados por coma
+    TELEGRAM_API_URL = 'https://api.telegram.org'
+    TELEGRAM_TIMEOUT = 10  # Segundos por mensaje
+    
+    # Envío de notificaciones
+    NOTIFICATION_RETRIES = 2
+    NOTIFICATION_TIMEOUT = 60  # Segundos máximos de espera antes de salir
+    
+    # Detección de cambios: se notifica solo si alguna regla se cumple
+    ALERTS_ENABLED = True  # False = notificar cada registro nuevo
+    ALERT_ABS_CHANGE = 0.0  # Bs respecto a la tasa anterior (0 = regla deshabilitada)
+    ALERT_PCT_CHANGE = 0.5  # % respecto a la tasa anterior (0 = regla deshabilitada)
+    ALERT_ALL_TIME_HIGH = False  # Con devaluación sostenida casi todos los días son máximo
+    ALERT_WINDOW_DAYS = 7
+    ALERT_WINDOW_PCT_CHANGE = 3.0  # % acumulado en ALERT_WINDOW_DAYS días (0 = deshabilitada)
+    
+    # Bandeja de salida persistente (cola de notificaciones con reintentos)
+    OUTBOX_ENABLED = True
+    OUTBOX_FILE = 'notificaciones_outbox.db'
+    SUBSCRIBERS_FILE = os.getenv('SUBSCRIBERS_FILE', 'suscriptores.json')  # Suscriptores adicionales
+    OUTBOX_CONCURRENCY = 16  # Envíos simultáneos
+    OUTBOX_BATCH_SIZE = 500  # Mensajes leídos de la cola por lote
+    OUTBOX_TELEGRAM_PER_SECOND = 25  # Límite de la API de bots de Telegram (~30/s)
+    OUTBOX_EMAIL_PER_SECOND = 10
+    OUTBOX_MAX_ATTEMPTS = 8  # Luego el mensaje queda como 'failed'
+    OUTBOX_RETRY_BASE = 30  # Segundos; se duplica en cada intento fallido
     
     @classmethod
     def get_data_file_path(cls) -> str:
@@ -93,6 +195,16 @@ class ScraperConfig:
             cls.EMAIL_TO
         ])
     
+    @classmethod
+    def get_email_recipients(cls) -> List[str]:
+        """Destinatarios de email (EMAIL_TO separado por comas)"""
+        return [email.strip() for email in cls.EMAIL_TO.split(',') if email.strip()]
+    
+    @classmethod
+    def get_telegram_chat_ids(cls) -> List[str]:
+        """Chats de Telegram (TELEGRAM_CHAT_ID separado por comas)"""
+        return [chat.strip() for chat in cls.TELEGRAM_CHAT_ID.split(',') if chat.strip()]
+    
     @classmethod
     def is_telegram_configured(cls) -> bool:
         """Verifica si la configuración de Telegram está completa"""
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Páginas fallidas del BCV para reproducir sin red
+Cada respuesta HTML que no dio el precio del dólar (página de mantenimiento,
+rediseño, error 5xx con cuerpo) se guarda en DEAD_LETTER_DIR junto con un
+JSON con la URL, el estado, los headers y el motivo. Un mismo cuerpo se
+guarda una sola vez (por hash) y se conservan las DEAD_LETTER_MAX_FILES
+más recientes.
+
+Uso:
+    python dead_letter.py                  # Listar las páginas guardadas
+    python dead_letter.py --replay         # Volver a extraer todas sin red
+    python dead_letter.py --replay ARCHIVO.html
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+from config import ScraperConfig
+from storage import write_atomically
+
+if TYPE_CHECKING:
+    import requests
+
+
+class Capture(NamedTuple):
+    """Una página fallida guardada y sus metadatos"""
+    path: str
+    meta: Dict[str, Any]
+
+
+def get_capture_name(url: str, digest: str, moment: Optional[float] = None) -> str:
+    """Nombre base del archivo: fecha, host y los primeros 12 caracteres del hash"""
+    stamp = datetime.fromtimestamp(time.time() if moment is None else moment).strftime('%Y%m%d-%H%M%S')
+    host = urlsplit(url).hostname or 'desconocido'
+    return f"{stamp}_{host}_{digest[:12]}"
+
+
+def capture_page(url: str, content: bytes, reason: str, status: Optional[int] = None,
+                 headers: Optional[Dict[str, str]] = None, digest: Optional[str] = None,
+                 directory: Optional[str] = None) -> Optional[str]:
+    """Guarda una página fallida; devuelve la ruta (None si ya estaba o está desactivado)"""
+    from page_cache import hash_content
+
+    directory = directory or ScraperConfig.DEAD_LETTER_DIR
+    if not ScraperConfig.DEAD_LETTER_ENABLED or not content:
+        return None
+    digest = digest or hash_content(content)
+    if glob.glob(os.path.join(glob.escape(directory), f"*_{digest[:12]}.html")):
+        return None  # La misma página ya está guardada (p. ej. el mantenimiento en cada consulta)
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, get_capture_name(url, digest))
+        meta = {'url': url, 'status': status, 'reason': reason, 'sha256': digest,
+                'captured_at': datetime.now().isoformat(timespec='seconds'), 'headers': dict(headers or {})}
+        write_atomically(f"{base}.html", content)
+        write_atomically(f"{base}.json", json.dumps(meta, ensure_ascii=False, indent=2))
+        prune_captures(directory)
+    except OSError as e:
+        logging.warning(f"No se pudo guardar la página fallida de {url}: {e}")
+        return None
+    logging.info(f"Página fallida guardada en {base}.html ({reason})")
+    return f"{base}.html"
+
+
+def capture_response(url: str, response: 'requests.Response', reason: str,
+                     digest: Optional[str] = None) -> Optional[str]:
+    """Guarda una respuesta HTTP fallida si su cuerpo es HTML"""
+    content_type = response.headers.get('Content-Type', '')
+    if content_type and 'html' not in content_type:
+        return None
+    return capture_page(url, response.content, reason, response.status_code, response.headers, digest)
+
+
+def list_captures(directory: Optional[str] = None) -> List[Capture]:
+    """Páginas guardadas, de la más antigua a la más reciente"""
+    directory = directory or ScraperConfig.DEAD_LETTER_DIR
+    captures = []
+    for path in sorted(glob.glob(os.path.join(glob.escape(directory), '*.html'))):
+        try:
+            with open(os.path.splitext(path)[0] + '.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            meta = {}
+        captures.append(Capture(path, meta))
+    return captures
+
+
+def prune_captures(directory: Optional[str] = None) -> None:
+    """Borra las páginas más antiguas por encima de DEAD_LETTER_MAX_FILES"""
+    captures = list_captures(directory)
+    for capture in captures[:max(len(captures) - ScraperConfig.DEAD_LETTER_MAX_FILES, 0)]:
+        for path in (capture.path, os.path.splitext(capture.path)[0] + '.json'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def replay(paths: Optional[List[str]] = None) -> int:
+    """
+    Vuelve a extraer las páginas guardadas con la extracción actual (ruta
+    rápida y estrategias de find_dollar_price); devuelve cuántas siguen sin precio.
+    """
+    from bcv_scraper import parse_page
+
+    paths = paths or [capture.path for capture in list_captures()]
+    unresolved = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            page = parse_page(f.read())
+        if 'USD' in page.rates:
+            print(f"✅ {path}: {page.rates} (estrategia: {page.strategy})")
+        else:
+            unresolved += 1
+            print(f"❌ {path}: sin precio del dólar")
+    return unresolved
+
+
+def main():
+    """Lista o reproduce las páginas fallidas"""
+    parser = argparse.ArgumentParser(description="Páginas del BCV que no dieron el precio")
+    parser.add_argument('--replay', nargs='*', metavar='ARCHIVO',
+                        help="Volver a extraer las páginas indicadas (todas si no se indica ninguna)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format=ScraperConfig.LOG_FORMAT)
+    if args.replay is not None:
+        if replay(args.replay):
+            exit(1)
+        return
+
+    captures = list_captures()
+    if not captures:
+        print(f"Sin páginas fallidas en {ScraperConfig.DEAD_LETTER_DIR}/")
+    for capture in captures:
+        meta = capture.meta
+        print(f"{capture.path}  {meta.get('captured_at', '?')}  HTTP {meta.get('status')}  {meta.get('reason', '')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Extracción de precios desde el HTML del BCV
+Ruta rápida: escanea los bytes de la página buscando los divs de monedas
+(`div#dolar > strong` y similares) sin construir el árbol de BeautifulSoup.
+Respaldo: un único recorrido del árbol completo que alimenta a la vez todas
+las estrategias de búsqueda.
+"""
+
+import html
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from bs4 import BeautifulSoup, NavigableString, Tag
+from config import ScraperConfig
+
+# Etiquetas <div ... id="..."> de las monedas publicadas por el BCV
+CURRENCY_DIV_PATTERN = re.compile(
+    rb'<div\b[^>]*?\bid\s*=\s*["\']?(' +
+    b'|'.join(re.escape(div_id.encode()) for div_id in ScraperConfig.CURRENCY_DIV_IDS.values()) +
+    rb')["\'\s>]',
+    re.IGNORECASE
+)
+STRONG_PATTERN = re.compile(rb'<strong\b[^>]*>(.*?)</strong>', re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# Distancia máxima (bytes) entre el div de la moneda y su <strong>
+MAX_STRONG_DISTANCE = 4096
+
+
+def get_html_parser() -> str:
+    """Parser para el árbol completo: lxml si está instalado, si no html.parser"""
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+
+def strong_text(fragment: bytes) -> str:
+    """Texto plano del contenido de un <strong>"""
+    text = fragment.decode('utf-8', errors='replace')
+    return html.unescape(TAG_PATTERN.sub('', text)).strip()
+
+
+def scan_currency_divs(content: bytes, div_ids: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    Devuelve {id_del_div: texto_del_strong} para los divs de monedas encontrados.
+
+    El <strong> debe aparecer antes del siguiente div de moneda y a menos de
+    MAX_STRONG_DISTANCE bytes de la etiqueta de apertura.
+    """
+    wanted = {div_id.lower() for div_id in div_ids} if div_ids else None
+    matches = list(CURRENCY_DIV_PATTERN.finditer(content))
+    texts: Dict[str, str] = {}
+
+    for position, match in enumerate(matches):
+        div_id = match.group(1).decode().lower()
+        if div_id in texts or (wanted is not None and div_id not in wanted):
+            continue
+        next_start = matches[position + 1].start() if position + 1 < len(matches) else len(content)
+        end = min(next_start, match.end() + MAX_STRONG_DISTANCE)
+        strong = STRONG_PATTERN.search(content, match.end(), end)
+        if strong:
+            texts[div_id] = strong_text(strong.group(1))
+
+    return texts
+
+
+def fast_dollar_price_text(content: bytes) -> Optional[str]:
+    """Texto del precio en `div#dolar > strong` usando el escaneo rápido"""
+    return scan_currency_divs(content, ['dolar']).get('dolar')
+
+
+# --- Motor de búsqueda en una sola pasada sobre el árbol completo ---
+
+KEYWORD_PATTERN = re.compile('|'.join(re.escape(k) for k in ScraperConfig.USD_KEYWORDS), re.IGNORECASE)
+KEYWORD_PRIORITY = {keyword.casefold(): index for index, keyword in enumerate(ScraperConfig.USD_KEYWORDS)}
+PRICE_PATTERN = re.compile(ScraperConfig.PRICE_PATTERN)
+CLASS_EQUALS_SELECTOR = re.compile(r'^\.([\w-]+)$')
+CLASS_CONTAINS_SELECTOR = re.compile(r'^\[class\*=["\']?([^"\'\]]+)["\']?\]$')
+
+STRATEGY_DOLLAR_DIV = 'div_dolar'
+STRATEGY_USD_TEXT = 'texto_usd'
+STRATEGY_TABLES = 'tablas'
+STRATEGY_CSS = 'selectores_css'
+
+
+def first_price(text: str) -> Optional[str]:
+    """Primer precio encontrado en un texto"""
+    match = PRICE_PATTERN.search(text.strip()) if text else None
+    return match.group() if match else None
+
+
+def compile_selector(selector: str) -> Optional[Callable[[Tag], bool]]:
+    """
+    Convierte un selector CSS simple en un predicado sobre etiquetas.
+
+    Soporta `.clase` y `[class*="texto"]`; devuelve None para otros selectores,
+    que se resuelven con `soup.select` al final.
+    """
+    equals = CLASS_EQUALS_SELECTOR.match(selector)
+    if equals:
+        name = equals.group(1)
+        return lambda tag: name in (tag.get('class') or [])
+    contains = CLASS_CONTAINS_SELECTOR.match(selector)
+    if contains:
+        fragment = contains.group(1)
+        return lambda tag: fragment in ' '.join(tag.get('class') or [])
+    return None
+
+
+SELECTOR_PREDICATES = [compile_selector(selector) for selector in ScraperConfig.PRICE_SELECTORS]
+
+
+def collect_price_candidates(soup: BeautifulSoup,
+                             accept: Callable[[str], bool] = lambda text: True) -> List[Tuple[str, str]]:
+    """
+    Recorre el documento una sola vez alimentando todas las estrategias.
+
+    Devuelve los candidatos (estrategia, texto_del_precio) en el mismo orden de
+    prioridad que las estrategias individuales: div#dolar, texto con palabras
+    clave (por orden de palabra clave), tablas y selectores CSS (por orden de
+    selector). Si div#dolar da un precio aceptado se corta el recorrido.
+
+    El texto y el precio de cada nodo se calculan una sola vez: un contenedor
+    con varias palabras clave o una celda que también coincide con un
+    selector no se vuelve a recorrer ni a buscar con la regex.
+    """
+    keyword_hits: Dict[int, str] = {}
+    selector_hits: Dict[int, str] = {}
+    table_hit: Optional[str] = None
+    dollar_div_seen = False
+    # Por id() del nodo: los nodos viven mientras dure el árbol, así que es estable en el recorrido
+    texts: Dict[int, str] = {}
+    prices: Dict[int, Optional[str]] = {}
+
+    def text_of(tag: Tag) -> str:
+        key = id(tag)
+        if key not in texts:
+            texts[key] = tag.get_text()
+        return texts[key]
+
+    def price_of(tag: Tag) -> Optional[str]:
+        key = id(tag)
+        if key not in prices:
+            prices[key] = first_price(text_of(tag))
+        return prices[key]
+
+    for node in soup.descendants:
+        if isinstance(node, NavigableString):
+            if len(keyword_hits) == len(KEYWORD_PRIORITY) or node.parent is None:
+                continue
+            for keyword in {m.group().casefold() for m in KEYWORD_PATTERN.finditer(node)}:
+                index = KEYWORD_PRIORITY[keyword]
+                if index not in keyword_hits:
+                    price = price_of(node.parent)
+                    if price:
+                        keyword_hits[index] = price
+            continue
+
+        if not isinstance(node, Tag):
+            continue
+
+        if not dollar_div_seen and node.name == 'div' and node.get('id') == 'dolar':
+            dollar_div_seen = True
+            strong = node.find('strong')
+            price = first_price(strong.get_text()) if strong else None
+            if price and accept(price):
+                return [(STRATEGY_DOLLAR_DIV, price)]
+
+        if table_hit is None and node.name in ('td', 'th') and node.find_parent('table'):
+            cell_text = text_of(node).strip()
+            if KEYWORD_PATTERN.search(cell_text):
+                table_hit = price_of(node)
+
+        for index, predicate in enumerate(SELECTOR_PREDICATES):
+            if predicate and index not in selector_hits and predicate(node):
+                price = price_of(node)
+                if price:
+                    selector_hits[index] = price
+
+    candidates = [(STRATEGY_USD_TEXT, keyword_hits[i]) for i in sorted(keyword_hits)]
+    if table_hit:
+        candidates.append((STRATEGY_TABLES, table_hit))
+    for index, selector in enumerate(ScraperConfig.PRICE_SELECTORS):
+        if index in selector_hits:
+            candidates.append((STRATEGY_CSS, selector_hits[index]))
+        elif SELECTOR_PREDICATES[index] is None:
+            for element in soup.select(selector):
+                price = price_of(element)
+                if price:
+                    candidates.append((STRATEGY_CSS, price))
+                    break
+    return candidates
+
+
+def find_currency_texts_in_soup(soup: BeautifulSoup, div_ids: Iterable[str]) -> Dict[str, str]:
+    """Texto del <strong> de cada div de moneda, buscando todos los ids en un solo find_all"""
+    texts: Dict[str, str] = {}
+    for div in soup.find_all('div', id=set(div_ids)):
+        div_id = div.get('id')
+        strong = div.find('strong')
+        if div_id not in texts and strong:
+            texts[div_id] = strong.get_text().strip()
+    return texts
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Consultas indexadas sobre el historial de precios del BCV
+Un índice por moneda ordenado por fecha_precio, persistido junto al historial
+y actualizado de forma incremental (solo se leen las líneas nuevas).
+"""
+
+import argparse
+import json
+import logging
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from config import ScraperConfig
+from storage import parse_record_line, write_atomically, uses_sqlite, get_history_path, ensure_history_file
+
+INDEX_VERSION = 2
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+DateLike = Union[str, date, datetime]
+
+
+class RateIndex(NamedTuple):
+    """Índice en memoria: fechas ordenadas (YYYY-MM-DD) y precios paralelos"""
+    dates: List[str]
+    prices: List[float]
+    positions: Dict[str, int]
+    offset: int  # Bytes del historial ya indexados (en SQLite, último seq leído)
+    generation: int = 0  # Inodo del historial indexado: cambia cuando se reescribe (0 en SQLite)
+
+
+def empty_index() -> RateIndex:
+    """Crea un índice vacío"""
+    return RateIndex(dates=[], prices=[], positions={}, offset=0)
+
+
+def to_date_key(value: DateLike) -> str:
+    """Normaliza una fecha a la clave YYYY-MM-DD usada por el índice"""
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m-%d')
+    return value.strip()[:10]
+
+
+def to_epoch_day(date_key: str) -> int:
+    """Convierte 'YYYY-MM-DD' en días desde 1970-01-01"""
+    return date.fromisoformat(date_key[:10]).toordinal() - EPOCH_ORDINAL
+
+
+def from_epoch_day(day: int) -> date:
+    """Convierte días desde 1970-01-01 en fecha"""
+    return date.fromordinal(int(day) + EPOCH_ORDINAL)
+
+
+def merge_entries(index: RateIndex, entries: List[Tuple[str, float]], offset: int) -> RateIndex:
+    """
+    Incorpora pares (fecha, precio) al índice.
+
+    Si una fecha ya existe, gana el registro más reciente del historial. El
+    caso común (fechas nuevas en orden o la corrección de una fecha ya
+    indexada) se resuelve en el lugar y cuesta O(entradas nuevas); solo una
+    fecha nueva anterior a la última obliga a reconstruir las listas.
+    `prices` crece antes que `dates`, así que un lector concurrente (la API)
+    nunca ve una fecha sin su precio.
+    """
+    dates, prices, positions = index.dates, index.prices, index.positions
+    for position, (date_key, price) in enumerate(entries):
+        existing = positions.get(date_key)
+        if existing is not None:
+            prices[existing] = price
+        elif not dates or date_key > dates[-1]:
+            prices.append(price)
+            dates.append(date_key)
+            positions[date_key] = len(dates) - 1
+        else:
+            return rebuild_index(index, entries[position:], offset)
+    return index._replace(offset=offset)
+
+
+def rebuild_index(index: RateIndex, entries: List[Tuple[str, float]], offset: int) -> RateIndex:
+    """Índice nuevo con las entradas fuera de orden intercaladas (O(n log n))"""
+    latest: Dict[str, float] = dict(zip(index.dates, index.prices))
+    latest.update(entries)
+    dates = sorted(latest)
+    return RateIndex(dates=dates, prices=[latest[d] for d in dates],
+                     positions={d: i for i, d in enumerate(dates)}, offset=offset,
+                     generation=index.generation)
+
+
+def get_record_rate(record: Dict, currency: str) -> Optional[float]:
+    """Tasa de una moneda en un registro (USD en 'precio_dolar', el resto en 'tasas')"""
+    if currency == 'USD':
+        return record.get('precio_dolar')
+    return (record.get('tasas') or {}).get(currency)
+
+
+def get_index_path(currency: str = 'USD') -> str:
+    """Ruta del índice persistido para una moneda"""
+    if currency == 'USD':
+        return ScraperConfig.INDEX_FILE
+    base, extension = os.path.splitext(ScraperConfig.INDEX_FILE)
+    return f"{base}.{currency}{extension}"
+
+
+def read_new_entries(history_path: str, offset: int,
+                     currency: str = 'USD') -> Tuple[List[Tuple[str, float]], int]:
+    """Lee del historial solo las líneas completas posteriores a `offset`"""
+    entries = []
+    with open(history_path, 'rb') as f:
+        f.seek(offset)
+        for raw_line in f:
+            if not raw_line.endswith(b'\n'):
+                break  # Línea en escritura: se indexará en la próxima actualización
+            offset += len(raw_line)
+            record = parse_record_line(raw_line.decode('utf-8'))
+            rate = get_record_rate(record, currency) if record else None
+            if rate is not None and 'fecha_precio' in record:
+                entries.append((to_date_key(record['fecha_precio']), float(rate)))
+    return entries, offset
+
+
+def get_generation(history_path: str) -> int:
+    """
+    Generación del historial: su inodo. Solo se agrega al final del archivo,
+    y las reescrituras (rewrite_records) lo reemplazan con un rename atómico.
+    Por eso el inodo cambia exactamente cuando los offsets dejan de valer.
+    """
+    return os.stat(history_path).st_ino
+
+
+def is_line_boundary(history_path: str, offset: int) -> bool:
+    """Indica si `offset` cae justo después de un salto de línea del historial"""
+    if offset == 0:
+        return True
+    with open(history_path, 'rb') as f:
+        f.seek(offset - 1)
+        return f.read(1) == b'\n'
+
+
+def is_rewritten(index: RateIndex, history_path: str, generation: int) -> bool:
+    """
+    Indica si el historial ya no es el que se indexó: otro inodo, un archivo
+    más corto que lo indexado o un offset que no cae al final de una línea
+    (reescritura en el lugar o inodo reutilizado).
+    """
+    if not index.offset:
+        return False
+    return (generation != index.generation or os.path.getsize(history_path) < index.offset
+            or not is_line_boundary(history_path, index.offset))
+
+
+def update_index(index: RateIndex, history_path: Optional[str] = None,
+                 currency: str = 'USD') -> RateIndex:
+    """
+    Actualiza el índice con los registros agregados desde la última lectura.
+
+    Si el historial se reescribió (backfill con fechas anteriores) los offsets
+    ya no valen y el índice se reconstruye desde el principio.
+    """
+    history_path = history_path or get_history_path()
+    if uses_sqlite():
+        from sqlite_storage import read_new_rates
+        entries, offset = read_new_rates(index.offset, currency, history_path)
+        return merge_entries(index, entries, offset)
+    if not os.path.exists(history_path):
+        return empty_index()
+
+    generation = get_generation(history_path)
+    if is_rewritten(index, history_path, generation):
+        logging.info("El historial se reescribió; reconstruyendo índice")
+        index = empty_index()
+    if index.generation != generation:
+        index = index._replace(generation=generation)
+
+    entries, offset = read_new_entries(history_path, index.offset, currency)
+    return merge_entries(index, entries, offset)
+
+
+def load_persisted_index(index_path: str) -> RateIndex:
+    """Carga el índice persistido; si no existe o es inválido devuelve uno vacío"""
+    if not os.path.exists(index_path):
+        return empty_index()
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get('version') != INDEX_VERSION:
+            return empty_index()
+        dates, prices = payload['dates'], payload['prices']
+        return RateIndex(dates=dates, prices=prices,
+                         positions={d: i for i, d in enumerate(dates)},
+                         offset=payload['offset'], generation=payload['generation'])
+    except (json.JSONDecodeError, KeyError, OSError) as e:
+        logging.warning(f"Índice inválido, se reconstruirá: {e}")
+        return empty_index()
+
+
+def save_index(index: RateIndex, index_path: str) -> None:
+    """Persiste el índice junto al historial"""
+    payload = {
+        'version': INDEX_VERSION,
+        'offset': index.offset,
+        'generation': index.generation,
+        'dates': index.dates,
+        'prices': index.prices,
+    }
+    write_atomically(index_path, json.dumps(payload, separators=(',', ':')))
+
+
+def load_index(history_path: Optional[str] = None, index_path: Optional[str] = None,
+               currency: str = 'USD') -> RateIndex:
+    """Carga el índice persistido de una moneda, lo pone al día y lo guarda si cambió"""
+    if history_path is None:
+        # Migrar el JSON heredado (y copiarlo a SQLite) antes de la primera lectura,
+        # que de otro modo vería un historial vacío o crearía la base vacía
+        ensure_history_file()
+        history_path = get_history_path()
+    if uses_sqlite():
+        return update_index(empty_index(), history_path, currency)  # La base ya está indexada
+    index_path = index_path or get_index_path(currency)
+
+    persisted = load_persisted_index(index_path)
+    index = update_index(persisted, history_path, currency)
+    if index.offset != persisted.offset or index.generation != persisted.generation:
+        try:
+            save_index(index, index_path)
+        except OSError as e:
+            logging.warning(f"No se pudo guardar el índice: {e}")
+    return index
+
+
+def get_rate(index: RateIndex, value: DateLike) -> Optional[float]:
+    """Precio exacto para una fecha_precio (búsqueda O(1))"""
+    position = index.positions.get(to_date_key(value))
+    return index.prices[position] if position is not None else None
+
+
+def get_rate_as_of(index: RateIndex, value: DateLike) -> Optional[Tuple[str, float]]:
+    """Último precio vigente en la fecha/hora indicada (búsqueda binaria)"""
+    position = bisect_right(index.dates, to_date_key(value)) - 1
+    if position < 0:
+        return None
+    return index.dates[position], index.prices[position]
+
+
+def get_rates_in_range(index: RateIndex, start: DateLike, end: DateLike) -> List[Tuple[str, float]]:
+    """Precios con fecha_precio entre `start` y `end` (ambos inclusive)"""
+    low = bisect_left(index.dates, to_date_key(start))
+    high = bisect_right(index.dates, to_date_key(end))
+    return list(zip(index.dates[low:high], index.prices[low:high]))
+
+
+def get_latest_rate(index: RateIndex) -> Optional[Tuple[str, float]]:
+    """Precio más reciente del historial"""
+    position = len(index.dates) - 1  # Por posición: `prices` puede tener ya el precio de una fecha en curso
+    if position < 0:
+        return None
+    return index.dates[position], index.prices[position]
+
+
+def add_query_arguments(parser: argparse.ArgumentParser) -> None:
+    """Argumentos de consulta (compartidos con el subcomando `history` del scraper)"""
+    parser.add_argument('--date', help="Precio vigente en la fecha (YYYY-MM-DD)")
+    parser.add_argument('--start', help="Inicio del rango (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Fin del rango (YYYY-MM-DD)")
+    parser.add_argument('--currency', default='USD', choices=list(ScraperConfig.CURRENCY_DIV_IDS),
+                        help="Moneda a consultar (por defecto USD)")
+
+
+def run_query(args: argparse.Namespace) -> None:
+    """Imprime el resultado de la consulta indicada en `args`"""
+    index = load_index(currency=args.currency)
+
+    if args.start or args.end:
+        for date_key, price in get_rates_in_range(index, args.start or '', args.end or '9999-12-31'):
+            print(f"{date_key}  {price:,.4f} Bs")
+    elif args.date:
+        result = get_rate_as_of(index, args.date)
+        print(f"{result[0]}  {result[1]:,.4f} Bs" if result else "Sin datos para esa fecha")
+    else:
+        result = get_latest_rate(index)
+        print(f"{result[0]}  {result[1]:,.4f} Bs" if result else "Historial vacío")
+
+
+def main():
+    """Consulta el historial desde la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Consultas sobre el historial de precios del BCV")
+    add_query_arguments(parser)
+    run_query(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
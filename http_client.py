@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Capa HTTP compartida para el scraper del BCV
+Sesión reutilizable con pool de conexiones (keep-alive), timeouts de
+conexión y lectura separados, reintentos con backoff exponencial y jitter,
+y descarga escalonada en paralelo entre espejos (gana la primera válida).
+"""
+
+import logging
+import queue
+import random
+import socket
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, NamedTuple, Optional
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from config import ScraperConfig
+from metrics import increment, observe, emit_event
+
+# Estados HTTP que justifican reintentar (errores transitorios del servidor)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Códigos de error de una descarga fallida (fetch_hedged y el circuit breaker)
+NO_RESPONSE = 'sin respuesta'  # Sin conexión, timeout o error transitorio del servidor
+CLIENT_ERROR = 'error del cliente'  # El servidor respondió con un 4xx definitivo (404, 403...)
+
+# Contabilidad de intentos por URL durante la vida del proceso
+URL_STATS: Dict[str, Dict[str, Any]] = {}
+
+# Tiempos de establecimiento de la última conexión abierta en cada hilo
+connection_timings = threading.local()
+
+
+class TimedConnectionMixin:
+    """Mide DNS, conexión TCP y handshake TLS de cada conexión nueva"""
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            addresses = list(dict.fromkeys(
+                info[4][0] for info in socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)))
+        except socket.gaierror:
+            return super()._new_conn()  # urllib3 reporta el error de resolución
+        resolved = time.perf_counter()
+
+        # Se prueba cada dirección resuelta en orden, como create_connection de urllib3
+        hostname, error = self._dns_host, None
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except Exception as e:
+                    error = e
+            else:
+                raise error
+        finally:
+            self._dns_host = hostname
+        connection_timings.dns = resolved - started
+        connection_timings.connect = time.perf_counter() - resolved
+        return sock
+
+    def connect(self):
+        connection_timings.dns = connection_timings.connect = 0.0
+        started = time.perf_counter()
+        super().connect()
+        total = time.perf_counter() - started
+        connection_timings.tls = (max(total - connection_timings.dns - connection_timings.connect, 0.0)
+                                  if isinstance(self, HTTPSConnection) else None)
+        connection_timings.fresh = True
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter cuyas conexiones registran sus tiempos de establecimiento"""
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool,
+                                                   'https': TimedHTTPSConnectionPool}
+
+
+def take_connection_timings() -> Dict[str, float]:
+    """Tiempos de la conexión abierta por la última petición del hilo (vacío si se reutilizó)"""
+    if not getattr(connection_timings, 'fresh', False):
+        return {}
+    connection_timings.fresh = False
+    timings = {'dns': connection_timings.dns, 'connect': connection_timings.connect,
+               'tls': connection_timings.tls}
+    return {phase: seconds for phase, seconds in timings.items() if seconds is not None}
+
+
+def record_request_timings(url: str, response: Optional[requests.Response], elapsed: float,
+                           error: Optional[str] = None) -> None:
+    """
+    Registra las fases de una petición: DNS, conexión y TLS (solo si se abrió
+    una conexión nueva), espera hasta los headers y descarga del cuerpo.
+    """
+    phases = take_connection_timings()
+    if response is not None:
+        ttfb = response.elapsed.total_seconds()
+        phases['ttfb'] = max(ttfb - sum(phases.values()), 0.0)
+        phases['download'] = max(elapsed - ttfb, 0.0)
+    phases['total'] = elapsed
+    for phase, seconds in phases.items():
+        observe('bcv_http_phase_duration_seconds', seconds, url=url, phase=phase)
+    increment('bcv_http_requests_total', url=url, outcome='ok' if error is None else 'error')
+    emit_event('http', url=url, status=response.status_code if response is not None else None,
+               bytes=len(response.content) if response is not None else 0, error=error,
+               **{f"{phase}_ms": round(seconds * 1000, 3) for phase, seconds in phases.items()})
+
+
+# Deshabilitar advertencias SSL (la sesión no verifica certificados)
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+@lru_cache(maxsize=None)
+def get_session() -> requests.Session:
+    """Devuelve la sesión HTTP compartida (se crea una sola vez por proceso)"""
+    session = requests.Session()
+    adapter = TimedHTTPAdapter(
+        pool_connections=ScraperConfig.HTTP_POOL_SIZE,
+        pool_maxsize=ScraperConfig.HTTP_POOL_SIZE,
+        max_retries=0  # Los reintentos se manejan en fetch_url
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(ScraperConfig.HTTP_HEADERS)
+    session.verify = False
+    return session
+
+
+def get_timeouts(remaining: Optional[float] = None) -> tuple:
+    """Timeouts (conexión, lectura) en segundos, sin superar lo que queda del plazo"""
+    if remaining is None:
+        return (ScraperConfig.CONNECT_TIMEOUT, ScraperConfig.READ_TIMEOUT)
+    return (min(ScraperConfig.CONNECT_TIMEOUT, remaining), min(ScraperConfig.READ_TIMEOUT, remaining))
+
+
+def compute_backoff(attempt: int) -> float:
+    """Backoff exponencial con jitter completo para el intento indicado (0, 1, 2...)"""
+    ceiling = min(ScraperConfig.BACKOFF_MAX, ScraperConfig.BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+def record_attempt(url: str, success: bool, elapsed: float, error: Optional[str] = None,
+                   status: Optional[int] = None) -> None:
+    """Registra el resultado de un intento contra una URL (`status`: estado HTTP del fallo, si hubo respuesta)"""
+    stats = URL_STATS.setdefault(url, {'attempts': 0, 'successes': 0, 'failures': 0,
+                                       'last_error': None, 'last_status': None, 'last_elapsed': None})
+    stats['attempts'] += 1
+    stats['last_elapsed'] = round(elapsed, 3)
+    if success:
+        stats['successes'] += 1
+    else:
+        stats['failures'] += 1
+        stats['last_error'] = error
+        stats['last_status'] = status
+
+
+def get_url_stats() -> Dict[str, Dict[str, Any]]:
+    """Copia de la contabilidad de intentos por URL"""
+    return {url: dict(stats) for url, stats in URL_STATS.items()}
+
+
+def get_failure_code(url: str) -> str:
+    """
+    Código de la última descarga fallida de una URL: CLIENT_ERROR si el
+    servidor respondió con un 4xx que no se reintenta, NO_RESPONSE si no.
+    """
+    status = URL_STATS.get(url, {}).get('last_status')
+    if status is not None and 400 <= status < 500 and status not in RETRYABLE_STATUS:
+        return CLIENT_ERROR
+    return NO_RESPONSE
+
+
+def is_retryable(error: Exception) -> bool:
+    """Indica si un error justifica otro intento"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def capture_error_response(url: str, response: requests.Response, reason: str) -> None:
+    """Guarda una respuesta de error en las páginas fallidas sin interrumpir la descarga"""
+    from dead_letter import capture_response
+
+    try:
+        capture_response(url, response, reason)
+    except Exception as e:
+        logging.warning(f"No se pudo guardar la respuesta de error de {url}: {e}")
+
+
+def fetch_url(url: str,
+              session: Optional[requests.Session] = None,
+              max_retries: Optional[int] = None,
+              deadline: Optional[float] = None,
+              headers: Optional[Dict[str, str]] = None,
+              sleep: Callable[[float], None] = time.sleep,
+              capture_errors: bool = False) -> Optional[requests.Response]:
+    """
+    Descarga una URL con reintentos.
+
+    Se hacen hasta 1 + `max_retries` intentos, sin superar `deadline` segundos
+    en total para la URL: el timeout de cada intento se recorta a lo que queda
+    del plazo. Los errores 4xx (salvo 429) no se reintentan. Con
+    `capture_errors`, el cuerpo HTML de la última respuesta de error se guarda
+    en las páginas fallidas (dead_letter.py).
+    """
+    session = session or get_session()
+    max_retries = ScraperConfig.MAX_RETRIES if max_retries is None else max_retries
+    deadline = ScraperConfig.REQUEST_TIMEOUT if deadline is None else deadline
+    started = time.monotonic()
+
+    for attempt in range(max_retries + 1):
+        attempt_started = time.monotonic()
+        response = None
+        try:
+            remaining = deadline - (attempt_started - started)
+            response = session.get(url, headers=headers, timeout=get_timeouts(remaining))
+            response.raise_for_status()
+            record_attempt(url, True, time.monotonic() - attempt_started)
+            record_request_timings(url, response, time.monotonic() - attempt_started)
+            return response
+        except requests.RequestException as e:
+            record_attempt(url, False, time.monotonic() - attempt_started, str(e),
+                           response.status_code if response is not None else None)
+            record_request_timings(url, response, time.monotonic() - attempt_started, str(e))
+            if not is_retryable(e) or attempt == max_retries:
+                logging.warning(f"Error con {url}: {e}")
+                if capture_errors and response is not None:
+                    capture_error_response(url, response, str(e))
+                return None
+
+            delay = compute_backoff(attempt)
+            if time.monotonic() - started + delay >= deadline:
+                logging.warning(f"Error con {url}: {e} (tiempo agotado para reintentos)")
+                if capture_errors and response is not None:
+                    capture_error_response(url, response, str(e))
+                return None
+            logging.info(f"Reintentando {url} en {delay:.2f}s (intento {attempt + 1}/{max_retries}): {e}")
+            sleep(delay)
+
+    return None
+
+
+class HedgedResult(NamedTuple):
+    """Resultado de una descarga con peticiones escalonadas en paralelo"""
+    value: Any  # Valor devuelto por el validador para la respuesta ganadora
+    url: Optional[str]  # Espejo ganador (None si ninguno respondió algo válido)
+    attempts: List[Dict[str, Any]]  # Un registro por espejo: url, elapsed, ok, error
+
+
+def fetch_hedged(urls: List[str],
+                 validate: Callable[[str, requests.Response], Any],
+                 stagger: Optional[float] = None,
+                 timeout: Optional[float] = None,
+                 headers: Optional[Dict[str, Dict[str, str]]] = None,
+                 options: Optional[Dict[str, Dict[str, Any]]] = None) -> HedgedResult:
+    """
+    Lanza las URLs en paralelo, escalonadas `stagger` segundos, y devuelve la
+    primera respuesta cuyo validador `validate(url, response)` produzca un
+    valor distinto de None. `headers` permite headers adicionales por URL y
+    `options` otros argumentos de fetch_url (p. ej. max_retries=0 para sondear).
+
+    Si un espejo falla, el siguiente pendiente arranca de inmediato en lugar
+    de esperar su turno. Los espejos que aún no arrancaron se cancelan al
+    haber ganador; los que están en curso se abandonan (hilos daemon) sin
+    bloquear la salida.
+    """
+    stagger = ScraperConfig.HEDGE_STAGGER if stagger is None else stagger
+    timeout = ScraperConfig.REQUEST_TIMEOUT if timeout is None else timeout
+    results: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+    done = threading.Event()
+    wakeups = [threading.Event() for _ in urls]  # Adelanta el turno de un espejo pendiente
+    launched = set()
+    launch_lock = threading.Lock()
+    started = time.monotonic()
+
+    def attempt(position: int, url: str) -> None:
+        wakeups[position].wait(stagger * position)
+        with launch_lock:
+            launched.add(position)
+        if done.is_set():
+            results.put({'url': url, 'elapsed': 0.0, 'ok': False, 'error': 'cancelado', 'value': None})
+            return
+        attempt_started = time.monotonic()
+        value, error = None, None
+        try:
+            response = fetch_url(url, deadline=timeout, headers=(headers or {}).get(url),
+                                 **(options or {}).get(url, {}))
+            if response is None:
+                error = get_failure_code(url)
+            else:
+                value = validate(url, response)
+                if value is None:
+                    error = 'respuesta inválida'
+        except Exception as e:
+            error = str(e)
+        results.put({'url': url, 'elapsed': round(time.monotonic() - attempt_started, 3),
+                     'ok': value is not None, 'error': error, 'value': value})
+
+    for position, url in enumerate(urls):
+        threading.Thread(target=attempt, args=(position, url), daemon=True).start()
+
+    attempts: List[Dict[str, Any]] = []
+    winner: Optional[Dict[str, Any]] = None
+    overall_deadline = started + timeout + stagger * len(urls)
+    while len(attempts) < len(urls):
+        remaining = overall_deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            outcome = results.get(timeout=remaining)
+        except queue.Empty:
+            break
+        attempts.append({k: v for k, v in outcome.items() if k != 'value'})
+        if outcome['ok']:
+            winner = outcome
+            break
+        with launch_lock:
+            pending = [p for p in range(len(urls)) if p not in launched and not wakeups[p].is_set()]
+        if pending:
+            wakeups[pending[0]].set()
+
+    done.set()
+    if winner:
+        logging.info(f"Espejo ganador: {winner['url']} en {winner['elapsed']:.3f}s")
+        return HedgedResult(value=winner['value'], url=winner['url'], attempts=attempts)
+    return HedgedResult(value=None, url=None, attempts=attempts)
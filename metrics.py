@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Métricas e instrumentación del scraper del BCV
+Contadores, gauges e histogramas en memoria con formato de exposición de
+Prometheus (archivo de texto para el textfile collector o endpoint /metrics),
+y eventos JSON por etapa en un log rotativo aparte del log legible.
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+from config import ScraperConfig
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Límites de los histogramas, en segundos
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    'bcv_runs_total': ('counter', "Ejecuciones del scraper por resultado"),
+    'bcv_stage_duration_seconds': ('histogram', "Duración de cada etapa del pipeline"),
+    'bcv_http_requests_total': ('counter', "Peticiones HTTP por URL y resultado"),
+    'bcv_http_phase_duration_seconds': ('histogram', "Duración de cada fase de una petición HTTP"),
+    'bcv_extraction_strategy_total': ('counter', "Estrategia que encontró el precio del dólar"),
+    'bcv_source_results_total': ('counter', "Resultados por fuente de tasas"),
+    'bcv_circuit_skips_total': ('counter', "Consultas omitidas por circuito abierto, por URL"),
+    'bcv_circuit_open': ('gauge', "Circuito abierto (1) o cerrado (0) por URL"),
+    'bcv_notifications_total': ('counter', "Notificaciones por canal y resultado"),
+    'bcv_notification_duration_seconds': ('histogram', "Latencia de envío por canal"),
+    'bcv_last_success_timestamp_seconds': ('gauge', "Momento de la última ejecución exitosa"),
+    'bcv_last_rate': ('gauge', "Última tasa guardada por moneda"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+metrics_lock = threading.Lock()
+COUNTERS: Dict[Tuple[str, Labels], float] = {}
+GAUGES: Dict[Tuple[str, Labels], float] = {}
+# Por serie: conteos por bucket (no acumulados), suma y cantidad de observaciones
+HISTOGRAMS: Dict[Tuple[str, Labels], List[float]] = {}
+
+events_logger = logging.getLogger('bcv.events')
+events_logger.propagate = False  # Los eventos JSON no se mezclan con el log legible
+
+
+def to_labels(labels: Dict[str, Any]) -> Labels:
+    """Etiquetas en forma canónica (ordenadas, valores como texto)"""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def increment(name: str, value: float = 1.0, **labels) -> None:
+    """Incrementa un contador"""
+    key = (name, to_labels(labels))
+    with metrics_lock:
+        COUNTERS[key] = COUNTERS.get(key, 0.0) + value
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    """Fija el valor de un gauge"""
+    with metrics_lock:
+        GAUGES[(name, to_labels(labels))] = value
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    """Registra una duración en un histograma"""
+    key = (name, to_labels(labels))
+    with metrics_lock:
+        series = HISTOGRAMS.get(key)
+        if series is None:
+            series = HISTOGRAMS[key] = [0.0] * (len(BUCKETS) + 2)
+        for position, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                series[position] += 1
+                break
+        series[-2] += seconds
+        series[-1] += 1
+
+
+def reset_metrics() -> None:
+    """Vacía todas las series"""
+    with metrics_lock:
+        COUNTERS.clear()
+        GAUGES.clear()
+        HISTOGRAMS.clear()
+
+
+def emit_event(event: str, **fields) -> None:
+    """Escribe un evento JSON de una línea en el log de eventos"""
+    if not events_logger.handlers:
+        return
+    payload = {'ts': round(time.time(), 3), 'event': event, **fields}
+    events_logger.info(json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str))
+
+
+@contextmanager
+def timed(stage: str, **fields) -> Iterator[Dict[str, Any]]:
+    """
+    Mide una etapa del pipeline: la registra en bcv_stage_duration_seconds y
+    emite un evento 'stage'. El diccionario que entrega permite agregar
+    detalles al evento (p. ej. la estrategia o la URL ganadora).
+    """
+    started = time.perf_counter()
+    try:
+        yield fields
+    except Exception as e:
+        fields['error'] = str(e)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        observe('bcv_stage_duration_seconds', elapsed, stage=stage)
+        emit_event('stage', stage=stage, duration_ms=round(elapsed * 1000, 3), **fields)
+
+
+def format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    """Etiquetas en sintaxis de Prometheus: {a="1",b="2"}"""
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+def render_prometheus() -> str:
+    """Todas las series en el formato de exposición de texto de Prometheus"""
+    with metrics_lock:
+        counters, gauges = dict(COUNTERS), dict(GAUGES)
+        histograms = {key: list(series) for key, series in HISTOGRAMS.items()}
+
+    lines: List[str] = []
+    names = sorted({name for name, _ in list(counters) + list(gauges) + list(histograms)})
+    for name in names:
+        kind, description = HELP.get(name, ('untyped', name))
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+        for (series_name, labels), value in sorted({**counters, **gauges}.items()):
+            if series_name == name:
+                lines.append(f"{name}{format_labels(labels)} {value:g}")
+        for (series_name, labels), series in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            cumulative = 0.0
+            for bound, count in zip(BUCKETS, series):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(labels, ('le', f'{bound:g}'))} {cumulative:g}")
+            lines.append(f"{name}_bucket{format_labels(labels, ('le', '+Inf'))} {series[-1]:g}")
+            lines.append(f"{name}_sum{format_labels(labels)} {series[-2]:.6f}")
+            lines.append(f"{name}_count{format_labels(labels)} {series[-1]:g}")
+    return '\n'.join(lines) + '\n'
+
+
+def write_textfile(path: Optional[str] = None) -> None:
+    """Escribe las métricas para el textfile collector de node_exporter (reemplazo atómico)"""
+    from storage import write_atomically
+
+    path = ScraperConfig.METRICS_TEXTFILE if path is None else path
+    if not path:
+        return
+    try:
+        write_atomically(path, render_prometheus())
+    except OSError as e:
+        logging.warning(f"No se pudieron escribir las métricas: {e}")
+
+
+def setup_event_log(path: Optional[str] = None) -> None:
+    """Activa el log de eventos JSON con rotación por tamaño"""
+    from logging.handlers import RotatingFileHandler
+
+    path = path or ScraperConfig.EVENTS_LOG_FILE
+    if events_logger.handlers or not path:
+        return
+    handler = RotatingFileHandler(path, maxBytes=ScraperConfig.LOG_MAX_BYTES,
+                                  backupCount=ScraperConfig.LOG_BACKUP_COUNT, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    events_logger.addHandler(handler)
+    events_logger.setLevel(logging.INFO)
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = '127.0.0.1') -> 'ThreadingHTTPServer':
+    """Sirve GET /metrics en un hilo (para el modo daemon)"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args) -> None:
+            logging.debug(format % args)
+
+        def do_GET(self) -> None:
+            if self.path.split('?')[0] != '/metrics':
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    port = ScraperConfig.METRICS_PORT if port is None else port
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metricas", daemon=True).start()
+    logging.info(f"Métricas en http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -1,26 +1,53 @@
 #!/usr/bin/env python3
 """
 Módulo de notificaciones para el scraper del BCV
-Soporta notificaciones por email y Telegram
+Soporta notificaciones por email y Telegram, enviadas en paralelo y en
+segundo plano, con varios destinatarios por canal y reintentos
 """
 
 import smtplib
 import requests
 import logging
+import threading
+import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import Optional, Dict, Any
+from functools import lru_cache, partial
+from typing import Callable, Optional, Dict, Any, List
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 from config import ScraperConfig
+from http_client import compute_backoff
+from metrics import increment, observe, emit_event
 
+# Envíos en segundo plano que el proceso debe esperar antes de salir
+PENDING_DISPATCHES: List[threading.Thread] = []
 
-def create_email_content(price: float, price_date: str, extraction_time: str) -> str:
+
+def format_other_rates(rates: Optional[Dict[str, float]], bullet: str = "•") -> str:
+    """Líneas con las demás tasas oficiales (vacío si no hay)"""
+    if not rates:
+        return ""
+    lines = [f"{bullet} {code}: {value:,.2f} Bs" for code, value in rates.items() if code != 'USD']
+    return "\n💱 Otras tasas oficiales:\n" + "\n".join(lines) + "\n\n" if lines else ""
+
+
+def format_alerts(alerts: Optional[List[str]], bullet: str = "•") -> str:
+    """Líneas con las reglas de alerta que dispararon la notificación (vacío si no hay)"""
+    if not alerts:
+        return ""
+    return "🚨 Alertas:\n" + "\n".join(f"{bullet} {alert}" for alert in alerts) + "\n\n"
+
+
+def create_email_content(price: float, price_date: str, extraction_time: str,
+                         rates: Optional[Dict[str, float]] = None,
+                         alerts: Optional[List[str]] = None) -> str:
     """Crea el contenido del email con información del precio"""
     return f"""
 📊 ACTUALIZACIÓN DEL PRECIO DEL DÓLAR BCV
 
-💰 Precio: {price:,.2f} Bs
-📅 Fecha del precio: {price_date}
+{format_alerts(alerts)}💰 Precio: {price:,.2f} Bs
+{format_other_rates(rates)}📅 Fecha del precio: {price_date}
 ⏰ Extraído el: {extraction_time}
 🌍 Zona horaria: {ScraperConfig.TIMEZONE}
 
@@ -29,12 +56,14 @@ Este es un mensaje automático del scraper del BCV.
 """
 
 
-def create_telegram_content(price: float, price_date: str, extraction_time: str) -> str:
+def create_telegram_content(price: float, price_date: str, extraction_time: str,
+                            rates: Optional[Dict[str, float]] = None,
+                            alerts: Optional[List[str]] = None) -> str:
     """Crea el contenido del mensaje de Telegram"""
     return f"""📊 *ACTUALIZACIÓN DEL PRECIO DEL DÓLAR BCV*
 
-💰 *Precio:* {price:,.2f} Bs
-📅 *Fecha del precio:* {price_date}
+{format_alerts(alerts)}💰 *Precio:* {price:,.2f} Bs
+{format_other_rates(rates)}📅 *Fecha del precio:* {price_date}
 ⏰ *Extraído el:* {extraction_time}
 🌍 *Zona horaria:* {ScraperConfig.TIMEZONE}
 
@@ -42,94 +71,200 @@ def create_telegram_content(price: float, price_date: str, extraction_time: str)
 _Este es un mensaje automático del scraper del BCV._"""
 
 
-def send_email_notification(price: float, price_date: str, extraction_time: str) -> bool:
-    """Envía notificación por email"""
+def with_retries(channel: str, func: Callable[[], None]) -> bool:
+    """Ejecuta un envío con reintentos y backoff; devuelve True si tuvo éxito"""
+    attempts = ScraperConfig.NOTIFICATION_RETRIES + 1
+    for attempt in range(attempts):
+        try:
+            func()
+            return True
+        except Exception as e:
+            if attempt == attempts - 1:
+                logging.error(f"Error al enviar {channel}: {e}")
+                return False
+            delay = compute_backoff(attempt)
+            logging.warning(f"Error al enviar {channel} (reintento en {delay:.2f}s): {e}")
+            time.sleep(delay)
+    return False
+
+
+def open_smtp_session() -> smtplib.SMTP:
+    """Abre una sesión SMTP autenticada (STARTTLS + login una sola vez)"""
+    server = smtplib.SMTP(ScraperConfig.EMAIL_SMTP_SERVER, ScraperConfig.EMAIL_SMTP_PORT,
+                          timeout=ScraperConfig.EMAIL_TIMEOUT)
+    if ScraperConfig.EMAIL_USE_TLS:
+        server.starttls()
+    if ScraperConfig.EMAIL_PASSWORD:
+        server.login(ScraperConfig.EMAIL_FROM, ScraperConfig.EMAIL_PASSWORD)
+    return server
+
+
+def build_email_message(recipient: str, body: str) -> MIMEMultipart:
+    """Crea el mensaje MIME para un destinatario"""
+    msg = MIMEMultipart()
+    msg['From'] = ScraperConfig.EMAIL_FROM
+    msg['To'] = recipient
+    msg['Subject'] = ScraperConfig.EMAIL_SUBJECT
+    msg.attach(MIMEText(body, 'plain', 'utf-8'))
+    return msg
+
+
+def send_email_notification(price: float, price_date: str, extraction_time: str,
+                            rates: Optional[Dict[str, float]] = None,
+                            alerts: Optional[List[str]] = None) -> bool:
+    """Envía notificación por email a todos los destinatarios por una sola sesión SMTP"""
     if not ScraperConfig.EMAIL_ENABLED or not ScraperConfig.is_email_configured():
         logging.warning("Email no configurado o deshabilitado")
         return False
     
-    try:
-        # Crear el mensaje
-        msg = MIMEMultipart()
-        msg['From'] = ScraperConfig.EMAIL_FROM
-        msg['To'] = ScraperConfig.EMAIL_TO
-        msg['Subject'] = ScraperConfig.EMAIL_SUBJECT
-        
-        # Crear contenido
-        body = create_email_content(price, price_date, extraction_time)
-        msg.attach(MIMEText(body, 'plain', 'utf-8'))
-        
-        # Conectar y enviar
-        server = smtplib.SMTP(ScraperConfig.EMAIL_SMTP_SERVER, ScraperConfig.EMAIL_SMTP_PORT)
-        server.starttls()
-        server.login(ScraperConfig.EMAIL_FROM, ScraperConfig.EMAIL_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-        
-        logging.info("Email enviado exitosamente")
-        return True
-        
-    except Exception as e:
-        logging.error(f"Error al enviar email: {e}")
-        return False
+    body = create_email_content(price, price_date, extraction_time, rates, alerts)
+    pending = ScraperConfig.get_email_recipients()
+
+    def send_pending() -> None:
+        server = open_smtp_session()
+        try:
+            while pending:
+                server.send_message(build_email_message(pending[0], body))
+                pending.pop(0)  # Un reintento solo reenvía a quienes faltan
+        finally:
+            try:
+                server.quit()
+            except smtplib.SMTPException:
+                server.close()
+
+    total = len(pending)
+    success = with_retries("email", send_pending)
+    if success:
+        logging.info(f"Email enviado exitosamente a {total} destinatario(s)")
+    return success
+
 
+@lru_cache(maxsize=None)
+def get_telegram_session() -> requests.Session:
+    """Sesión HTTP reutilizable (keep-alive) para la API de Telegram"""
+    session = requests.Session()
+    pool_size = max(ScraperConfig.HTTP_POOL_SIZE, ScraperConfig.OUTBOX_CONCURRENCY)  # Un keep-alive por hilo de la bandeja
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
-def send_telegram_notification(price: float, price_date: str, extraction_time: str) -> bool:
-    """Envía notificación por Telegram"""
+
+def post_telegram_message(chat_id: str, message: str) -> None:
+    """Publica un mensaje en un chat de Telegram (lanza excepción si falla)"""
+    url = f"{ScraperConfig.TELEGRAM_API_URL}/bot{ScraperConfig.TELEGRAM_BOT_TOKEN}/sendMessage"
+    data = {
+        'chat_id': chat_id,
+        'text': message,
+        'parse_mode': 'Markdown'
+    }
+    response = get_telegram_session().post(url, data=data, timeout=ScraperConfig.TELEGRAM_TIMEOUT)
+    response.raise_for_status()
+
+
+def send_telegram_notification(price: float, price_date: str, extraction_time: str,
+                               rates: Optional[Dict[str, float]] = None,
+                               alerts: Optional[List[str]] = None) -> bool:
+    """Envía notificación por Telegram a todos los chats configurados"""
     if not ScraperConfig.TELEGRAM_ENABLED or not ScraperConfig.is_telegram_configured():
         logging.warning("Telegram no configurado o deshabilitado")
         return False
     
-    try:
-        # Crear URL y datos
-        url = f"https://api.telegram.org/bot{ScraperConfig.TELEGRAM_BOT_TOKEN}/sendMessage"
-        
-        # Crear contenido
-        message = create_telegram_content(price, price_date, extraction_time)
-        
-        data = {
-            'chat_id': ScraperConfig.TELEGRAM_CHAT_ID,
-            'text': message,
-            'parse_mode': 'Markdown'
-        }
-        
-        # Enviar mensaje
-        response = requests.post(url, data=data, timeout=30)
-        response.raise_for_status()
-        
-        logging.info("Mensaje de Telegram enviado exitosamente")
-        return True
-        
-    except Exception as e:
-        logging.error(f"Error al enviar mensaje de Telegram: {e}")
-        return False
+    message = create_telegram_content(price, price_date, extraction_time, rates, alerts)
+    send_to = partial(post_telegram_message, message=message)
+
+    chat_ids = ScraperConfig.get_telegram_chat_ids()
+    results = [with_retries(f"Telegram a {chat_id}", partial(send_to, chat_id)) for chat_id in chat_ids]
+    if all(results):
+        logging.info(f"Mensaje de Telegram enviado exitosamente a {len(chat_ids)} chat(s)")
+    return all(results)
 
 
-def send_notifications(price: float, price_date: str, extraction_time: str) -> Dict[str, bool]:
-    """Envía todas las notificaciones configuradas"""
+def record_notification(channel: str, seconds: float, ok: bool, **fields) -> None:
+    """Registra la latencia y el resultado de un envío"""
+    outcome = 'ok' if ok else 'error'
+    observe('bcv_notification_duration_seconds', seconds, channel=channel)
+    increment('bcv_notifications_total', channel=channel, outcome=outcome)
+    emit_event('notification', channel=channel, outcome=outcome,
+               duration_ms=round(seconds * 1000, 3), **fields)
+
+
+def send_notifications(price: float, price_date: str, extraction_time: str,
+                       rates: Optional[Dict[str, float]] = None,
+                       alerts: Optional[List[str]] = None) -> Dict[str, bool]:
+    """
+    Envía todas las notificaciones configuradas.
+
+    Los canales se envían en paralelo; un canal que no termine dentro de
+    NOTIFICATION_TIMEOUT se reporta como fallido sin bloquear a los demás.
+    """
     if not ScraperConfig.NOTIFICATIONS_ENABLED:
         logging.info("Notificaciones deshabilitadas")
         return {"email": False, "telegram": False}
     
-    results = {}
-    
-    # Enviar email si está configurado
+    channels = {}
     if ScraperConfig.EMAIL_ENABLED and ScraperConfig.is_email_configured():
-        results["email"] = send_email_notification(price, price_date, extraction_time)
+        channels["email"] = send_email_notification
     else:
-        results["email"] = False
         logging.info("Email no configurado o deshabilitado")
-    
-    # Enviar Telegram si está configurado
     if ScraperConfig.TELEGRAM_ENABLED and ScraperConfig.is_telegram_configured():
-        results["telegram"] = send_telegram_notification(price, price_date, extraction_time)
+        channels["telegram"] = send_telegram_notification
     else:
-        results["telegram"] = False
         logging.info("Telegram no configurado o deshabilitado")
-    
+
+    results = {"email": False, "telegram": False}
+    outcomes: Dict[str, bool] = {}
+    threads = []
+    for channel, sender in channels.items():
+        def run(channel=channel, sender=sender) -> None:
+            started = time.perf_counter()
+            outcomes[channel] = sender(price, price_date, extraction_time, rates, alerts)
+            record_notification(channel, time.perf_counter() - started, outcomes[channel])
+        thread = threading.Thread(target=run, name=f"notificacion-{channel}", daemon=True)
+        thread.start()
+        threads.append((channel, thread))
+
+    deadline = time.monotonic() + ScraperConfig.NOTIFICATION_TIMEOUT
+    for channel, thread in threads:
+        thread.join(max(deadline - time.monotonic(), 0))
+        if thread.is_alive():
+            logging.warning(f"Tiempo agotado enviando {channel}")
+        results[channel] = outcomes.get(channel, False)
     return results
 
 
+def dispatch_notifications(price: float, price_date: str, extraction_time: str,
+                           rates: Optional[Dict[str, float]] = None,
+                           alerts: Optional[List[str]] = None) -> threading.Thread:
+    """
+    Envía las notificaciones en segundo plano, fuera del camino crítico del scraper.
+
+    Antes de salir, el proceso debe llamar a wait_for_notifications().
+    """
+    def run() -> None:
+        results = send_notifications(price, price_date, extraction_time, rates, alerts)
+        if results.get('email'):
+            logging.info("✅ Notificación por email enviada")
+        if results.get('telegram'):
+            logging.info("✅ Notificación por Telegram enviada")
+
+    thread = threading.Thread(target=run, name="notificaciones", daemon=True)
+    thread.start()
+    PENDING_DISPATCHES[:] = [t for t in PENDING_DISPATCHES if t.is_alive()] + [thread]
+    return thread
+
+
+def wait_for_notifications(timeout: Optional[float] = None) -> None:
+    """Espera (con límite) a que terminen las notificaciones en segundo plano"""
+    timeout = ScraperConfig.NOTIFICATION_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    while PENDING_DISPATCHES:
+        thread = PENDING_DISPATCHES.pop()
+        thread.join(max(deadline - time.monotonic(), 0))
+        if thread.is_alive():
+            logging.warning("Notificaciones pendientes abandonadas por tiempo agotado")
+
+
 def test_notifications() -> None:
     """Función de prueba para verificar las notificaciones"""
     test_price = 214.419
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Bandeja de salida persistente de notificaciones (SQLite)
+save_dollar_price encola un mensaje por suscriptor y sigue; un trabajador
+drena la cola con concurrencia acotada, límite de envíos por canal,
+agrupación de varias actualizaciones pendientes en un solo mensaje y
+reintentos con backoff que sobreviven a reinicios.
+
+Uso:
+    python outbox.py --drain     # Enviar lo pendiente (p. ej. desde cron o el daemon)
+    python outbox.py --stats     # Resumen de la cola
+"""
+
+import argparse
+import json
+import logging
+import os
+import smtplib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+from config import ScraperConfig
+from http_client import compute_backoff
+
+CHANNELS = ('email', 'telegram')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (status, next_attempt_at);
+"""
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """Abre la base de la bandeja de salida (la crea si no existe)"""
+    connection = sqlite3.connect(path or ScraperConfig.OUTBOX_FILE, timeout=30)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def load_subscribers() -> Dict[str, List[str]]:
+    """
+    Suscriptores por canal: los de la configuración más los del archivo
+    SUBSCRIBERS_FILE ({"email": [...], "telegram": [...]}), sin duplicados.
+    """
+    subscribers = {
+        'email': ScraperConfig.get_email_recipients() if ScraperConfig.EMAIL_ENABLED else [],
+        'telegram': ScraperConfig.get_telegram_chat_ids() if ScraperConfig.TELEGRAM_ENABLED else [],
+    }
+    if os.path.exists(ScraperConfig.SUBSCRIBERS_FILE):
+        try:
+            with open(ScraperConfig.SUBSCRIBERS_FILE, 'r', encoding='utf-8') as f:
+                extra = json.load(f)
+            for channel in CHANNELS:
+                subscribers[channel] += [str(r).strip() for r in extra.get(channel, []) if str(r).strip()]
+        except (json.JSONDecodeError, OSError) as e:
+            logging.warning(f"Archivo de suscriptores inválido: {e}")
+    return {channel: list(dict.fromkeys(recipients)) for channel, recipients in subscribers.items()}
+
+
+def enqueue_update(price: float, price_date: str, extraction_time: str,
+                   rates: Optional[Dict[str, float]] = None, alerts: Optional[List[str]] = None,
+                   path: Optional[str] = None) -> int:
+    """Encola la actualización para todos los suscriptores en una transacción; devuelve cuántos"""
+    payload = json.dumps({'price': price, 'price_date': price_date,
+                          'extraction_time': extraction_time, 'rates': rates, 'alerts': alerts},
+                         ensure_ascii=False)
+    now = time.time()
+    rows = [(channel, recipient, payload, now, now)
+            for channel, recipients in load_subscribers().items() for recipient in recipients]
+    if not rows:
+        return 0
+    connection = connect(path)
+    try:
+        with connection:
+            connection.executemany(
+                'INSERT INTO outbox (channel, recipient, payload, created_at, next_attempt_at) '
+                'VALUES (?, ?, ?, ?, ?)', rows)
+    finally:
+        connection.close()
+    logging.info(f"📬 {len(rows)} notificaciones encoladas")
+    return len(rows)
+
+
+class RateLimiter:
+    """Limita los envíos por segundo de un canal (compartido entre hilos)"""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Bloquea hasta que haya un turno disponible"""
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def fetch_due_groups(connection: sqlite3.Connection, limit: int) -> List[Tuple[str, str, List[int], List[Dict]]]:
+    """
+    Mensajes pendientes y vencidos de hasta `limit` destinatarios, agrupados
+    por (canal, destinatario) para enviar una sola notificación con todas las
+    actualizaciones acumuladas.
+    """
+    now = time.time()
+    rows = connection.execute(
+        "SELECT id, channel, recipient, payload FROM outbox "
+        "WHERE status = 'pending' AND next_attempt_at <= ? AND (channel, recipient) IN ("
+        "    SELECT channel, recipient FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+        "    GROUP BY channel, recipient ORDER BY MIN(id) LIMIT ?) "
+        "ORDER BY id", (now, now, limit)).fetchall()
+    groups: Dict[Tuple[str, str], Tuple[List[int], List[Dict]]] = {}
+    for message_id, channel, recipient, payload in rows:
+        ids, payloads = groups.setdefault((channel, recipient), ([], []))
+        ids.append(message_id)
+        payloads.append(json.loads(payload))
+    return [(channel, recipient, ids, payloads) for (channel, recipient), (ids, payloads) in groups.items()]
+
+
+def format_earlier_updates(payloads: List[Dict], bullet: str = "•") -> str:
+    """Líneas con las actualizaciones anteriores agrupadas en el mensaje"""
+    if len(payloads) < 2:
+        return ""
+    lines = [f"{bullet} {p['price_date']}: {p['price']:,.2f} Bs" for p in payloads[:-1]]
+    return "\n📜 Actualizaciones anteriores:\n" + "\n".join(lines) + "\n"
+
+
+def build_message(channel: str, payloads: List[Dict]) -> str:
+    """Contenido de una notificación agrupada (la actualización más reciente manda)"""
+    from notifications import create_email_content, create_telegram_content
+
+    latest = payloads[-1]
+    create_content = create_email_content if channel == 'email' else create_telegram_content
+    content = create_content(latest['price'], latest['price_date'], latest['extraction_time'],
+                             latest.get('rates'), latest.get('alerts'))
+    return content + format_earlier_updates(payloads)
+
+
+# Sesión SMTP por hilo trabajador: STARTTLS + login una vez por hilo, no por mensaje.
+# Cada sesión abierta se registra para cerrarlas todas cuando terminan los hilos.
+smtp_sessions = threading.local()
+open_sessions: List[smtplib.SMTP] = []
+open_sessions_lock = threading.Lock()
+
+
+def get_smtp_session(reconnect: bool = False) -> smtplib.SMTP:
+    """Sesión SMTP del hilo actual (la abre y la registra si no hay o si se cayó)"""
+    from notifications import open_smtp_session
+
+    server = getattr(smtp_sessions, 'server', None)
+    if server is None or reconnect:
+        server = smtp_sessions.server = open_smtp_session()
+        with open_sessions_lock:
+            open_sessions.append(server)
+    return server
+
+
+def send_email_message(recipient: str, body: str) -> None:
+    """Envía un email reutilizando la sesión SMTP del hilo (se reabre si se cayó)"""
+    from notifications import build_email_message
+
+    try:
+        get_smtp_session().send_message(build_email_message(recipient, body))
+    except smtplib.SMTPServerDisconnected:
+        get_smtp_session(reconnect=True).send_message(build_email_message(recipient, body))
+
+
+def close_smtp_sessions() -> None:
+    """Cierra todas las sesiones SMTP abiertas por los hilos (llamar cuando ya terminaron)"""
+    with open_sessions_lock:
+        sessions = open_sessions[:]
+        open_sessions.clear()
+    for server in sessions:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+
+def deliver(channel: str, recipient: str, payloads: List[Dict], limiter: RateLimiter) -> Optional[str]:
+    """Envía una notificación agrupada; devuelve None si tuvo éxito o el error"""
+    from notifications import post_telegram_message, record_notification
+
+    limiter.acquire()
+    started = time.perf_counter()
+    error = None
+    try:
+        message = build_message(channel, payloads)
+        if channel == 'email':
+            send_email_message(recipient, message)
+        else:
+            post_telegram_message(recipient, message)
+    except Exception as e:
+        error = str(e)
+    record_notification(channel, time.perf_counter() - started, error is None,
+                        source='outbox', updates=len(payloads))
+    return error
+
+
+def record_outcomes(connection: sqlite3.Connection,
+                    outcomes: List[Tuple[List[int], Optional[str]]]) -> Tuple[int, int]:
+    """Marca enviados o reprograma con backoff los fallidos; devuelve (enviados, fallidos)"""
+    sent = failed = 0
+    now = time.time()
+    with connection:
+        for ids, error in outcomes:
+            placeholders = ','.join('?' * len(ids))
+            if error is None:
+                connection.execute(f"UPDATE outbox SET status = 'sent', attempts = attempts + 1 "
+                                   f"WHERE id IN ({placeholders})", ids)
+                sent += 1
+                continue
+            failed += 1
+            attempts = connection.execute(f"SELECT MAX(attempts) FROM outbox WHERE id IN ({placeholders})",
+                                          ids).fetchone()[0] + 1
+            status = 'failed' if attempts >= ScraperConfig.OUTBOX_MAX_ATTEMPTS else 'pending'
+            delay = ScraperConfig.OUTBOX_RETRY_BASE * (2 ** (attempts - 1)) + compute_backoff(0)
+            connection.execute(f"UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, "
+                               f"last_error = ? WHERE id IN ({placeholders})",
+                               [status, attempts, now + delay, error[:500]] + ids)
+    return sent, failed
+
+
+# Un solo drenaje a la vez por proceso: dos drenajes simultáneos leerían los mismos pendientes
+drain_lock = threading.Lock()
+
+
+def drain_outbox(path: Optional[str] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Envía todo lo pendiente y vencido con concurrencia acotada.
+
+    El resultado de cada envío se guarda en cuanto termina, de modo que un
+    proceso que sale a mitad del drenaje solo repite los envíos en curso.
+    Devuelve {'sent': n, 'failed': n} contando notificaciones agrupadas.
+    """
+    batch_size = batch_size or ScraperConfig.OUTBOX_BATCH_SIZE
+    limiters = {'email': RateLimiter(ScraperConfig.OUTBOX_EMAIL_PER_SECOND),
+                'telegram': RateLimiter(ScraperConfig.OUTBOX_TELEGRAM_PER_SECOND)}
+    totals = {'sent': 0, 'failed': 0}
+    with drain_lock:
+        connection = connect(path)
+        try:
+            with ThreadPoolExecutor(max_workers=ScraperConfig.OUTBOX_CONCURRENCY,
+                                    thread_name_prefix='outbox') as executor:
+                while True:
+                    groups = fetch_due_groups(connection, batch_size)
+                    if not groups:
+                        break
+                    futures = {executor.submit(deliver, channel, recipient, payloads, limiters[channel]): ids
+                               for channel, recipient, ids, payloads in groups}
+                    for future in as_completed(futures):
+                        sent, failed = record_outcomes(connection, [(futures[future], future.result())])
+                        totals['sent'] += sent
+                        totals['failed'] += failed
+        finally:
+            close_smtp_sessions()
+            connection.close()
+    if totals['sent'] or totals['failed']:
+        logging.info(f"📤 Bandeja de salida: {totals['sent']} enviadas, {totals['failed']} con error")
+    return totals
+
+
+def start_background_drain() -> threading.Thread:
+    """Drena la bandeja en segundo plano; main() la espera con wait_for_notifications()"""
+    from notifications import PENDING_DISPATCHES
+
+    def run() -> None:
+        try:
+            drain_outbox()
+        except Exception as e:
+            logging.error(f"Error al drenar la bandeja de salida: {e}")
+
+    thread = threading.Thread(target=run, name="outbox", daemon=True)
+    thread.start()
+    PENDING_DISPATCHES[:] = [t for t in PENDING_DISPATCHES if t.is_alive()] + [thread]
+    return thread
+
+
+def drain_pending_in_background() -> Optional[threading.Thread]:
+    """
+    Reintenta lo que quedó pendiente de ejecuciones anteriores (al arrancar y
+    en cada iteración del daemon). No hace nada si la bandeja no existe o si
+    ya hay un drenaje en curso.
+    """
+    if not (ScraperConfig.NOTIFICATIONS_ENABLED and ScraperConfig.OUTBOX_ENABLED):
+        return None
+    if not os.path.exists(ScraperConfig.OUTBOX_FILE) or drain_lock.locked():
+        return None
+    return start_background_drain()
+
+
+def get_stats(path: Optional[str] = None) -> Dict[str, int]:
+    """Cantidad de mensajes por estado"""
+    connection = connect(path)
+    try:
+        return dict(connection.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+    finally:
+        connection.close()
+
+
+def main():
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Bandeja de salida de notificaciones del BCV")
+    parser.add_argument('--drain', action='store_true', help="Enviar las notificaciones pendientes")
+    parser.add_argument('--stats', action='store_true', help="Mostrar el estado de la cola")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=ScraperConfig.LOG_FORMAT)
+    if args.drain:
+        drain_outbox()
+    if args.stats or not args.drain:
+        for status, count in sorted(get_stats().items()):
+            print(f"{status}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Caché en disco de respuestas del BCV
+Guarda por URL el ETag/Last-Modified, el hash del cuerpo y las últimas tasas
+extraídas, para hacer GET condicional y evitar re-parsear páginas idénticas.
+En memoria, un LRU por hash del cuerpo recuerda las tasas y la estrategia de
+cada página parseada, compartido entre espejos y consultas del daemon.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, NamedTuple, Optional
+from config import ScraperConfig
+from storage import write_atomically
+
+
+class ParsedPage(NamedTuple):
+    """Tasas extraídas de un cuerpo HTML y la estrategia que encontró el dólar"""
+    rates: Dict[str, float]
+    strategy: Optional[str]  # None si la página no trae precio del dólar
+
+
+parsed_pages: "OrderedDict[str, ParsedPage]" = OrderedDict()
+parsed_lock = threading.Lock()  # Los espejos escalonados se validan en hilos
+
+
+def hash_content(content: bytes) -> str:
+    """Hash SHA-256 del cuerpo de la respuesta"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def load_cache(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Carga la caché de respuestas (vacía si no existe o está corrupta)"""
+    path = path or ScraperConfig.PAGE_CACHE_FILE
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logging.warning(f"Caché de páginas inválida, se ignora: {e}")
+        return {}
+
+
+def save_cache(cache: Dict[str, Dict[str, Any]], path: Optional[str] = None) -> None:
+    """Guarda la caché de respuestas"""
+    path = path or ScraperConfig.PAGE_CACHE_FILE
+    try:
+        write_atomically(path, json.dumps(cache, ensure_ascii=False, indent=2))
+    except OSError as e:
+        logging.warning(f"No se pudo guardar la caché de páginas: {e}")
+
+
+def get_entry_rates(entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+    """Tasas guardadas en una entrada (las entradas antiguas solo tienen 'price' en USD)"""
+    if not entry:
+        return None
+    if entry.get('rates'):
+        return entry['rates']
+    if entry.get('price') is not None:
+        return {'USD': entry['price']}
+    return None
+
+
+def get_conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Headers If-None-Match / If-Modified-Since para una entrada de la caché"""
+    if not get_entry_rates(entry):
+        return {}
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def get_cached_rates(entry: Optional[Dict[str, Any]], status_code: int,
+                     digest: str) -> Optional[Dict[str, float]]:
+    """
+    Devuelve las tasas guardadas si la respuesta no cambió.
+
+    La página se considera igual si el servidor respondió 304 o si el cuerpo
+    tiene el mismo hash (`digest`) que la última vez.
+    """
+    rates = get_entry_rates(entry)
+    if not rates:
+        return None
+    if status_code == 304 or entry.get('sha256') == digest:
+        return rates
+    return None
+
+
+def find_entry_by_hash(cache: Dict[str, Dict[str, Any]], digest: str) -> Optional[Dict[str, Any]]:
+    """Entrada de cualquier URL con el mismo cuerpo (p. ej. otro espejo del BCV)"""
+    for entry in list(cache.values()):
+        if entry.get('sha256') == digest and get_entry_rates(entry):
+            return entry
+    return None
+
+
+def build_entry(response_headers: Dict[str, str], digest: str, rates: Dict[str, float],
+                strategy: Optional[str] = None) -> Dict[str, Any]:
+    """Crea la entrada de caché para una respuesta parseada con éxito"""
+    return {
+        'etag': response_headers.get('ETag'),
+        'last_modified': response_headers.get('Last-Modified'),
+        'sha256': digest,
+        'rates': rates,
+        'strategy': strategy,
+    }
+
+
+def get_parsed(digest: str) -> Optional[ParsedPage]:
+    """Página ya parseada en este proceso con ese hash de cuerpo (None si no está)"""
+    if ScraperConfig.PARSE_MEMO_SIZE <= 0:
+        return None
+    with parsed_lock:
+        page = parsed_pages.get(digest)
+        if page is not None:
+            parsed_pages.move_to_end(digest)
+        return page
+
+
+def remember_parsed(digest: str, page: ParsedPage) -> None:
+    """Agrega una página parseada al LRU (PARSE_MEMO_SIZE = 0 lo desactiva)"""
+    if ScraperConfig.PARSE_MEMO_SIZE <= 0:
+        return
+    with parsed_lock:
+        parsed_pages[digest] = page
+        parsed_pages.move_to_end(digest)
+        while len(parsed_pages) > ScraperConfig.PARSE_MEMO_SIZE:
+            parsed_pages.popitem(last=False)
+
+
+def clear_parsed() -> None:
+    """Vacía el LRU de páginas parseadas"""
+    with parsed_lock:
+        parsed_pages.clear()
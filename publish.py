@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Publicación incremental del historial del BCV para el repositorio
+Escribe un archivo JSON pequeño por mes (datos/AAAA/AAAA-MM.json, un registro
+por línea) y datos/latest.json con el registro más reciente. Cada guardado
+toca solo la partición de su mes y latest.json, y un archivo se reescribe
+únicamente si su contenido cambió: el diff diario es de una o dos líneas.
+
+Uso:
+    python publish.py --full            # Regenerar todas las particiones
+    python publish.py --full --dir /tmp/datos
+"""
+
+import argparse
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+from config import ScraperConfig
+from storage import read_records, write_atomically
+
+Record = Dict[str, Any]
+
+
+def get_month_key(record: Record) -> str:
+    """Mes de la fecha_precio de un registro (AAAA-MM)"""
+    return record['fecha_precio'][:7]
+
+
+def get_partition_path(month: str, base: Optional[str] = None) -> str:
+    """Ruta de la partición de un mes"""
+    return os.path.join(base or ScraperConfig.PUBLISH_DIR, month[:4], f"{month}.json")
+
+
+def get_latest_path(base: Optional[str] = None) -> str:
+    """Ruta de latest.json"""
+    return os.path.join(base or ScraperConfig.PUBLISH_DIR, 'latest.json')
+
+
+def render_partition(records: Iterable[Record]) -> str:
+    """Arreglo JSON válido con un registro compacto por línea (diffs de una línea)"""
+    lines = [json.dumps(record, ensure_ascii=False, separators=(',', ':')) for record in records]
+    return '[\n' + ',\n'.join(lines) + '\n]\n' if lines else '[]\n'
+
+
+def render_latest(record: Record) -> str:
+    """Contenido de latest.json"""
+    return json.dumps(record, ensure_ascii=False, indent=2) + '\n'
+
+
+def load_partition(path: str) -> Dict[str, Record]:
+    """Registros publicados de un mes por fecha_precio ({} si no existe o es inválida)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {record['fecha_precio']: record for record in json.load(f)}
+    except FileNotFoundError:
+        return {}
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        logging.warning(f"Partición inválida, se regenerará: {path} ({e})")
+        return {}
+
+
+def load_latest(path: str) -> Optional[Record]:
+    """Registro publicado en latest.json (None si no existe o es inválido)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def write_if_changed(path: str, content: str) -> bool:
+    """Escribe el archivo solo si su contenido cambió; indica si se escribió"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    write_atomically(path, content)
+    return True
+
+
+def group_by_month(records: Iterable[Record]) -> Dict[str, Dict[str, Record]]:
+    """Registros por mes y fecha_precio (si una fecha se repite, gana el último)"""
+    months: Dict[str, Dict[str, Record]] = {}
+    for record in records:
+        if 'fecha_precio' in record:
+            months.setdefault(get_month_key(record), {})[record['fecha_precio']] = record
+    return months
+
+
+def publish_records(records: List[Record], base: Optional[str] = None) -> List[str]:
+    """
+    Incorpora registros nuevos a sus particiones y a latest.json.
+
+    Lee y reescribe solo los meses afectados; devuelve las rutas modificadas.
+    """
+    changed = []
+    newest: Optional[Record] = None
+    for month, by_date in group_by_month(records).items():
+        path = get_partition_path(month, base)
+        published = load_partition(path)
+        published.update(by_date)
+        if write_if_changed(path, render_partition(published[key] for key in sorted(published))):
+            changed.append(path)
+        candidate = by_date[max(by_date)]
+        if newest is None or candidate['fecha_precio'] >= newest['fecha_precio']:
+            newest = candidate
+
+    if newest is not None:
+        latest_path = get_latest_path(base)
+        current = load_latest(latest_path)
+        if current is None or newest['fecha_precio'] >= current.get('fecha_precio', ''):
+            if write_if_changed(latest_path, render_latest(newest)):
+                changed.append(latest_path)
+    return changed
+
+
+def publish_all(base: Optional[str] = None) -> List[str]:
+    """Regenera todas las particiones desde el historial; devuelve las rutas modificadas"""
+    months = group_by_month(read_records())
+    changed = []
+    for month, by_date in sorted(months.items()):
+        path = get_partition_path(month, base)
+        if write_if_changed(path, render_partition(by_date[key] for key in sorted(by_date))):
+            changed.append(path)
+    if months:
+        last_month = months[max(months)]
+        latest_path = get_latest_path(base)
+        if write_if_changed(latest_path, render_latest(last_month[max(last_month)])):
+            changed.append(latest_path)
+    return changed
+
+
+def main():
+    """Punto de entrada para regenerar la publicación"""
+    parser = argparse.ArgumentParser(description="Publicación particionada del historial del BCV")
+    parser.add_argument('--full', action='store_true', help="Regenerar todas las particiones desde el historial")
+    parser.add_argument('--dir', help=f"Directorio de salida (por defecto {ScraperConfig.PUBLISH_DIR})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=ScraperConfig.LOG_FORMAT)
+    if not args.full:
+        parser.print_help()
+        return
+    changed = publish_all(args.dir)
+    print(f"✅ {len(changed)} archivos actualizados en {args.dir or ScraperConfig.PUBLISH_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+API HTTP local de tasas del BCV
+Carga el historial una vez, lo mantiene en memoria y lo recarga de forma
+incremental cuando el scraper agrega registros. Los servicios internos
+consultan aquí en lugar de leer y parsear el archivo completo.
+
+Endpoints:
+    GET /latest?currency=USD
+    GET /rate?date=YYYY-MM-DD&currency=USD
+    GET /range?start=YYYY-MM-DD&end=YYYY-MM-DD&currency=USD
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+from config import ScraperConfig
+from storage import ensure_history_file, get_history_path
+from history import (RateIndex, load_index, update_index, get_rate, get_rate_as_of,
+                     get_rates_in_range, get_latest_rate)
+
+
+class RateStore:
+    """Índices por moneda en memoria, recargados cuando cambia el historial"""
+
+    def __init__(self, history_path: Optional[str] = None):
+        if history_path is None:
+            ensure_history_file()
+        self.history_path = history_path or get_history_path()
+        self.indexes: Dict[str, RateIndex] = {}
+        self.lock = threading.Lock()
+        self.file_signature: Optional[Tuple[float, ...]] = None
+        self.last_check = 0.0
+
+    def get_signature(self) -> Optional[Tuple[float, ...]]:
+        """Inodo, tamaño y fecha de modificación del historial (y de su WAL, en SQLite)"""
+        signature = ()
+        for path in (self.history_path, f"{self.history_path}-wal"):
+            try:
+                stat = os.stat(path)
+                signature += (stat.st_ino, stat.st_size, stat.st_mtime)
+            except OSError:
+                pass
+        return signature or None
+
+    def refresh(self) -> None:
+        """
+        Recarga los índices si el historial cambió (como máximo una vez por
+        intervalo). Normalmente solo se leen las líneas agregadas; si el
+        historial se reescribió (backfill), update_index lo detecta por el
+        inodo y reconstruye el índice completo.
+        """
+        now = time.monotonic()
+        if now - self.last_check < ScraperConfig.API_RELOAD_INTERVAL:
+            return
+        with self.lock:
+            self.last_check = now
+            signature = self.get_signature()
+            if signature == self.file_signature:
+                return
+            self.indexes = {currency: update_index(index, self.history_path, currency)
+                            for currency, index in self.indexes.items()}
+            self.file_signature = signature
+
+    def get_index(self, currency: str) -> RateIndex:
+        """Índice de una moneda (se carga la primera vez que se pide)"""
+        self.refresh()
+        index = self.indexes.get(currency)
+        if index is None:
+            with self.lock:
+                index = self.indexes.get(currency)
+                if index is None:
+                    index = load_index(self.history_path, currency=currency)
+                    self.indexes[currency] = index
+        return index
+
+
+def parse_date_param(value: str) -> Optional[str]:
+    """Clave YYYY-MM-DD de un parámetro de fecha (None si no es una fecha ISO válida)"""
+    try:
+        return date.fromisoformat(value.strip()).isoformat()
+    except ValueError:
+        return None
+
+
+def handle_query(store: RateStore, path: str, params: Dict[str, str]) -> Tuple[int, Dict[str, Any], int]:
+    """Resuelve una consulta: devuelve (estado HTTP, cuerpo, max-age en segundos)"""
+    currency = params.get('currency', 'USD').upper()
+    if currency not in ScraperConfig.CURRENCY_DIV_IDS:
+        return 400, {'error': f'Moneda no soportada: {currency}'}, 0
+    index = store.get_index(currency)
+
+    if path == '/latest':
+        latest = get_latest_rate(index)
+        if latest is None:
+            return 404, {'error': 'Historial vacío'}, 0
+        return 200, {'currency': currency, 'fecha_precio': latest[0], 'rate': latest[1]}, ScraperConfig.API_LATEST_MAX_AGE
+
+    if path == '/rate':
+        if 'date' not in params:
+            return 400, {'error': "Falta el parámetro 'date'"}, 0
+        date_key = parse_date_param(params['date'])
+        if date_key is None:
+            return 400, {'error': f"Fecha inválida (se espera YYYY-MM-DD): {params['date']}"}, 0
+        exact = get_rate(index, date_key)
+        if exact is not None:
+            return 200, {'currency': currency, 'fecha_precio': date_key, 'rate': exact}, ScraperConfig.API_HISTORY_MAX_AGE
+        latest = get_latest_rate(index)
+        if latest is not None and date_key > latest[0]:
+            # Aún no publicada: devolver la última tasa como si fuera la de esa fecha sería engañoso
+            return 404, {'error': f'Sin tasa publicada para {date_key}; la última es del {latest[0]}',
+                         'ultima_fecha_precio': latest[0]}, ScraperConfig.API_LATEST_MAX_AGE
+        as_of = get_rate_as_of(index, date_key)
+        if as_of is None:
+            return 404, {'error': 'Sin datos para esa fecha'}, 0
+        return 200, {'currency': currency, 'fecha_precio': as_of[0], 'rate': as_of[1]}, ScraperConfig.API_LATEST_MAX_AGE
+
+    if path == '/range':
+        bounds = {name: parse_date_param(params[name]) for name in ('start', 'end') if name in params}
+        invalid = [name for name, value in bounds.items() if value is None]
+        if invalid:
+            return 400, {'error': f"Fecha inválida en '{invalid[0]}' (se espera YYYY-MM-DD)"}, 0
+        rates = get_rates_in_range(index, bounds.get('start', ''), bounds.get('end', '9999-12-31'))
+        body = {'currency': currency, 'rates': [{'fecha_precio': d, 'rate': r} for d, r in rates]}
+        return 200, body, ScraperConfig.API_LATEST_MAX_AGE
+
+    return 404, {'error': 'Ruta no encontrada'}, 0
+
+
+def make_handler(store: RateStore):
+    """Crea la clase manejadora de peticiones ligada al almacén en memoria"""
+
+    class RateRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive
+        disable_nagle_algorithm = True  # Headers y cuerpo van en escrituras separadas
+
+        def log_message(self, format: str, *args) -> None:
+            logging.debug(format % args)
+
+        def do_GET(self) -> None:
+            parsed = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+            status, body, max_age = handle_query(store, parsed.path, params)
+
+            payload = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            etag = f'"{hashlib.blake2b(payload, digest_size=8).hexdigest()}"'
+            if status == 200 and self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            if status == 200:
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', f'public, max-age={max_age}')
+            else:
+                self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return RateRequestHandler
+
+
+def create_server(host: Optional[str] = None, port: Optional[int] = None,
+                  history_path: Optional[str] = None) -> ThreadingHTTPServer:
+    """Crea el servidor HTTP (puerto 0 = puerto libre aleatorio, útil en pruebas)"""
+    host = host or ScraperConfig.API_HOST
+    port = ScraperConfig.API_PORT if port is None else port
+    server = ThreadingHTTPServer((host, port), make_handler(RateStore(history_path)))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    """Punto de entrada: levanta la API"""
+    parser = argparse.ArgumentParser(description="API HTTP local de tasas del BCV")
+    parser.add_argument('--host', default=ScraperConfig.API_HOST)
+    parser.add_argument('--port', type=int, default=ScraperConfig.API_PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=ScraperConfig.LOG_FORMAT)
+    server = create_server(args.host, args.port)
+    logging.info(f"API de tasas escuchando en http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
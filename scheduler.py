@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Modo residente (daemon) del scraper del BCV
+Un planificador asyncio que mantiene la sesión HTTP, la caché de páginas y el
+índice del historial en memoria, consulta con frecuencia alta durante la
+ventana de publicación y baja fuera de ella, y deja de consultar en cuanto
+el precio del día siguiente queda guardado.
+"""
+
+import asyncio
+import logging
+import signal
+from datetime import datetime, timedelta
+from typing import Dict
+from config import ScraperConfig
+from history import RateIndex, load_index, update_index, get_rate, get_latest_rate, to_date_key
+from metrics import set_gauge, write_textfile, start_metrics_server
+from outbox import drain_pending_in_background
+from storage import ensure_history_file
+
+
+def is_in_fast_window(now: datetime) -> bool:
+    """Indica si estamos en la ventana de publicación (consultas frecuentes)"""
+    start = ScraperConfig.PUBLICATION_HOUR
+    return start <= now.hour < start + ScraperConfig.FAST_POLL_WINDOW_HOURS
+
+
+def compute_poll_interval(now: datetime) -> float:
+    """Segundos hasta la próxima consulta según la hora"""
+    if is_in_fast_window(now):
+        return ScraperConfig.FAST_POLL_INTERVAL
+    return ScraperConfig.SLOW_POLL_INTERVAL
+
+
+def seconds_until_next_publication(now: datetime) -> float:
+    """Segundos hasta la próxima hora de publicación (cuando cambia la fecha_precio)"""
+    publication = now.replace(hour=ScraperConfig.PUBLICATION_HOUR, minute=0, second=0, microsecond=0)
+    if publication <= now:
+        publication += timedelta(days=1)
+    return (publication - now).total_seconds()
+
+
+def should_save(rates: Dict[str, float], index: RateIndex) -> bool:
+    """
+    Decide si guardar las tasas leídas para la fecha_precio pendiente.
+
+    Solo se guarda cuando el precio del dólar cambia respecto al último
+    guardado. Mientras no cambie, la página sigue mostrando la tasa vigente
+    y no la del día pendiente (el BCV a veces publica por la tarde), así que
+    se sigue consultando con la frecuencia baja hasta que cambie o empiece
+    la siguiente fecha_precio.
+    """
+    latest = get_latest_rate(index)
+    return latest is None or rates['USD'] != latest[1]
+
+
+async def wait_or_stop(stop_event: asyncio.Event, seconds: float) -> None:
+    """Espera `seconds` o hasta que se pida detener el daemon"""
+    try:
+        await asyncio.wait_for(stop_event.wait(), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def poll_once(index: RateIndex) -> float:
+    """
+    Una iteración del daemon: consulta si falta el precio pendiente y lo guarda
+    si corresponde. Devuelve los segundos a esperar antes de la siguiente.
+    """
+    from bcv_scraper import save_dollar_price, get_venezuela_time, calculate_price_date
+    from sources import fetch_validated_rates
+
+    now = get_venezuela_time()
+    target_date = to_date_key(calculate_price_date(now))
+    if get_rate(index, target_date) is not None:
+        delay = seconds_until_next_publication(now)
+        logging.info(f"Precio del {target_date} ya guardado; próxima consulta en {delay / 3600:.1f} h")
+        return delay
+
+    rates = await asyncio.to_thread(fetch_validated_rates)
+    if rates and should_save(rates, index):
+        saved = await asyncio.to_thread(save_dollar_price, rates['USD'], rates)
+        if saved:
+            logging.info(f"✅ Nuevo precio detectado para {target_date}: {rates['USD']} Bs")
+            set_gauge('bcv_last_success_timestamp_seconds', now.timestamp())
+            return 0
+    return compute_poll_interval(now)
+
+
+async def run_daemon_loop(stop_event: asyncio.Event) -> None:
+    """Bucle principal del daemon"""
+    ensure_history_file()
+    index = load_index()
+    logging.info("Daemon del BCV iniciado")
+    while not stop_event.is_set():
+        index = update_index(index)
+        try:
+            delay = await poll_once(index)
+        except Exception as e:
+            logging.error(f"Error en la consulta del daemon: {e}")
+            delay = ScraperConfig.SLOW_POLL_INTERVAL
+        await asyncio.to_thread(write_textfile)
+        drain_pending_in_background()
+        if delay:
+            await wait_or_stop(stop_event, delay)
+    logging.info("Daemon del BCV detenido")
+
+
+async def run_daemon_async() -> None:
+    """Arranca el daemon y lo detiene limpiamente con SIGINT/SIGTERM"""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: se usa KeyboardInterrupt
+    server = start_metrics_server() if ScraperConfig.METRICS_PORT else None
+    try:
+        await run_daemon_loop(stop_event)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+def run_daemon() -> None:
+    """Punto de entrada del modo daemon"""
+    try:
+        asyncio.run(run_daemon_async())
+    except KeyboardInterrupt:
+        logging.info("Daemon del BCV detenido")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Instantánea binaria compacta del historial de tasas del BCV
+Un archivo por moneda con un encabezado fijo y un registro de 12 bytes por
+fecha (día desde 1970-01-01 como int32 y tasa como float64, little-endian),
+regenerado después de cada guardado. Los consumidores lo mapean en memoria
+y lo leen sin parsear JSON: con NumPy como vista sin copia, y si no, como
+arreglos de `array`.
+
+    encabezado (32 bytes): b'BCVS', versión u16, tamaño de registro u16,
+                           moneda 4s, cantidad u32, offset del historial i64,
+                           hora de generación f64
+    registros:             día i32, tasa f64
+"""
+
+import argparse
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional
+from config import ScraperConfig
+from history import RateIndex, load_index, to_epoch_day, from_epoch_day
+from storage import write_atomically, uses_sqlite, get_history_path
+
+# El lector usa RateSeries y NumPy (opcional) de analytics.py; el escritor no
+# los necesita, así que el scraper regenera la instantánea sin importar NumPy
+if TYPE_CHECKING:
+    from analytics import RateSeries
+
+MAGIC = b'BCVS'
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct('<4sHH4sIqd')
+RECORD = struct.Struct('<id')
+RECORD_FORMAT = [('day', '<i4'), ('price', '<f8')]  # dtype de NumPy empaquetado: 12 bytes
+
+
+class Snapshot(NamedTuple):
+    """Instantánea abierta: metadatos y la serie (vista sobre el mapa en memoria con NumPy)"""
+    currency: str
+    count: int
+    offset: int  # Offset del historial (bytes en JSON Lines, seq en SQLite) al generarla
+    updated_at: float
+    series: 'RateSeries'
+
+
+def get_snapshot_path(currency: str = 'USD') -> str:
+    """Ruta de la instantánea de una moneda (junto al índice, mismo esquema de nombres)"""
+    if currency == 'USD':
+        return ScraperConfig.SNAPSHOT_FILE
+    base, extension = os.path.splitext(ScraperConfig.SNAPSHOT_FILE)
+    return f"{base}.{currency}{extension}"
+
+
+def build_snapshot(index: RateIndex, currency: str = 'USD') -> bytes:
+    """Serializa el índice de una moneda en el formato binario"""
+    header = HEADER.pack(MAGIC, SNAPSHOT_VERSION, RECORD.size, currency.encode('ascii'),
+                         len(index.dates), index.offset, time.time())
+    days = [to_epoch_day(date_key) for date_key in index.dates]
+    return header + b''.join(map(RECORD.pack, days, index.prices))
+
+
+def write_snapshot(index: RateIndex, currency: str = 'USD', path: Optional[str] = None) -> bool:
+    """Reemplaza atómicamente la instantánea de una moneda"""
+    path = path or get_snapshot_path(currency)
+    try:
+        write_atomically(path, build_snapshot(index, currency))
+        return True
+    except OSError as e:
+        # En Windows falla si otro proceso mantiene el archivo mapeado: se reintenta en el próximo guardado
+        logging.warning(f"No se pudo escribir la instantánea {path}: {e}")
+        return False
+
+
+def update_snapshots(currencies: Iterable[str]) -> None:
+    """Regenera las instantáneas de las monedas indicadas con el índice en memoria"""
+    from alerts import get_history_index
+
+    if not ScraperConfig.SNAPSHOT_ENABLED:
+        return
+    for currency in currencies:
+        write_snapshot(get_history_index(currency), currency)
+
+
+def read_snapshot(path: Optional[str] = None, currency: str = 'USD') -> Optional[Snapshot]:
+    """
+    Abre una instantánea; None si no existe o no es válida.
+
+    Con NumPy, `series.days` (int32) y `series.prices` (float64) son vistas
+    sobre el archivo mapeado en memoria, sin copiar; sin NumPy se decodifican
+    a arreglos de `array`.
+    """
+    from analytics import RateSeries, np
+
+    path = path or get_snapshot_path(currency)
+    try:
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None  # Inexistente o vacío (mmap no admite archivos de 0 bytes)
+
+    if len(data) < HEADER.size:
+        return None
+    magic, version, record_size, code, count, offset, updated_at = HEADER.unpack_from(data)
+    if (magic != MAGIC or version != SNAPSHOT_VERSION or record_size != RECORD.size
+            or len(data) < HEADER.size + count * RECORD.size):
+        logging.warning(f"Instantánea inválida: {path}")
+        return None
+
+    if np is not None:
+        records = np.frombuffer(data, dtype=np.dtype(RECORD_FORMAT), count=count, offset=HEADER.size)
+        series = RateSeries(records['day'], records['price'])
+    else:
+        view = memoryview(data)[HEADER.size:HEADER.size + count * RECORD.size]
+        days, prices = array('i'), array('d')
+        for day, price in RECORD.iter_unpack(view):
+            days.append(day)
+            prices.append(price)
+        view.release()
+        series = RateSeries(days, prices)
+    return Snapshot(code.rstrip(b'\0').decode('ascii'), count, offset, updated_at, series)
+
+
+def is_current(snapshot: Snapshot, history_path: Optional[str] = None) -> bool:
+    """Indica si la instantánea incluye todo lo guardado en el historial"""
+    history_path = history_path or get_history_path()
+    if uses_sqlite():
+        from sqlite_storage import read_new_rates
+        entries, _ = read_new_rates(snapshot.offset, snapshot.currency, history_path)
+        return not entries
+    return os.path.exists(history_path) and os.path.getsize(history_path) == snapshot.offset
+
+
+def main():
+    """Regenera o describe las instantáneas desde la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Instantánea binaria del historial del BCV")
+    parser.add_argument('--build', action='store_true', help="Regenerar la instantánea desde el historial")
+    parser.add_argument('--currency', default='USD', choices=list(ScraperConfig.CURRENCY_DIV_IDS),
+                        help="Moneda (por defecto USD)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=ScraperConfig.LOG_FORMAT)
+    if args.build and not write_snapshot(load_index(currency=args.currency), args.currency):
+        exit(1)
+
+    snapshot = read_snapshot(currency=args.currency)
+    if snapshot is None:
+        print("Instantánea inexistente o inválida (usar --build)")
+        exit(1)
+    state = "al día" if is_current(snapshot) else "desactualizada"
+    print(f"{get_snapshot_path(args.currency)}: {snapshot.count} tasas de {snapshot.currency}, {state}")
+    if snapshot.count:
+        first, last = from_epoch_day(snapshot.series.days[0]), from_epoch_day(snapshot.series.days[-1])
+        print(f"{first} → {last}, última tasa {snapshot.series.prices[-1]:,.4f} Bs")
+
+
+if __name__ == "__main__":
+    main()
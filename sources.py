@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Fuentes de tasas del scraper del BCV y validación por consenso
+Cada fuente (la página de inicio del BCV con sus espejos, otras páginas con
+el mismo formato o réplicas locales que sirven JSON) se consulta en paralelo.
+Las tasas se cruzan entre sí y contra la última tasa guardada antes de
+guardar nada: gana el grupo de fuentes que coincide dentro de la tolerancia,
+y una fuente sin confirmación solo se acepta si su variación es plausible.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import date
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from config import ScraperConfig
+from metrics import increment, emit_event
+
+Rates = Dict[str, float]
+
+
+class RateSource(NamedTuple):
+    """Una fuente de tasas: `fetch()` devuelve {código: tasa} o None"""
+    name: str
+    fetch: Callable[[], Optional[Rates]]
+
+
+class SourceResult(NamedTuple):
+    """Resultado de consultar una fuente"""
+    name: str
+    rates: Optional[Rates]
+    elapsed: float
+    error: Optional[str]
+
+
+class ConsensusResult(NamedTuple):
+    """Tasas aceptadas (None si ninguna pasó la validación) y su respaldo"""
+    rates: Optional[Rates]
+    agreeing: List[str]  # Fuentes que coinciden con la tasa aceptada
+    results: List[SourceResult]  # Una entrada por fuente que respondió a tiempo
+    reason: str
+
+
+def parse_json_rates(content: bytes) -> Rates:
+    """
+    Tasas de una respuesta JSON: {"USD": 36.5, ...}, {"rates": {...}} o la
+    respuesta de /latest de rate_api.py ({"currency": "USD", "rate": 36.5}).
+    """
+    try:
+        data = json.loads(content)
+    except (ValueError, UnicodeDecodeError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    if 'currency' in data and 'rate' in data:
+        data = {str(data['currency']).upper(): data['rate']}
+    elif isinstance(data.get('rates'), dict):
+        data = data['rates']
+
+    rates = {}
+    for code in ScraperConfig.CURRENCY_DIV_IDS:
+        value = data.get(code)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+            rates[code] = float(value)
+    return rates
+
+
+def parse_bcv_rates(content: bytes) -> Rates:
+    """Tasas de una página con el formato de la página de inicio del BCV"""
+    from bcv_scraper import find_rates_in_content
+    return find_rates_in_content(content)
+
+
+# Formatos de respuesta soportados por las fuentes configuradas en RATE_SOURCES
+PARSERS: Dict[str, Callable[[bytes], Rates]] = {
+    'bcv': parse_bcv_rates,
+    'json': parse_json_rates,
+}
+
+
+def url_source(name: str, url: str, parser: str = 'bcv') -> RateSource:
+    """Fuente que descarga una URL con la sesión compartida y la interpreta con `parser`"""
+    parse = PARSERS[parser]
+
+    def fetch() -> Optional[Rates]:
+        from http_client import fetch_url
+
+        response = fetch_url(url)
+        if response is None:
+            return None
+        rates = parse(response.content)
+        return rates if 'USD' in rates else None
+
+    return RateSource(name, fetch)
+
+
+def bcv_home_source() -> RateSource:
+    """La página de inicio del BCV: espejos escalonados y caché condicional (fetch_rates)"""
+    from bcv_scraper import fetch_rates
+    return RateSource('bcv', fetch_rates)
+
+
+def get_sources() -> List[RateSource]:
+    """Fuentes configuradas, con la página de inicio del BCV primero"""
+    sources = [bcv_home_source()]
+    for source in ScraperConfig.RATE_SOURCES:
+        sources.append(url_source(source['name'], source['url'], source.get('parser', 'bcv')))
+    return sources
+
+
+def rates_agree(first: float, second: float, tolerance_pct: Optional[float] = None) -> bool:
+    """Indica si dos tasas coinciden dentro de la tolerancia porcentual"""
+    tolerance_pct = ScraperConfig.CONSENSUS_TOLERANCE_PCT if tolerance_pct is None else tolerance_pct
+    low, high = sorted((first, second))
+    return low > 0 and (high / low - 1.0) * 100.0 <= tolerance_pct
+
+
+def get_plausible_change_pct(last_date: Optional[str], today: Optional[date] = None) -> float:
+    """
+    Variación máxima sin confirmación: PLAUSIBLE_CHANGE_PCT por cada día desde
+    la última fecha_precio guardada, compuesta. Tras varios días sin guardar
+    (una caída del BCV o del scraper) el límite crece con el atraso y una tasa
+    real ya no queda rechazada para siempre.
+    """
+    pct = ScraperConfig.PLAUSIBLE_CHANGE_PCT
+    if pct <= 0 or not last_date:
+        return pct
+    days = max(((today or date.today()) - date.fromisoformat(last_date[:10])).days, 1)
+    return ((1.0 + pct / 100.0) ** days - 1.0) * 100.0
+
+
+def is_plausible(price: float, last_price: Optional[float], max_change_pct: Optional[float] = None) -> bool:
+    """Una tasa sin confirmar es plausible si no se aleja demasiado de la última guardada"""
+    max_change_pct = ScraperConfig.PLAUSIBLE_CHANGE_PCT if max_change_pct is None else max_change_pct
+    if price <= 0:
+        return False
+    if last_price is None or max_change_pct <= 0:
+        return True
+    return rates_agree(price, last_price, max_change_pct)
+
+
+def find_groups(results: List[SourceResult]) -> List[List[SourceResult]]:
+    """
+    Grupos de fuentes cuyo USD coincide con el de cada fuente válida, del más
+    grande al más chico; en empate, primero el de la fuente de mayor prioridad.
+    """
+    valid = [result for result in results if result.rates]
+    groups = [[result for result in valid if rates_agree(anchor.rates['USD'], result.rates['USD'])]
+              for anchor in valid]
+    return sorted(groups, key=len, reverse=True)  # sorted es estable: conserva la prioridad
+
+
+def decide(results: List[SourceResult], required: int, last_price: Optional[float],
+           max_change_pct: Optional[float] = None) -> Optional[ConsensusResult]:
+    """
+    Tasas aceptadas con los resultados disponibles (None si ninguna es aceptable).
+
+    Un grupo de `required` fuentes coincidentes (al menos dos) se acepta
+    aunque la variación sea grande, como una devaluación brusca confirmada;
+    si no, se acepta el primer grupo cuya tasa sea plausible frente a la
+    última guardada (`max_change_pct`, por defecto PLAUSIBLE_CHANGE_PCT).
+    """
+    groups = find_groups(results)
+    for group in groups:
+        # Cada grupo conserva el orden de prioridad: su primera fuente da las tasas
+        names = [result.name for result in group]
+        if len(group) >= max(required, 2):
+            return ConsensusResult(group[0].rates, names, results, f"{len(group)} fuentes coinciden")
+        if is_plausible(group[0].rates['USD'], last_price, max_change_pct):
+            reason = "sin confirmación, variación plausible"
+            if len(groups) > 1:
+                reason = "fuentes en desacuerdo; se usa la primera con variación plausible"
+            return ConsensusResult(group[0].rates, names, results, reason)
+    return None
+
+
+def get_last_rate() -> Optional[Tuple[str, float]]:
+    """Última (fecha_precio, tasa del dólar) guardada (None si el historial está vacío)"""
+    from alerts import get_history_index
+    from history import get_latest_rate
+
+    return get_latest_rate(get_history_index('USD'))
+
+
+def fetch_consensus(sources: Optional[List[RateSource]] = None,
+                    grace: Optional[float] = None,
+                    timeout: Optional[float] = None,
+                    last_price: Optional[float] = None,
+                    last_date: Optional[str] = None) -> ConsensusResult:
+    """
+    Consulta todas las fuentes en paralelo y valida sus tasas entre sí.
+
+    Termina en cuanto CONSENSUS_MIN_AGREEING fuentes coinciden (con una sola
+    fuente configurada, apenas esta responde). Si tras la primera tasa válida
+    pasan `grace` segundos sin confirmación, se decide con lo disponible.
+    Sin `last_price` se compara con la última tasa guardada y su fecha.
+    """
+    sources = get_sources() if sources is None else sources
+    grace = ScraperConfig.CONSENSUS_GRACE if grace is None else grace
+    if timeout is None:  # La página del BCV puede tardar lo que fetch_rates con sus espejos
+        timeout = ScraperConfig.REQUEST_TIMEOUT + ScraperConfig.HEDGE_STAGGER * len(ScraperConfig.BCV_URLS)
+    if last_price is None:
+        last_date, last_price = get_last_rate() or (None, None)
+    max_change_pct = get_plausible_change_pct(last_date)
+    required = max(min(ScraperConfig.CONSENSUS_MIN_AGREEING, len(sources)), 1)
+    arrivals: "queue.Queue[Tuple[int, SourceResult]]" = queue.Queue()
+
+    def run(position: int, source: RateSource) -> None:
+        started = time.monotonic()
+        rates, error = None, None
+        try:
+            rates = source.fetch()
+            if not rates or 'USD' not in rates:
+                rates, error = None, 'sin precio del dólar'
+        except Exception as e:
+            error = str(e)
+        arrivals.put((position, SourceResult(source.name, rates, round(time.monotonic() - started, 3), error)))
+
+    for position, source in enumerate(sources):
+        threading.Thread(target=run, args=(position, source), name=f"fuente-{source.name}", daemon=True).start()
+
+    arrived: List[Tuple[int, SourceResult]] = []
+    deadline = time.monotonic() + timeout
+    while len(arrived) < len(sources):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            arrived.append(arrivals.get(timeout=remaining))
+        except queue.Empty:
+            break
+        groups = find_groups([result for _, result in arrived])
+        if groups:
+            if len(groups[0]) >= required:
+                break
+            deadline = min(deadline, time.monotonic() + grace)
+
+    results = [result for _, result in sorted(arrived, key=lambda item: item[0])]
+    outcome = decide(results, required, last_price, max_change_pct)
+    if outcome is None:
+        outcome = ConsensusResult(None, [], results, "sin consenso ni tasa plausible")
+    log_consensus(outcome, last_price, max_change_pct)
+    return outcome
+
+
+def log_consensus(outcome: ConsensusResult, last_price: Optional[float],
+                  max_change_pct: Optional[float] = None) -> None:
+    """Registra el resultado de cada fuente y la decisión"""
+    for result in outcome.results:
+        usd = result.rates['USD'] if result.rates else None
+        status = f"{usd} Bs" if usd is not None else f"❌ {result.error}"
+        logging.info(f"Fuente {result.name}: {result.elapsed:.3f}s {status}")
+        increment('bcv_source_results_total', source=result.name, outcome='ok' if usd else 'error')
+    if outcome.rates is None:
+        limit = ScraperConfig.PLAUSIBLE_CHANGE_PCT if max_change_pct is None else max_change_pct
+        logging.error(f"Tasas rechazadas ({outcome.reason}); última guardada: {last_price}. "
+                      f"Una variación mayor a {limit:.1f}% requiere que coincidan dos fuentes "
+                      f"(o `scrape --accept-unconfirmed` / BCV_PLAUSIBLE_CHANGE_PCT=0)")
+    else:
+        logging.info(f"Tasa aceptada: {outcome.rates['USD']} Bs ({outcome.reason}: {', '.join(outcome.agreeing)})")
+    emit_event('consensus', accepted=outcome.rates['USD'] if outcome.rates else None,
+               agreeing=outcome.agreeing, reason=outcome.reason, last_price=last_price,
+               sources={result.name: result.rates['USD'] if result.rates else result.error
+                        for result in outcome.results})
+
+
+def fetch_validated_rates() -> Optional[Rates]:
+    """Tasas validadas por consenso (None si ninguna fuente dio una tasa aceptable)"""
+    return fetch_consensus().rates
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Historial de precios del BCV en SQLite
+Alternativa al JSON Lines para varias ejecuciones concurrentes: modo WAL
+(los lectores no bloquean al escritor), índice único por (moneda,
+fecha_precio) y escrituras con upsert.
+
+Se activa con STORAGE_BACKEND = 'sqlite' en config.py.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from config import ScraperConfig
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    fecha_precio TEXT PRIMARY KEY,
+    fecha_extraccion TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rates (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    currency TEXT NOT NULL,
+    fecha_precio TEXT NOT NULL,
+    rate REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rates_currency_fecha ON rates (currency, fecha_precio);
+CREATE INDEX IF NOT EXISTS idx_rates_currency_seq ON rates (currency, seq);
+"""
+
+UPSERT_RECORD = (
+    "INSERT INTO records (fecha_precio, fecha_extraccion, data) VALUES (?, ?, ?) "
+    "ON CONFLICT (fecha_precio) DO UPDATE SET "
+    "fecha_extraccion = excluded.fecha_extraccion, data = excluded.data"
+)
+# REPLACE asigna un seq nuevo: los lectores incrementales ven también las correcciones
+UPSERT_RATE = "INSERT OR REPLACE INTO rates (currency, fecha_precio, rate) VALUES (?, ?, ?)"
+
+# Una conexión por hilo y archivo: sqlite3 reutiliza las sentencias preparadas de cada conexión
+connections = threading.local()
+
+
+def get_connection(path: Optional[str] = None) -> sqlite3.Connection:
+    """Conexión del hilo actual (la crea y prepara el esquema la primera vez)"""
+    path = path or ScraperConfig.SQLITE_FILE
+    cache = connections.__dict__.setdefault('by_path', {})
+    connection = cache.get(path)
+    if connection is None:
+        connection = sqlite3.connect(path, timeout=ScraperConfig.SQLITE_BUSY_TIMEOUT)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=FULL')  # Misma durabilidad que el fsync del JSON Lines
+        connection.executescript(SCHEMA)
+        cache[path] = connection
+    return connection
+
+
+def close_connections() -> None:
+    """Cierra las conexiones del hilo actual"""
+    for connection in connections.__dict__.pop('by_path', {}).values():
+        connection.close()
+
+
+def to_rows(record: Dict[str, Any]) -> Tuple[Tuple[str, str, str], List[Tuple[str, str, float]]]:
+    """Fila de `records` y filas de `rates` de un registro del historial"""
+    date_key = str(record['fecha_precio'])[:10]
+    rates = {'USD': record.get('precio_dolar'), **(record.get('tasas') or {})}
+    record_row = (date_key, record.get('fecha_extraccion'),
+                  json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+    rate_rows = [(currency, date_key, float(rate)) for currency, rate in rates.items() if rate is not None]
+    return record_row, rate_rows
+
+
+def upsert_records(records: Iterable[Dict[str, Any]], path: Optional[str] = None) -> bool:
+    """
+    Guarda registros en una sola transacción; una fecha_precio repetida
+    reemplaza al registro anterior en lugar de duplicarlo.
+    """
+    record_rows, rate_rows = [], []
+    for record in records:
+        record_row, rows = to_rows(record)
+        record_rows.append(record_row)
+        rate_rows.extend(rows)
+    if not record_rows:
+        return True
+
+    try:
+        connection = get_connection(path)
+        with connection:
+            connection.executemany(UPSERT_RECORD, record_rows)
+            connection.executemany(UPSERT_RATE, rate_rows)
+        return True
+    except sqlite3.Error as e:
+        logging.error(f"Error al guardar en SQLite: {e}")
+        return False
+
+
+def has_records(path: Optional[str] = None) -> bool:
+    """Indica si la base ya tiene algún registro (una base recién creada está vacía)"""
+    try:
+        return get_connection(path).execute("SELECT 1 FROM records LIMIT 1").fetchone() is not None
+    except sqlite3.Error as e:
+        logging.warning(f"Error al consultar el historial SQLite: {e}")
+        return True  # Ante la duda no se migra: la copia es idempotente y puede repetirse con --to-sqlite
+
+
+def load_all_records(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Todos los registros, ordenados por fecha_precio"""
+    try:
+        rows = get_connection(path).execute("SELECT data FROM records ORDER BY fecha_precio").fetchall()
+        return [json.loads(data) for (data,) in rows]
+    except sqlite3.Error as e:
+        logging.warning(f"Error al cargar el historial SQLite: {e}")
+        return []
+
+
+def read_new_rates(offset: int, currency: str = 'USD',
+                   path: Optional[str] = None) -> Tuple[List[Tuple[str, float]], int]:
+    """Pares (fecha, tasa) de una moneda escritos después del seq `offset`"""
+    rows = get_connection(path).execute(
+        "SELECT seq, fecha_precio, rate FROM rates WHERE currency = ? AND seq > ? ORDER BY seq",
+        (currency, offset)).fetchall()
+    if not rows:
+        return [], offset
+    return [(date_key, rate) for _, date_key, rate in rows], rows[-1][0]
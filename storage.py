@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Almacenamiento del historial de precios del BCV
+Formato JSON Lines (un registro por línea) de solo escritura al final:
+cada ejecución agrega su registro sin releer ni reescribir el historial.
+Con STORAGE_BACKEND = 'sqlite' el historial vive en SQLite (sqlite_storage.py).
+"""
+
+import argparse
+import json
+import logging
+import os
+from typing import List, Dict, Any, Iterable, Optional, Union
+from config import ScraperConfig
+
+
+def serialize_record(record: Dict[str, Any]) -> str:
+    """Convierte un registro a una línea JSON compacta"""
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def parse_record_line(line: str) -> Optional[Dict[str, Any]]:
+    """Convierte una línea JSON en registro; devuelve None si está corrupta"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        logging.warning(f"Línea corrupta ignorada en el historial: {line[:80]}")
+        return None
+
+
+def ends_with_newline(path: str) -> bool:
+    """Verifica si el archivo termina en salto de línea (sin leerlo completo)"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return True
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def fsync_directory(path: str) -> None:
+    """Sincroniza el directorio para que un rename sea durable (no aplica en Windows)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def append_records(records: Iterable[Dict[str, Any]], path: Optional[str] = None) -> bool:
+    """
+    Agrega registros al final del historial con una sola escritura y fsync.
+
+    El costo es proporcional a los registros nuevos, no al tamaño del historial.
+    Si una ejecución anterior dejó una línea truncada, se cierra antes de escribir.
+    """
+    path = path or ScraperConfig.HISTORY_FILE
+    payload = ''.join(serialize_record(record) for record in records)
+    if not payload:
+        return True
+
+    if not ends_with_newline(path):
+        payload = '\n' + payload
+
+    data = payload.encode('utf-8')
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        return True
+    except OSError as e:
+        logging.error(f"Error al agregar registros al historial: {e}")
+        return False
+
+
+def load_records(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Carga todos los registros del historial JSON Lines"""
+    path = path or ScraperConfig.HISTORY_FILE
+    if not os.path.exists(path):
+        return []
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [record for record in map(parse_record_line, f) if record is not None]
+    except IOError as e:
+        logging.warning(f"Error al cargar el historial: {e}")
+        return []
+
+
+def uses_sqlite() -> bool:
+    """Indica si el historial está configurado en SQLite"""
+    return ScraperConfig.STORAGE_BACKEND == 'sqlite'
+
+
+def get_history_path() -> str:
+    """Ruta del historial según el backend configurado"""
+    return ScraperConfig.SQLITE_FILE if uses_sqlite() else ScraperConfig.HISTORY_FILE
+
+
+def store_records(records: Iterable[Dict[str, Any]]) -> bool:
+    """Guarda registros en el backend configurado"""
+    if uses_sqlite():
+        from sqlite_storage import upsert_records
+        return upsert_records(records)
+    return append_records(records)
+
+
+def rewrite_records(records: Iterable[Dict[str, Any]], path: Optional[str] = None) -> bool:
+    """
+    Reescribe el historial completo ordenado por fecha_precio.
+
+    Solo para importar fechas anteriores a la última guardada (backfill.py):
+    las ejecuciones normales agregan al final con store_records. El rename
+    atómico deja el historial en un inodo nuevo, que es la señal con la que
+    los índices en memoria (history.update_index) descartan sus offsets. En
+    SQLite basta con el upsert, que ya consulta en orden.
+    """
+    if uses_sqlite():
+        from sqlite_storage import upsert_records
+        return upsert_records(records)
+    path = path or ScraperConfig.HISTORY_FILE
+    ordered = sorted(records, key=lambda record: str(record.get('fecha_precio', '')))
+    try:
+        write_atomically(path, ''.join(serialize_record(record) for record in ordered))
+        return True
+    except OSError as e:
+        logging.error(f"Error al reescribir el historial: {e}")
+        return False
+
+
+def read_records() -> List[Dict[str, Any]]:
+    """Todos los registros del backend configurado"""
+    ensure_history_file()
+    if uses_sqlite():
+        from sqlite_storage import load_all_records
+        return load_all_records()
+    return load_records()
+
+
+def write_atomically(path: str, content: Union[str, bytes]) -> None:
+    """Escribe un archivo completo (texto o binario) vía archivo temporal + fsync + rename"""
+    tmp_path = f"{path}.tmp"
+    binary = isinstance(content, bytes)
+    with open(tmp_path, 'wb' if binary else 'w', encoding=None if binary else 'utf-8') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(path)
+
+
+def migrate_legacy_json(json_path: Optional[str] = None,
+                        jsonl_path: Optional[str] = None) -> bool:
+    """
+    Migra una sola vez el arreglo JSON heredado al historial JSON Lines.
+
+    No hace nada si el historial JSON Lines ya existe o si no hay archivo heredado.
+    """
+    json_path = json_path or ScraperConfig.DATA_FILE
+    jsonl_path = jsonl_path or ScraperConfig.HISTORY_FILE
+    if os.path.exists(jsonl_path) or not os.path.exists(json_path):
+        return False
+
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            legacy_data = json.load(f)
+        write_atomically(jsonl_path, ''.join(serialize_record(r) for r in legacy_data))
+        logging.info(f"Historial migrado: {len(legacy_data)} registros de {json_path} a {jsonl_path}")
+        return True
+    except (json.JSONDecodeError, OSError) as e:
+        logging.error(f"Error al migrar el historial heredado: {e}")
+        return False
+
+
+def migrate_jsonl_to_sqlite(jsonl_path: Optional[str] = None,
+                            sqlite_path: Optional[str] = None) -> bool:
+    """
+    Copia el historial JSON Lines a SQLite (idempotente: las fechas repetidas
+    se reemplazan, así que puede repetirse sin duplicar registros).
+    """
+    from sqlite_storage import upsert_records
+
+    records = load_records(jsonl_path or ScraperConfig.HISTORY_FILE)
+    if not upsert_records(records, sqlite_path):
+        return False
+    logging.info(f"Historial migrado: {len(records)} registros a {sqlite_path or ScraperConfig.SQLITE_FILE}")
+    return True
+
+
+def export_legacy_json(jsonl_path: Optional[str] = None,
+                       json_path: Optional[str] = None) -> bool:
+    """
+    Genera bajo demanda el archivo JSON heredado (arreglo con indent=4)
+    desde `jsonl_path` o, si no se indica, desde el backend configurado.
+    """
+    json_path = json_path or ScraperConfig.DATA_FILE
+    try:
+        records = load_records(jsonl_path) if jsonl_path else read_records()
+        write_atomically(json_path, json.dumps(records, indent=4, ensure_ascii=False))
+        logging.info(f"Exportados {len(records)} registros a {json_path}")
+        return True
+    except OSError as e:
+        logging.error(f"Error al exportar el JSON heredado: {e}")
+        return False
+
+
+def ensure_history_file() -> None:
+    """
+    Garantiza que el historial exista: migra el JSON heredado y, mientras la
+    base SQLite no tenga registros, copia el historial JSON Lines a la base.
+
+    Se decide por el contenido y no por la existencia del archivo: cualquier
+    lectura crea la base vacía al conectarse.
+    """
+    migrate_legacy_json()
+    if uses_sqlite() and os.path.exists(ScraperConfig.HISTORY_FILE):
+        from sqlite_storage import has_records
+        if not has_records():
+            migrate_jsonl_to_sqlite()
+
+
+def main():
+    """Punto de entrada para migrar o exportar el historial"""
+    parser = argparse.ArgumentParser(description="Gestión del historial de precios del BCV")
+    parser.add_argument('--migrate', action='store_true',
+                        help=f"Migrar {ScraperConfig.DATA_FILE} a {ScraperConfig.HISTORY_FILE}")
+    parser.add_argument('--export', action='store_true',
+                        help=f"Exportar el historial al formato heredado {ScraperConfig.DATA_FILE}")
+    parser.add_argument('--to-sqlite', action='store_true',
+                        help=f"Copiar {ScraperConfig.HISTORY_FILE} a {ScraperConfig.SQLITE_FILE}")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=ScraperConfig.LOG_FORMAT)
+
+    if args.migrate:
+        migrate_legacy_json()
+    if args.to_sqlite and not migrate_jsonl_to_sqlite():
+        exit(1)
+    if args.export:
+        if not export_legacy_json():
+            exit(1)
+    if not (args.migrate or args.export or args.to_sqlite):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
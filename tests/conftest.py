@@ -0,0 +1,89 @@
+"""
+Configuración común de las pruebas
+Los módulos del scraper están en la raíz del repositorio y todos los archivos
+de ScraperConfig son rutas relativas: cada prueba que escribe corre en un
+directorio temporal propio.
+"""
+
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(REPO_DIR, 'tests', 'fixtures')
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
+
+from config import ScraperConfig  # noqa: E402
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Directorio de trabajo temporal con el historial JSON Lines y sin log de eventos"""
+    import alerts
+    from sqlite_storage import close_connections
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ScraperConfig, 'STORAGE_BACKEND', 'jsonl')
+    monkeypatch.setattr(ScraperConfig, 'EVENTS_LOG_FILE', '')
+    alerts.HISTORY_INDEXES.clear()
+    yield tmp_path
+    alerts.HISTORY_INDEXES.clear()
+    close_connections()
+
+
+@pytest.fixture(scope='session')
+def stub_url():
+    """URL base del servidor local con el corpus de páginas del BCV (benchmarks/stub_server.py)"""
+    from stub_server import start_stub_server
+
+    server = start_stub_server()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def smtp_stub():
+    """Servidor SMTP local (tests/stubs.py)"""
+    from stubs import SmtpStub
+
+    server = SmtpStub()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def telegram_stub():
+    """API de bots de Telegram falsa (tests/stubs.py)"""
+    from stubs import TelegramStub
+
+    server = TelegramStub()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def notification_config(workdir, smtp_stub, telegram_stub, monkeypatch):
+    """Email y Telegram apuntando a los servidores locales, con reintentos sin espera"""
+    settings = {
+        'NOTIFICATIONS_ENABLED': True,
+        'EMAIL_ENABLED': True,
+        'EMAIL_SMTP_SERVER': '127.0.0.1',
+        'EMAIL_SMTP_PORT': smtp_stub.port,
+        'EMAIL_USE_TLS': False,
+        'EMAIL_FROM': 'bcv@example.com',
+        'EMAIL_PASSWORD': 'clave',
+        'EMAIL_TO': 'ana@example.com, luis@example.com',
+        'TELEGRAM_ENABLED': True,
+        'TELEGRAM_API_URL': telegram_stub.url,
+        'TELEGRAM_BOT_TOKEN': '123:abc',
+        'TELEGRAM_CHAT_ID': '101,102',
+        'BACKOFF_BASE': 0.001,
+        'BACKOFF_MAX': 0.001,
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(ScraperConfig, name, value)
+    return ScraperConfig
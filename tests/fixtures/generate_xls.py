@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Genera los libros .xls de prueba con el formato de los que publica el BCV
+(una hoja por día hábil con la fecha valor y una fila por moneda).
+
+Uso (requiere xlwt, solo para regenerarlos):
+    python tests/fixtures/generate_xls.py
+"""
+
+import os
+import xlwt
+
+FIXTURES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (nombre de la hoja, fecha valor, {código: tasa de venta}); las tasas en texto usan coma decimal
+BOOKS = {
+    '2_1_2c25_smc.xls': [
+        ('24102025', '24/10/2025', {'EUR': 242.4681, 'CNY': 29.8763, 'USD': 208.0275}),
+        ('23102025', '23/10/2025', {'EUR': 241.5623, 'CNY': '29,6840', 'USD': '206,6541'}),
+        ('22102025', '22/10/2025', {'EUR': 240.1209, 'USD': 205.2341}),
+    ],
+    '2_1_2d25_smc.xls': [
+        ('Notas', None, {}),
+        ('03112025', '3/11/2025', {'USD': 224.3758, 'RUB': 2.7606}),
+        ('24102025', '24/10/2025', {'USD': 208.0275}),  # Repetida con el libro anterior
+        ('31102025', '31/10/2025', {'EUR': 259.0148}),  # Sin USD: se descarta
+    ],
+}
+
+
+def write_sheet(workbook: xlwt.Workbook, name: str, fecha_valor, rates) -> None:
+    """Una hoja con el encabezado del BCV y la tabla de tipos de cambio"""
+    sheet = workbook.add_sheet(name)
+    sheet.write(0, 1, 'BANCO CENTRAL DE VENEZUELA')
+    sheet.write(1, 1, 'Tipo de Cambio de Referencia')
+    if fecha_valor:
+        sheet.write(3, 1, f'Fecha Valor: {fecha_valor}')
+    else:
+        sheet.write(3, 1, 'Las tasas son referenciales')
+    for column, title in enumerate(['Código', 'País', 'Compra (Bs/ME)', 'Venta (Bs/ME)'], start=1):
+        sheet.write(5, column, title)
+    for row, (code, rate) in enumerate(rates.items(), start=6):
+        sheet.write(row, 1, code)
+        sheet.write(row, 2, 'Moneda')
+        sheet.write(row, 3, 1.0)  # Compra: la tasa buscada es el último número de la fila
+        sheet.write(row, 4, rate)
+
+
+def main():
+    for filename, sheets in BOOKS.items():
+        workbook = xlwt.Workbook()
+        for name, fecha_valor, rates in sheets:
+            write_sheet(workbook, name, fecha_valor, rates)
+        workbook.save(os.path.join(FIXTURES_DIR, filename))
+        print(f"✅ {filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Servidores locales para probar las notificaciones sin red
+SmtpStub implementa lo justo de SMTP (EHLO, AUTH PLAIN, MAIL, RCPT, DATA,
+QUIT) y TelegramStub imita sendMessage de la API de bots. Ambos registran lo
+recibido y pueden fallar a pedido para probar reintentos.
+"""
+
+import json
+import socketserver
+import threading
+import time
+from email import message_from_bytes, policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs
+
+
+class SmtpStub(socketserver.ThreadingTCPServer):
+    """Servidor SMTP en un hilo; `messages` guarda (destinatario, mensaje) de cada DATA aceptado"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SmtpHandler)
+        self.messages: List[tuple] = []
+        self.sessions = 0
+        self.logins = 0
+        self.quits = 0
+        self.fail_data = 0  # Cantidad de DATA a rechazar con 451 antes de aceptar
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, args=(0.05,), name='smtp-stub', daemon=True).start()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    """Una sesión SMTP"""
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+    def handle(self) -> None:
+        server: SmtpStub = self.server
+        with server.lock:
+            server.sessions += 1
+        self.reply('220 stub ESMTP')
+        recipients: List[str] = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250-stub')
+                self.reply('250 AUTH PLAIN')
+            elif verb == 'AUTH':
+                with server.lock:
+                    server.logins += 1
+                self.reply('235 2.7.0 Authentication successful')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[1].strip().strip('<>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = b''
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk == b'.\r\n':
+                        break
+                    data += chunk[1:] if chunk.startswith(b'..') else chunk
+                with server.lock:
+                    rejected = server.fail_data > 0
+                    if rejected:
+                        server.fail_data -= 1
+                    else:
+                        message = message_from_bytes(data, policy=policy.default)
+                        server.messages += [(recipient, message) for recipient in recipients]
+                self.reply('451 4.3.0 Try again later' if rejected else '250 OK')
+            elif verb == 'QUIT':
+                with server.lock:
+                    server.quits += 1
+                self.reply('221 Bye')
+                return
+            else:  # RSET, NOOP
+                self.reply('250 OK')
+
+
+class TelegramStub(ThreadingHTTPServer):
+    """
+    API de bots falsa: registra cada sendMessage aceptado en `sent` como
+    (chat_id, texto, momento). `failures[chat_id]` es la cantidad de
+    respuestas 500 a devolver antes de aceptar (-1 = fallar siempre).
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), TelegramHandler)
+        self.sent: List[tuple] = []
+        self.failures: Dict[str, int] = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, args=(0.05,), name='telegram-stub',
+                         daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def chats(self) -> List[str]:
+        return [chat_id for chat_id, _, _ in self.sent]
+
+
+class TelegramHandler(BaseHTTPRequestHandler):
+    """POST /bot<token>/sendMessage"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        server: TelegramStub = self.server
+        fields = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8'))
+        chat_id, text = fields.get('chat_id', [''])[0], fields.get('text', [''])[0]
+        with server.lock:
+            server.requests += 1
+            pending = server.failures.get(chat_id, 0)
+            if pending:
+                server.failures[chat_id] = pending - 1 if pending > 0 else pending
+            elif self.path.endswith('/sendMessage'):
+                server.sent.append((chat_id, text, time.monotonic()))
+        status = 500 if pending else (200 if self.path.endswith('/sendMessage') else 404)
+        body = json.dumps({'ok': status == 200}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,89 @@
+"""Pruebas de la detección de cambios y las reglas de alerta (alerts.py) sobre un historial temporal"""
+
+import pytest
+
+import alerts
+from alerts import check_new_rate, evaluate_rules, get_history_index, should_notify
+from config import ScraperConfig
+from storage import append_records
+
+
+def record(date_key, price, eur=None):
+    return {'fecha_extraccion': f"{date_key} 16:00:00", 'fecha_precio': f"{date_key} 00:00:00",
+            'precio_dolar': price, 'tasas': {'EUR': eur} if eur else {}}
+
+
+@pytest.fixture
+def history(workdir, monkeypatch):
+    """Historial de una semana con el dólar en 200 Bs y el euro en 230 Bs, e índices vacíos"""
+    for name, value in {'ALERTS_ENABLED': True, 'ALERT_ABS_CHANGE': 0.0, 'ALERT_PCT_CHANGE': 1.0,
+                        'ALERT_ALL_TIME_HIGH': False, 'ALERT_WINDOW_DAYS': 7,
+                        'ALERT_WINDOW_PCT_CHANGE': 0.0}.items():
+        monkeypatch.setattr(ScraperConfig, name, value)
+    append_records([record(f"2025-10-0{day}", 200.0, eur=230.0) for day in range(1, 8)])
+    assert alerts.HISTORY_INDEXES == {}
+    return workdir
+
+
+def test_repeated_rate_is_a_duplicate(history):
+    assert check_new_rate('2025-10-07 00:00:00', 200.0) is None
+
+
+def test_corrected_rate_for_a_saved_date_is_not_a_duplicate(history):
+    assert check_new_rate('2025-10-07 00:00:00', 200.5) == []
+
+
+def test_rate_below_threshold_fires_no_rule(history):
+    result = check_new_rate('2025-10-08 00:00:00', 201.9)  # +0,95 %
+    assert result == []
+    assert not should_notify(result)
+
+
+@pytest.mark.parametrize('price, sign', [(202.0, '+'), (198.0, '-')])
+def test_crossed_threshold_fires_in_both_directions(history, price, sign):
+    result = check_new_rate('2025-10-08 00:00:00', price)  # ±1 %
+    assert result == [f"Variación de {sign}2.00 Bs ({sign}1.00%) respecto al 2025-10-07"]
+    assert should_notify(result)
+
+
+def test_absolute_threshold(history, monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'ALERT_PCT_CHANGE', 0.0)
+    monkeypatch.setattr(ScraperConfig, 'ALERT_ABS_CHANGE', 1.5)
+    assert check_new_rate('2025-10-08 00:00:00', 201.4) == []
+    assert len(check_new_rate('2025-10-08 00:00:00', 201.5)) == 1
+
+
+def test_rules_are_evaluated_per_currency(history):
+    assert check_new_rate('2025-10-08 00:00:00', 233.0, currency='EUR') == [
+        "Variación de +3.00 Bs (+1.30%) respecto al 2025-10-07"]
+    assert check_new_rate('2025-10-08 00:00:00', 201.0) == []  # El USD no cambió lo suficiente
+    assert set(alerts.HISTORY_INDEXES) == {'USD', 'EUR'}
+    assert get_history_index('EUR').prices[-1] == 230.0
+
+
+def test_window_and_all_time_high_rules(history, monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'ALERT_PCT_CHANGE', 0.0)
+    monkeypatch.setattr(ScraperConfig, 'ALERT_WINDOW_PCT_CHANGE', 3.0)
+    monkeypatch.setattr(ScraperConfig, 'ALERT_ALL_TIME_HIGH', True)
+    index = get_history_index()
+
+    assert evaluate_rules(index, '2025-10-08', 206.0) == [
+        "Nuevo máximo histórico (anterior: 200.00 Bs)",
+        "Variación de +3.00% en 7 días (desde el 2025-10-01)"]
+    assert evaluate_rules(index, '2025-10-08', 199.0) == []
+
+
+def test_first_record_of_an_empty_history(workdir):
+    assert check_new_rate('2025-10-01 00:00:00', 200.0) == ["Primer registro del historial"]
+
+
+def test_index_in_memory_sees_records_saved_later(history):
+    get_history_index()
+    append_records([record('2025-10-08', 202.0)])
+    assert check_new_rate('2025-10-08 00:00:00', 202.0) is None
+
+
+def test_disabled_alerts_notify_every_new_record(history, monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'ALERTS_ENABLED', False)
+    result = check_new_rate('2025-10-08 00:00:00', 200.1)
+    assert result == [] and should_notify(result)
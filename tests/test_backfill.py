@@ -0,0 +1,133 @@
+"""Pruebas de la importación de tasas históricas (backfill.py) con libros .xls de muestra"""
+
+import json
+import os
+
+import pytest
+
+from conftest import FIXTURES_DIR
+from backfill import backfill, build_backfill_records, parse_xls_file, parse_xls_sheet, to_float
+from alerts import get_history_index
+from history import load_index
+from publish import get_latest_path, get_partition_path
+from snapshot import read_snapshot
+from storage import append_records, load_records
+
+xlrd = pytest.importorskip('xlrd')
+
+BOOK_C = os.path.join(FIXTURES_DIR, '2_1_2c25_smc.xls')
+BOOK_D = os.path.join(FIXTURES_DIR, '2_1_2d25_smc.xls')
+
+
+def open_sheet(path, name):
+    return xlrd.open_workbook(path).sheet_by_name(name)
+
+
+def seed_history(*dates):
+    """Historial con un registro por fecha (tasa arbitraria)"""
+    rows = [(date_key, {'USD': 300.0 + i}) for i, date_key in enumerate(dates)]
+    append_records(build_backfill_records(rows, set()))
+
+
+@pytest.mark.parametrize('value, expected', [
+    (208.0275, 208.0275),
+    (36, 36.0),
+    ('206,6541', 206.6541),
+    ('1.234,50', 1234.5),
+    (' 42.5 ', 42.5),
+    (0, None),
+    ('-3,5', None),
+    ('Venta (Bs/ME)', None),
+    ('', None),
+])
+def test_to_float(value, expected):
+    assert to_float(value) == expected
+
+
+def test_parse_xls_sheet_reads_fecha_valor_and_sell_rate():
+    price_date, rates = parse_xls_sheet(open_sheet(BOOK_C, '24102025'))
+    assert price_date == '2025-10-24'
+    assert rates == {'EUR': 242.4681, 'CNY': 29.8763, 'USD': 208.0275}
+
+
+def test_parse_xls_sheet_reads_text_rates_with_decimal_comma():
+    price_date, rates = parse_xls_sheet(open_sheet(BOOK_C, '23102025'))
+    assert price_date == '2025-10-23'
+    assert rates['USD'] == 206.6541
+    assert rates['CNY'] == 29.684
+
+
+def test_parse_xls_sheet_pads_single_digit_day():
+    price_date, _ = parse_xls_sheet(open_sheet(BOOK_D, '03112025'))
+    assert price_date == '2025-11-03'
+
+
+@pytest.mark.parametrize('sheet', ['Notas', '31102025'])
+def test_parse_xls_sheet_skips_sheets_without_date_or_usd(sheet):
+    assert parse_xls_sheet(open_sheet(BOOK_D, sheet)) is None
+
+
+def test_parse_xls_file_returns_one_row_per_valid_sheet():
+    assert [date_key for date_key, _ in parse_xls_file(BOOK_C)] == ['2025-10-24', '2025-10-23', '2025-10-22']
+    assert [date_key for date_key, _ in parse_xls_file(BOOK_D)] == ['2025-11-03', '2025-10-24']
+
+
+def test_build_backfill_records_sorts_and_drops_known_and_repeated_dates():
+    rows = parse_xls_file(BOOK_C) + parse_xls_file(BOOK_D)
+    records = build_backfill_records(rows, {'2025-10-22'})
+    assert [record['fecha_precio'][:10] for record in records] == ['2025-10-23', '2025-10-24', '2025-11-03']
+    assert records[0]['precio_dolar'] == 206.6541
+    assert records[0]['tasas']['CNY'] == 29.684
+
+
+def test_backfill_appends_when_every_date_is_newer(workdir):
+    seed_history('2025-10-01')
+    with open('precio_dolar_bcv.jsonl', 'rb') as f:
+        before = f.read()
+
+    assert backfill([BOOK_C], workers=1) == 3
+
+    with open('precio_dolar_bcv.jsonl', 'rb') as f:
+        assert f.read().startswith(before)  # Solo se agregó al final
+    assert load_index().dates == ['2025-10-01', '2025-10-22', '2025-10-23', '2025-10-24']
+
+
+def test_backfill_rewrites_history_sorted_when_importing_older_dates(workdir):
+    seed_history('2025-10-23', '2025-11-05')
+    load_index()  # Deja un índice persistido con los offsets del archivo original
+
+    assert backfill([BOOK_C, BOOK_D], workers=1) == 3
+
+    dates = [record['fecha_precio'][:10] for record in load_records()]
+    assert dates == ['2025-10-22', '2025-10-23', '2025-10-24', '2025-11-03', '2025-11-05']
+    assert load_index().dates == dates
+    assert load_index().prices[1] == 300.0  # La fecha ya guardada no se reemplaza
+
+
+def test_backfill_rewrite_invalidates_indexes_already_in_memory(workdir):
+    seed_history('2025-10-23', '2025-11-05')
+    loaded = get_history_index()  # Índice en memoria del daemon, con offsets del archivo original
+
+    backfill([BOOK_C, BOOK_D], workers=1)
+
+    assert loaded.dates == ['2025-10-23', '2025-11-05']
+    assert get_history_index().dates == ['2025-10-22', '2025-10-23', '2025-10-24', '2025-11-03', '2025-11-05']
+
+
+def test_backfill_regenerates_publication_and_snapshot(workdir):
+    seed_history('2025-11-05')
+
+    backfill([BOOK_C, BOOK_D], workers=1)
+
+    with open(get_partition_path('2025-10'), 'r', encoding='utf-8') as f:
+        assert [record['fecha_precio'][:10] for record in json.load(f)] == ['2025-10-22', '2025-10-23', '2025-10-24']
+    with open(get_latest_path(), 'r', encoding='utf-8') as f:
+        assert json.load(f)['fecha_precio'].startswith('2025-11-05')
+    snapshot = read_snapshot()
+    assert snapshot is not None and len(snapshot.series.prices) == 5
+
+
+def test_backfill_dry_run_writes_nothing(workdir):
+    assert backfill([BOOK_C], workers=1, dry_run=True) == 3
+    assert load_records() == []
+    assert not os.path.exists(get_latest_path())
@@ -0,0 +1,92 @@
+"""Pruebas del circuit breaker por espejo (circuit_breaker.py) y de qué fallos lo abren"""
+
+import pytest
+
+import http_client
+from circuit_breaker import (STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, get_state, load_circuits,
+                             plan_requests, record_result)
+from config import ScraperConfig
+
+URL_A = 'https://a.example/'
+URL_B = 'https://b.example/'
+
+
+@pytest.fixture(autouse=True)
+def breaker_config(monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'CIRCUIT_FAILURE_THRESHOLD', 2)
+    monkeypatch.setattr(ScraperConfig, 'CIRCUIT_COOLDOWN', 100)
+    monkeypatch.setattr(ScraperConfig, 'EVENTS_LOG_FILE', '')
+
+
+def test_circuit_goes_closed_open_half_open_closed():
+    circuits = {}
+    record_result(circuits, URL_A, False, 'timeout', now=0)
+    assert get_state(circuits[URL_A], now=1) == STATE_CLOSED  # Un fallo no alcanza el umbral
+    assert plan_requests([URL_A, URL_B], circuits, now=1) == [(URL_A, False), (URL_B, False)]
+
+    record_result(circuits, URL_A, False, 'timeout', now=10)
+    assert get_state(circuits[URL_A], now=11) == STATE_OPEN
+    assert plan_requests([URL_A, URL_B], circuits, now=11) == [(URL_B, False)]
+
+    assert get_state(circuits[URL_A], now=110) == STATE_HALF_OPEN
+    assert plan_requests([URL_A, URL_B], circuits, now=110) == [(URL_B, False), (URL_A, True)]
+
+    record_result(circuits, URL_A, True, now=111)
+    assert get_state(circuits[URL_A], now=112) == STATE_CLOSED
+    assert circuits[URL_A]['failures'] == 0
+
+
+def test_failed_probe_reopens_the_circuit():
+    circuits = {}
+    for now in (0, 1):
+        record_result(circuits, URL_A, False, 'timeout', now=now)
+
+    record_result(circuits, URL_A, False, 'timeout', now=150)  # Sonda semiabierta fallida
+
+    assert get_state(circuits[URL_A], now=200) == STATE_OPEN
+    assert get_state(circuits[URL_A], now=250) == STATE_HALF_OPEN
+
+
+def test_success_resets_the_failure_count():
+    circuits = {}
+    record_result(circuits, URL_A, False, 'timeout', now=0)
+    record_result(circuits, URL_A, True, now=1)
+    record_result(circuits, URL_A, False, 'timeout', now=2)
+    assert get_state(circuits[URL_A], now=3) == STATE_CLOSED
+
+
+def test_all_open_probes_the_oldest():
+    circuits = {}
+    for url, now in ((URL_A, 0), (URL_A, 1), (URL_B, 5), (URL_B, 6)):
+        record_result(circuits, url, False, 'timeout', now=now)
+    assert plan_requests([URL_A, URL_B], circuits, now=10) == [(URL_A, True)]
+
+
+@pytest.mark.parametrize('status, expected', [(404, http_client.CLIENT_ERROR), (403, http_client.CLIENT_ERROR),
+                                              (503, http_client.NO_RESPONSE), (429, http_client.NO_RESPONSE)])
+def test_failure_code_separates_client_errors(stub_url, monkeypatch, status, expected):
+    monkeypatch.setattr(http_client, 'URL_STATS', {})
+    url = f"{stub_url}/bcv_actual.html?status={status}"
+    assert http_client.fetch_url(url, max_retries=0) is None
+    assert http_client.get_failure_code(url) == expected
+
+
+@pytest.mark.parametrize('hedged', [True, False])
+def test_only_transport_failures_open_the_circuit(stub_url, workdir, monkeypatch, hedged):
+    import bcv_scraper
+
+    client_error = f"{stub_url}/bcv_actual.html?status=404"
+    server_error = f"{stub_url}/bcv_actual.html?status=503"
+    monkeypatch.setattr(http_client, 'URL_STATS', {})
+    monkeypatch.setattr(bcv_scraper, 'BCV_URLS', [client_error, server_error])
+    monkeypatch.setattr(ScraperConfig, 'HEDGED_REQUESTS', hedged)
+    monkeypatch.setattr(ScraperConfig, 'PAGE_CACHE_ENABLED', False)
+    monkeypatch.setattr(ScraperConfig, 'CIRCUIT_FAILURE_THRESHOLD', 1)
+    monkeypatch.setattr(ScraperConfig, 'MAX_RETRIES', 0)
+
+    assert bcv_scraper.fetch_rates() is None
+
+    circuits = load_circuits()
+    assert get_state(circuits[client_error]) == STATE_CLOSED
+    assert circuits[client_error]['failures'] == 0
+    assert get_state(circuits[server_error]) == STATE_OPEN
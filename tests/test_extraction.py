@@ -0,0 +1,28 @@
+"""El recorrido único de extraction.py frente a las estrategias originales (benchmarks/legacy_strategies.py)"""
+
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+from bcv_scraper import find_dollar_price, parse_price_to_float
+from legacy_strategies import STRATEGIES
+from stub_server import CORPUS_DIR
+
+PAGES = sorted(name for name in os.listdir(CORPUS_DIR) if name.endswith('.html'))
+
+
+def sequential_price(soup):
+    """Primer precio válido de las estrategias originales, en orden de prioridad"""
+    for strategy in STRATEGIES:
+        price = parse_price_to_float(strategy(soup) or '')
+        if price:
+            return price
+    return None
+
+
+@pytest.mark.parametrize('name', PAGES)
+def test_single_pass_matches_the_original_strategies(name, workdir):
+    with open(os.path.join(CORPUS_DIR, name), 'rb') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+    assert find_dollar_price(soup) == sequential_price(soup)
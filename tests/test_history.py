@@ -0,0 +1,129 @@
+"""Pruebas del índice del historial (history.py): consultas por bisect, índice persistido y reescrituras"""
+
+import os
+
+from history import (empty_index, get_index_path, get_latest_rate, get_rate, get_rate_as_of, get_rates_in_range,
+                     load_index, load_persisted_index, merge_entries, update_index)
+from storage import append_records, rewrite_records, load_records
+
+HISTORY = 'precio_dolar_bcv.jsonl'
+
+
+def record(date_key, price, eur=None):
+    return {'fecha_extraccion': f"{date_key} 16:00:00", 'fecha_precio': f"{date_key} 00:00:00",
+            'precio_dolar': price, 'tasas': {'EUR': eur} if eur else {}}
+
+
+def seed(*pairs):
+    append_records([record(date_key, price) for date_key, price in pairs])
+
+
+INDEX = merge_entries(empty_index(), [('2025-10-01', 181.0), ('2025-10-03', 183.0), ('2025-10-06', 186.0)], 0)
+
+
+def test_get_rate_is_exact():
+    assert get_rate(INDEX, '2025-10-03') == 183.0
+    assert get_rate(INDEX, '2025-10-03 00:00:00') == 183.0
+    assert get_rate(INDEX, '2025-10-04') is None
+
+
+def test_get_rate_as_of_returns_the_rate_in_force():
+    assert get_rate_as_of(INDEX, '2025-10-05') == ('2025-10-03', 183.0)
+    assert get_rate_as_of(INDEX, '2025-10-06') == ('2025-10-06', 186.0)
+    assert get_rate_as_of(INDEX, '2030-01-01') == ('2025-10-06', 186.0)
+    assert get_rate_as_of(INDEX, '2025-09-30') is None
+
+
+def test_get_rates_in_range_is_inclusive():
+    assert get_rates_in_range(INDEX, '2025-10-01', '2025-10-03') == [('2025-10-01', 181.0), ('2025-10-03', 183.0)]
+    assert get_rates_in_range(INDEX, '2025-10-02', '2025-10-05') == [('2025-10-03', 183.0)]
+    assert get_rates_in_range(INDEX, '2025-10-07', '2025-12-31') == []
+
+
+def test_get_latest_rate():
+    assert get_latest_rate(INDEX) == ('2025-10-06', 186.0)
+    assert get_latest_rate(empty_index()) is None
+
+
+def test_merge_entries_corrects_and_interleaves_dates():
+    index = merge_entries(empty_index(), [('2025-10-01', 181.0), ('2025-10-03', 183.0)], 10)
+    index = merge_entries(index, [('2025-10-03', 183.5), ('2025-10-02', 182.0)], 20)
+    assert index.dates == ['2025-10-01', '2025-10-02', '2025-10-03']
+    assert index.prices == [181.0, 182.0, 183.5]
+    assert index.positions == {'2025-10-01': 0, '2025-10-02': 1, '2025-10-03': 2}
+    assert index.offset == 20
+
+
+def test_persisted_index_round_trip(workdir):
+    seed(('2025-10-01', 181.0), ('2025-10-02', 182.0))
+    index = load_index()
+
+    persisted = load_persisted_index(get_index_path())
+
+    assert persisted == index
+    assert persisted.offset == os.path.getsize(HISTORY)
+    assert persisted.generation == os.stat(HISTORY).st_ino
+
+
+def test_persisted_index_reads_only_the_appended_lines(workdir):
+    seed(('2025-10-01', 181.0))
+    load_index()
+    with open(HISTORY, 'r+b') as f:  # Si releyera desde el principio, leería esta tasa alterada
+        content = f.read()
+        f.seek(0)
+        f.write(content.replace(b'181.0', b'999.0'))
+
+    seed(('2025-10-02', 182.0))
+
+    assert load_index().prices == [181.0, 182.0]
+
+
+def test_per_currency_indexes_are_persisted_separately(workdir):
+    append_records([record('2025-10-01', 181.0, eur=210.0)])
+    assert load_index(currency='EUR').prices == [210.0]
+    assert os.path.exists(get_index_path('EUR'))
+    assert load_index().prices == [181.0]
+
+
+def test_incomplete_last_line_is_indexed_later(workdir):
+    seed(('2025-10-01', 181.0))
+    with open(HISTORY, 'ab') as f:
+        f.write(b'{"fecha_precio":"2025-10-02 00:00:00","precio_dolar":18')
+    index = update_index(empty_index(), HISTORY)
+    assert index.dates == ['2025-10-01']
+
+    with open(HISTORY, 'ab') as f:
+        f.write(b'2.0}\n')
+    assert update_index(index, HISTORY).dates == ['2025-10-01', '2025-10-02']
+
+
+def test_shrunk_history_resets_the_index(workdir):
+    seed(('2025-10-01', 181.0), ('2025-10-02', 182.0), ('2025-10-03', 183.0))
+    index = update_index(empty_index(), HISTORY)
+    with open(HISTORY, 'r+b') as f:  # Truncado en el lugar: mismo inodo, archivo más corto
+        f.truncate(len(f.readline()))
+
+    assert update_index(index, HISTORY).dates == ['2025-10-01']
+
+
+def test_rewritten_history_rebuilds_the_index(workdir):
+    seed(('2025-10-02', 182.0), ('2025-10-03', 183.0))
+    index = load_index()
+
+    rewrite_records(load_records() + [record('2025-09-30', 180.0), record('2025-10-01', 181.0)])
+
+    assert update_index(index).dates == ['2025-09-30', '2025-10-01', '2025-10-02', '2025-10-03']
+    assert load_index().dates == ['2025-09-30', '2025-10-01', '2025-10-02', '2025-10-03']
+
+
+def test_in_place_rewrite_with_the_same_inode_is_detected(workdir):
+    seed(('2025-10-02', 182.0), ('2025-10-03', 183.0))
+    index = update_index(empty_index(), HISTORY)
+    with open(HISTORY, 'r+b') as f:  # Un editor que reescribe en el lugar: el offset cae a mitad de línea
+        lines = f.readlines()
+        content = b''.join(line.replace(b'"precio_dolar":182.0', b'"precio_dolar": 182.5') for line in lines)
+        f.seek(0)
+        f.write(content)
+    assert content[index.offset - 1:index.offset] != b'\n'
+
+    assert get_rate(update_index(index, HISTORY), '2025-10-02') == 182.5
@@ -0,0 +1,122 @@
+"""Pruebas de reintentos, plazo y espejos de http_client.py contra el servidor local del corpus"""
+
+import time
+
+import pytest
+
+import http_client
+from config import ScraperConfig
+from http_client import fetch_hedged, fetch_url, get_timeouts
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    """Contabilidad de intentos vacía en cada prueba"""
+    monkeypatch.setattr(http_client, 'URL_STATS', {})
+    monkeypatch.setattr(ScraperConfig, 'EVENTS_LOG_FILE', '')
+
+
+def attempts(url):
+    return http_client.get_url_stats().get(url, {}).get('attempts', 0)
+
+
+def page_size(url, response):
+    """Validador de fetch_hedged: acepta cualquier cuerpo no vacío"""
+    return len(response.content) or None
+
+
+def test_fetch_url_returns_the_page(stub_url):
+    url = f"{stub_url}/bcv_actual.html"
+    response = fetch_url(url, max_retries=0)
+    assert response is not None and response.status_code == 200
+    assert b'dolar' in response.content
+    assert attempts(url) == 1
+
+
+def test_fetch_url_retries_server_errors_with_backoff(stub_url):
+    url = f"{stub_url}/bcv_actual.html?status=503"
+    delays = []
+    assert fetch_url(url, max_retries=2, sleep=delays.append) is None
+    assert attempts(url) == 3
+    assert len(delays) == 2
+
+
+def test_fetch_url_does_not_retry_client_errors(stub_url):
+    url = f"{stub_url}/no_existe.html"
+    delays = []
+    assert fetch_url(url, max_retries=3, sleep=delays.append) is None
+    assert attempts(url) == 1
+    assert delays == []
+
+
+def test_fetch_url_stops_retrying_when_backoff_exceeds_the_deadline(stub_url, monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'BACKOFF_BASE', 10)
+    monkeypatch.setattr(ScraperConfig, 'BACKOFF_MAX', 10)
+    monkeypatch.setattr(http_client.random, 'uniform', lambda low, high: high)
+    url = f"{stub_url}/bcv_actual.html?status=503"
+    delays = []
+    assert fetch_url(url, max_retries=3, deadline=5, sleep=delays.append) is None
+    assert attempts(url) == 1
+    assert delays == []
+
+
+def test_fetch_url_caps_the_running_attempt_at_the_deadline(stub_url, monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'READ_TIMEOUT', 10)
+    url = f"{stub_url}/bcv_actual.html?delay=2"
+    started = time.monotonic()
+    assert fetch_url(url, max_retries=0, deadline=0.3) is None
+    assert time.monotonic() - started < 1.5  # Sin el recorte esperaría la respuesta (2 s)
+
+
+def test_get_timeouts_never_exceed_the_remaining_deadline(monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'CONNECT_TIMEOUT', 5)
+    monkeypatch.setattr(ScraperConfig, 'READ_TIMEOUT', 15)
+    assert get_timeouts() == (5, 15)
+    assert get_timeouts(30) == (5, 15)
+    assert get_timeouts(2.5) == (2.5, 2.5)
+
+
+def test_fetch_hedged_falls_back_to_the_next_mirror(stub_url):
+    urls = [f"{stub_url}/bcv_actual.html?status=404", f"{stub_url}/bcv_actual.html"]
+    started = time.monotonic()
+    result = fetch_hedged(urls, page_size, stagger=5, timeout=5)
+    assert result.url == urls[1]
+    assert result.value > 0
+    assert [attempt['ok'] for attempt in result.attempts] == [False, True]
+    assert time.monotonic() - started < 2  # El segundo espejo arranca al fallar el primero, no a los 5 s
+
+
+def test_fetch_hedged_races_a_slow_mirror(stub_url):
+    urls = [f"{stub_url}/bcv_actual.html?delay=2", f"{stub_url}/bcv_actual.html"]
+    result = fetch_hedged(urls, page_size, stagger=0.05, timeout=5)
+    assert result.url == urls[1]
+
+
+def test_fetch_hedged_rejects_invalid_pages(stub_url):
+    urls = [f"{stub_url}/bcv_actual.html", f"{stub_url}/bcv_mantenimiento.html"]
+    result = fetch_hedged(urls, lambda url, response: None, stagger=0.01, timeout=2)
+    assert result.value is None and result.url is None
+    assert {attempt['error'] for attempt in result.attempts} == {'respuesta inválida'}
+
+
+def test_fetch_hedged_gives_up_at_the_deadline(stub_url):
+    urls = [f"{stub_url}/bcv_actual.html?delay=3"]
+    started = time.monotonic()
+    result = fetch_hedged(urls, page_size, stagger=0, timeout=0.3)
+    assert result.value is None
+    assert time.monotonic() - started < 1.5
+
+
+@pytest.mark.parametrize('hedged', [True, False])
+def test_fetch_rates_falls_back_to_a_working_mirror(stub_url, workdir, monkeypatch, hedged):
+    import bcv_scraper
+
+    monkeypatch.setattr(bcv_scraper, 'BCV_URLS', [f"{stub_url}/bcv_actual.html?status=503",
+                                                  f"{stub_url}/bcv_actual.html"])
+    monkeypatch.setattr(ScraperConfig, 'HEDGED_REQUESTS', hedged)
+    monkeypatch.setattr(ScraperConfig, 'PAGE_CACHE_ENABLED', False)
+    monkeypatch.setattr(ScraperConfig, 'CIRCUIT_BREAKER_ENABLED', False)
+    monkeypatch.setattr(ScraperConfig, 'MAX_RETRIES', 1)
+    monkeypatch.setattr(ScraperConfig, 'BACKOFF_BASE', 0.01)
+    rates = bcv_scraper.fetch_rates()
+    assert rates is not None and rates['USD'] > 0
@@ -0,0 +1,79 @@
+"""Pruebas del envío directo de notificaciones (notifications.py) contra SMTP y Telegram locales"""
+
+from config import ScraperConfig
+from notifications import (create_email_content, dispatch_notifications, send_notifications,
+                           wait_for_notifications)
+
+UPDATE = dict(price=214.419, price_date='2025-10-24', extraction_time='2025-10-23 17:05:00',
+              rates={'USD': 214.419, 'EUR': 249.1}, alerts=['Variación de 2.50% (umbral 1.0%)'])
+
+
+def test_fans_out_to_every_recipient_of_every_channel(notification_config, smtp_stub, telegram_stub):
+    results = send_notifications(**UPDATE)
+
+    assert results == {'email': True, 'telegram': True}
+    assert sorted(recipient for recipient, _ in smtp_stub.messages) == ['ana@example.com', 'luis@example.com']
+    assert sorted(telegram_stub.chats()) == ['101', '102']
+    assert smtp_stub.sessions == 1 and smtp_stub.logins == 1  # Una sola sesión para todos los emails
+    assert smtp_stub.quits == 1
+
+
+def test_messages_carry_price_rates_and_alerts(notification_config, smtp_stub, telegram_stub):
+    send_notifications(**UPDATE)
+
+    _, message = smtp_stub.messages[0]
+    assert message['Subject'] == ScraperConfig.EMAIL_SUBJECT
+    body = message.get_body().get_content()
+    assert '214.42 Bs' in body and 'EUR: 249.10 Bs' in body and 'umbral 1.0%' in body
+    text = telegram_stub.sent[0][1]
+    assert '*Precio:* 214.42 Bs' in text and 'EUR: 249.10 Bs' in text
+
+
+def test_email_retry_only_resends_to_pending_recipients(notification_config, smtp_stub):
+    ScraperConfig.TELEGRAM_ENABLED = False
+    smtp_stub.fail_data = 1  # El primer DATA se rechaza: se reabre la sesión y se reintenta
+
+    assert send_notifications(**UPDATE)['email'] is True
+    assert sorted(recipient for recipient, _ in smtp_stub.messages) == ['ana@example.com', 'luis@example.com']
+    assert smtp_stub.sessions == 2
+
+
+def test_telegram_retries_a_failing_chat(notification_config, telegram_stub):
+    ScraperConfig.EMAIL_ENABLED = False
+    telegram_stub.failures['102'] = 1
+
+    assert send_notifications(**UPDATE)['telegram'] is True
+    assert sorted(telegram_stub.chats()) == ['101', '102']
+    assert telegram_stub.requests == 3
+
+
+def test_channel_failure_does_not_block_the_others(notification_config, smtp_stub, telegram_stub):
+    telegram_stub.failures['102'] = -1
+
+    results = send_notifications(**UPDATE)
+
+    assert results == {'email': True, 'telegram': False}
+    assert telegram_stub.chats() == ['101']
+    assert telegram_stub.requests == 1 + ScraperConfig.NOTIFICATION_RETRIES + 1
+    assert len(smtp_stub.messages) == 2
+
+
+def test_disabled_notifications_send_nothing(notification_config, smtp_stub, telegram_stub):
+    ScraperConfig.NOTIFICATIONS_ENABLED = False
+
+    assert send_notifications(**UPDATE) == {'email': False, 'telegram': False}
+    assert smtp_stub.sessions == 0 and telegram_stub.requests == 0
+
+
+def test_dispatch_runs_in_background_until_waited(notification_config, smtp_stub, telegram_stub):
+    thread = dispatch_notifications(**UPDATE)
+    wait_for_notifications(timeout=10)
+
+    assert not thread.is_alive()
+    assert len(smtp_stub.messages) == 2 and len(telegram_stub.sent) == 2
+
+
+def test_email_content_without_alerts_or_other_rates():
+    content = create_email_content(36.5, '2025-10-24', '2025-10-23 17:05:00')
+    assert '36.50 Bs' in content
+    assert 'Alertas' not in content and 'Otras tasas' not in content
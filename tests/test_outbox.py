@@ -0,0 +1,166 @@
+"""Pruebas de la bandeja de salida (outbox.py): fan-out, agrupación, reintentos y límite por canal"""
+
+import json
+import time
+
+import pytest
+
+import outbox
+from config import ScraperConfig
+from outbox import RateLimiter, connect, drain_outbox, drain_pending_in_background, enqueue_update, get_stats
+
+
+@pytest.fixture
+def outbox_config(notification_config, monkeypatch):
+    """Bandeja sin límite de envíos y con reintentos que no vencen durante la prueba"""
+    monkeypatch.setattr(ScraperConfig, 'OUTBOX_EMAIL_PER_SECOND', 0)
+    monkeypatch.setattr(ScraperConfig, 'OUTBOX_TELEGRAM_PER_SECOND', 0)
+    monkeypatch.setattr(ScraperConfig, 'OUTBOX_CONCURRENCY', 4)
+    return notification_config
+
+
+def enqueue(price=214.419, price_date='2025-10-24'):
+    return enqueue_update(price, price_date, '2025-10-23 17:05:00', {'USD': price}, ['Primer registro'])
+
+
+def make_due() -> None:
+    """Adelanta los reintentos programados para que venzan ya"""
+    connection = connect()
+    with connection:
+        connection.execute("UPDATE outbox SET next_attempt_at = 0")
+    connection.close()
+
+
+def rows(columns='channel, recipient, status, attempts', recipient=None):
+    connection = connect()
+    try:
+        if recipient is None:
+            return connection.execute(f"SELECT {columns} FROM outbox ORDER BY id").fetchall()
+        return connection.execute(f"SELECT {columns} FROM outbox WHERE recipient = ? ORDER BY id",
+                                  (recipient,)).fetchall()
+    finally:
+        connection.close()
+
+
+def test_enqueue_fans_out_one_row_per_subscriber(outbox_config):
+    with open(ScraperConfig.SUBSCRIBERS_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'telegram': ['103', '101'], 'email': ['eva@example.com']}, f)
+
+    assert enqueue() == 6  # 2 + 1 emails y 2 + 1 chats (101 repetido)
+    assert {(channel, recipient) for channel, recipient, _, _ in rows()} == {
+        ('email', 'ana@example.com'), ('email', 'luis@example.com'), ('email', 'eva@example.com'),
+        ('telegram', '101'), ('telegram', '102'), ('telegram', '103')}
+
+
+def test_drain_delivers_every_message(outbox_config, smtp_stub, telegram_stub):
+    enqueue()
+
+    assert drain_outbox() == {'sent': 4, 'failed': 0}
+    assert sorted(recipient for recipient, _ in smtp_stub.messages) == ['ana@example.com', 'luis@example.com']
+    assert sorted(telegram_stub.chats()) == ['101', '102']
+    assert get_stats() == {'sent': 4}
+    assert drain_outbox() == {'sent': 0, 'failed': 0}  # Nada se envía dos veces
+
+
+def test_pending_updates_are_grouped_into_one_message(outbox_config, telegram_stub):
+    ScraperConfig.EMAIL_ENABLED = False
+    enqueue(210.0, '2025-10-23')
+    enqueue(214.419, '2025-10-24')
+
+    assert drain_outbox() == {'sent': 2, 'failed': 0}
+    assert sorted(telegram_stub.chats()) == ['101', '102']
+    text = telegram_stub.sent[0][1]
+    assert '214.42 Bs' in text and 'Actualizaciones anteriores' in text and '2025-10-23: 210.00 Bs' in text
+
+
+def test_failed_messages_are_rescheduled_and_retried_later(outbox_config, telegram_stub):
+    ScraperConfig.EMAIL_ENABLED = False
+    telegram_stub.failures['102'] = 1
+    enqueue()
+
+    assert drain_outbox() == {'sent': 1, 'failed': 1}
+    (status, attempts, next_attempt_at, last_error), = rows('status, attempts, next_attempt_at, last_error',
+                                                           recipient='102')
+    assert (status, attempts) == ('pending', 1)
+    assert next_attempt_at > time.time() and '500' in last_error
+
+    assert drain_outbox() == {'sent': 0, 'failed': 0}  # El reintento aún no vence
+    make_due()
+    assert drain_outbox() == {'sent': 1, 'failed': 0}
+    assert sorted(telegram_stub.chats()) == ['101', '102']
+
+
+def test_messages_fail_permanently_after_max_attempts(outbox_config, telegram_stub, monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'OUTBOX_MAX_ATTEMPTS', 2)
+    ScraperConfig.EMAIL_ENABLED = False
+    telegram_stub.failures['102'] = -1
+    enqueue()
+
+    drain_outbox()
+    make_due()
+    drain_outbox()
+    make_due()
+    assert drain_outbox() == {'sent': 0, 'failed': 0}
+    assert get_stats() == {'sent': 1, 'failed': 1}
+
+
+def test_each_outcome_is_recorded_as_it_completes(outbox_config, telegram_stub, monkeypatch):
+    ScraperConfig.EMAIL_ENABLED = False
+    monkeypatch.setattr(ScraperConfig, 'OUTBOX_CONCURRENCY', 1)
+    recorded = []
+    record_outcomes = outbox.record_outcomes
+    monkeypatch.setattr(outbox, 'record_outcomes',
+                        lambda connection, outcomes: recorded.append(len(outcomes)) or
+                        record_outcomes(connection, outcomes))
+    enqueue()
+
+    drain_outbox()
+    assert recorded == [1, 1]
+
+
+def test_telegram_sends_respect_the_rate_limit(outbox_config, telegram_stub, monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'TELEGRAM_CHAT_ID', ','.join(str(chat) for chat in range(200, 210)))
+    monkeypatch.setattr(ScraperConfig, 'OUTBOX_TELEGRAM_PER_SECOND', 20)
+    ScraperConfig.EMAIL_ENABLED = False
+    enqueue()
+
+    drain_outbox()
+    moments = sorted(moment for _, _, moment in telegram_stub.sent)
+    assert len(moments) == 10
+    assert moments[-1] - moments[0] >= 9 * 0.05 * 0.8  # 20/s: 10 envíos ocupan ~0.45 s
+
+
+def test_rate_limiter_spaces_acquisitions():
+    limiter = RateLimiter(50)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.monotonic() - started >= 5 * 0.02 * 0.8
+    unlimited = RateLimiter(0)
+    started = time.monotonic()
+    for _ in range(100):
+        unlimited.acquire()
+    assert time.monotonic() - started < 0.05
+
+
+def test_every_smtp_session_is_closed(outbox_config, smtp_stub, monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'EMAIL_TO', ','.join(f"u{n}@example.com" for n in range(12)))
+    ScraperConfig.TELEGRAM_ENABLED = False
+    enqueue()
+
+    assert drain_outbox() == {'sent': 12, 'failed': 0}
+    assert 1 <= smtp_stub.sessions <= ScraperConfig.OUTBOX_CONCURRENCY
+    assert smtp_stub.quits == smtp_stub.sessions
+    assert outbox.open_sessions == []
+
+
+def test_startup_drain_sends_pending_messages_from_earlier_runs(outbox_config, telegram_stub):
+    from notifications import wait_for_notifications
+
+    assert drain_pending_in_background() is None  # Sin bandeja no hay nada que drenar
+    ScraperConfig.EMAIL_ENABLED = False
+    enqueue()
+
+    assert drain_pending_in_background() is not None
+    wait_for_notifications(timeout=10)
+    assert sorted(telegram_stub.chats()) == ['101', '102']
@@ -0,0 +1,101 @@
+"""Pruebas de la publicación particionada (publish.py) en un directorio temporal, sin GitHub"""
+
+import json
+import os
+
+from publish import get_latest_path, get_partition_path, publish_all, publish_records
+from storage import append_records
+
+OLD_MTIME_NS = 1_000_000_000 * 10**9  # 2001-09-09: cualquier reescritura lo cambia
+
+
+def record(date_key, price):
+    return {'fecha_extraccion': f"{date_key} 16:00:00", 'fecha_precio': f"{date_key} 00:00:00",
+            'precio_dolar': price}
+
+
+def publish_history():
+    """Historial de dos meses publicado, con todos los archivos fechados en el pasado"""
+    append_records([record('2025-09-30', 180.0), record('2025-10-01', 181.0), record('2025-10-02', 182.0)])
+    changed = publish_all()
+    for path in changed:
+        os.utime(path, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+    return changed
+
+
+def snapshot_files():
+    """{ruta: (bytes, mtime)} de todo lo publicado"""
+    files = {}
+    for directory, _, names in os.walk('datos'):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, 'rb') as f:
+                files[path] = (f.read(), os.stat(path).st_mtime_ns)
+    return files
+
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_publish_all_writes_one_partition_per_month_and_latest(workdir):
+    changed = publish_history()
+
+    assert changed == [get_partition_path('2025-09'), get_partition_path('2025-10'), get_latest_path()]
+    assert [r['precio_dolar'] for r in read_json(get_partition_path('2025-10'))] == [181.0, 182.0]
+    assert read_json(get_latest_path())['fecha_precio'] == '2025-10-02 00:00:00'
+    with open(get_partition_path('2025-10'), 'r', encoding='utf-8') as f:
+        assert len(f.read().splitlines()) == 4  # Un registro por línea entre los corchetes
+
+
+def test_new_record_touches_only_its_month_and_latest(workdir):
+    publish_history()
+    before = snapshot_files()
+
+    changed = publish_records([record('2025-10-03', 183.0)])
+
+    assert changed == [get_partition_path('2025-10'), get_latest_path()]
+    after = snapshot_files()
+    assert after[get_partition_path('2025-09')] == before[get_partition_path('2025-09')]
+    assert after[get_partition_path('2025-10')][1] != OLD_MTIME_NS
+    assert read_json(get_latest_path())['precio_dolar'] == 183.0
+
+
+def test_unchanged_content_is_not_rewritten(workdir):
+    publish_history()
+    before = snapshot_files()
+
+    assert publish_records([record('2025-10-02', 182.0)]) == []
+    assert publish_all() == []
+    assert snapshot_files() == before
+
+
+def test_older_record_does_not_replace_latest(workdir):
+    publish_history()
+    before = snapshot_files()
+
+    changed = publish_records([record('2025-09-15', 170.0)])
+
+    assert changed == [get_partition_path('2025-09')]
+    assert snapshot_files()[get_latest_path()] == before[get_latest_path()]
+    dates = [r['fecha_precio'][:10] for r in read_json(get_partition_path('2025-09'))]
+    assert dates == ['2025-09-15', '2025-09-30']
+
+
+def test_correction_replaces_the_published_date(workdir):
+    publish_history()
+
+    publish_records([record('2025-10-02', 182.5)])
+
+    assert [r['precio_dolar'] for r in read_json(get_partition_path('2025-10'))] == [181.0, 182.5]
+    assert read_json(get_latest_path())['precio_dolar'] == 182.5
+
+
+def test_publish_to_another_directory(workdir):
+    append_records([record('2025-10-01', 181.0)])
+
+    changed = publish_all(str(workdir / 'salida'))
+
+    assert changed == [get_partition_path('2025-10', str(workdir / 'salida')), get_latest_path(str(workdir / 'salida'))]
+    assert not os.path.exists('datos')
@@ -0,0 +1,70 @@
+"""Pruebas de la API local de tasas (rate_api.py) con recarga del historial en caliente"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from config import ScraperConfig
+from rate_api import create_server
+from storage import append_records, load_records, rewrite_records
+
+
+def record(date_key, price):
+    return {'fecha_precio': f"{date_key} 00:00:00", 'precio_dolar': price, 'tasas': {'USD': price}}
+
+
+@pytest.fixture
+def api(workdir, monkeypatch):
+    """URL base de la API sobre el historial del directorio temporal, sin intervalo de recarga"""
+    monkeypatch.setattr(ScraperConfig, 'API_RELOAD_INTERVAL', 0)
+    append_records([record('2025-10-23', 206.6541), record('2025-11-05', 224.3757)])
+    server = create_server('127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url):
+    """(estado, cuerpo JSON) de un GET, también para respuestas de error"""
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_rate_returns_the_exact_date(api):
+    assert get(f"{api}/rate?date=2025-10-23") == (
+        200, {'currency': 'USD', 'fecha_precio': '2025-10-23', 'rate': 206.6541})
+
+
+def test_rate_rejects_malformed_dates(api):
+    status, body = get(f"{api}/rate?date=2025-13-40")
+    assert status == 400 and 'Fecha inválida' in body['error']
+
+
+def test_rate_after_the_latest_publication_is_not_found(api):
+    status, body = get(f"{api}/rate?date=2025-11-06")
+    assert status == 404 and body['ultima_fecha_precio'] == '2025-11-05'
+
+
+def test_appended_records_are_served_after_reload(api):
+    assert get(f"{api}/latest")[1]['fecha_precio'] == '2025-11-05'
+    append_records([record('2025-11-06', 225.0)])
+    assert get(f"{api}/latest")[1] == {'currency': 'USD', 'fecha_precio': '2025-11-06', 'rate': 225.0}
+
+
+def test_rewritten_history_is_reloaded_completely(api):
+    assert get(f"{api}/rate?date=2025-10-01")[0] == 404  # Índice cargado antes del backfill
+
+    rewrite_records(load_records() + [record('2025-10-01', 190.1), record('2025-10-02', 191.2)])
+
+    assert get(f"{api}/rate?date=2025-10-01") == (
+        200, {'currency': 'USD', 'fecha_precio': '2025-10-01', 'rate': 190.1})
+    assert get(f"{api}/rate?date=2025-10-02")[1]['rate'] == 191.2
+    dates = [rate['fecha_precio'] for rate in get(f"{api}/range?start=2025-10-01")[1]['rates']]
+    assert dates == ['2025-10-01', '2025-10-02', '2025-10-23', '2025-11-05']
@@ -0,0 +1,70 @@
+"""Pruebas del modo daemon (scheduler.py) con una hora fija"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import bcv_scraper
+import sources
+from config import ScraperConfig
+from history import empty_index, merge_entries
+from scheduler import compute_poll_interval, poll_once, should_save
+
+INDEX = merge_entries(empty_index(), [('2025-11-04', 223.1), ('2025-11-05', 224.3757)], 0)
+
+
+@pytest.fixture
+def daemon(monkeypatch):
+    """Fija la hora de Venezuela y la tasa leída; registra lo que el daemon guarda"""
+    state = {'rates': None, 'saved': []}
+
+    def set_now(hour, minute=0, day=5):
+        now = datetime(2025, 11, day, hour, minute, tzinfo=bcv_scraper.get_timezone())
+        monkeypatch.setattr(bcv_scraper, 'get_venezuela_time', lambda: now)
+
+    def save(price, rates):
+        state['saved'].append(price)
+        return True
+
+    monkeypatch.setattr(sources, 'fetch_validated_rates', lambda: state['rates'])
+    monkeypatch.setattr(bcv_scraper, 'save_dollar_price', save)
+    state['set_now'] = set_now
+    return state
+
+
+def test_should_save_only_when_the_rate_changes():
+    assert should_save({'USD': 226.5}, INDEX)
+    assert not should_save({'USD': 224.3757}, INDEX)
+    assert should_save({'USD': 224.3757}, empty_index())
+
+
+@pytest.mark.parametrize('hour', [7, 10, 23])
+def test_unchanged_rate_is_not_saved_and_polling_continues(daemon, hour):
+    daemon['set_now'](hour)
+    daemon['rates'] = {'USD': 224.3757}
+
+    delay = asyncio.run(poll_once(INDEX))
+
+    assert daemon['saved'] == []
+    assert delay == compute_poll_interval(datetime(2025, 11, 5, hour))
+
+
+def test_rate_published_in_the_afternoon_is_saved(daemon):
+    daemon['rates'] = {'USD': 224.3757}
+    daemon['set_now'](10)
+    assert asyncio.run(poll_once(INDEX)) == ScraperConfig.SLOW_POLL_INTERVAL
+
+    daemon['set_now'](18, 5)
+    daemon['rates'] = {'USD': 226.5}
+    assert asyncio.run(poll_once(INDEX)) == 0
+    assert daemon['saved'] == [226.5]
+
+
+def test_saved_target_date_waits_for_the_next_publication(daemon):
+    daemon['set_now'](5, day=5)  # Antes de la publicación la fecha pendiente es la del día
+
+    delay = asyncio.run(poll_once(INDEX))
+
+    assert delay == 3600
+    assert daemon['saved'] == []
@@ -0,0 +1,81 @@
+"""Pruebas de la instantánea binaria (snapshot.py): ida y vuelta y detección de instantáneas viejas"""
+
+import pytest
+
+import analytics
+from history import from_epoch_day, load_index
+from snapshot import HEADER, RECORD, get_snapshot_path, is_current, read_snapshot, update_snapshots, write_snapshot
+from storage import append_records, rewrite_records, load_records
+
+
+def record(date_key, price, eur):
+    return {'fecha_extraccion': f"{date_key} 16:00:00", 'fecha_precio': f"{date_key} 00:00:00",
+            'precio_dolar': price, 'tasas': {'EUR': eur}}
+
+
+@pytest.fixture
+def history(workdir):
+    append_records([record('1999-12-31', 0.5731, 0.5765), record('2025-10-01', 181.0123, 210.5),
+                    record('2025-10-02', 182.25, 211.75)])
+    return workdir
+
+
+def values(snapshot):
+    return [(from_epoch_day(day).isoformat(), price) for day, price in zip(snapshot.series.days,
+                                                                            snapshot.series.prices)]
+
+
+@pytest.mark.parametrize('numpy', [True, False])
+def test_round_trip_preserves_dates_and_rates(history, monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(analytics, 'np', None)  # Lector de respaldo con `array`
+    index = load_index()
+    assert write_snapshot(index)
+
+    snapshot = read_snapshot()
+
+    assert snapshot.currency == 'USD' and snapshot.count == 3
+    assert snapshot.offset == index.offset
+    assert values(snapshot) == [('1999-12-31', 0.5731), ('2025-10-01', 181.0123), ('2025-10-02', 182.25)]
+    with open(get_snapshot_path(), 'rb') as f:
+        assert len(f.read()) == HEADER.size + 3 * RECORD.size
+
+
+def test_eur_snapshot_has_its_own_file(history):
+    update_snapshots(['USD', 'EUR'])
+
+    snapshot = read_snapshot(currency='EUR')
+
+    assert get_snapshot_path('EUR') != get_snapshot_path()
+    assert snapshot.currency == 'EUR'
+    assert values(snapshot)[-1] == ('2025-10-02', 211.75)
+    assert is_current(snapshot)
+
+
+def test_snapshot_is_stale_after_history_is_appended(history):
+    update_snapshots(['USD', 'EUR'])
+    usd, eur = read_snapshot(), read_snapshot(currency='EUR')
+    assert is_current(usd) and is_current(eur)
+
+    append_records([record('2025-10-03', 183.0, 212.0)])
+
+    assert not is_current(usd)
+    assert not is_current(eur)
+    update_snapshots(['USD', 'EUR'])
+    assert is_current(read_snapshot()) and read_snapshot(currency='EUR').count == 4
+
+
+def test_snapshot_is_stale_after_a_rewrite(history):
+    update_snapshots(['USD'])
+    rewrite_records(load_records() + [record('2025-09-30', 180.0, 209.0)])
+
+    assert not is_current(read_snapshot())
+    update_snapshots(['USD'])
+    assert values(read_snapshot())[1] == ('2025-09-30', 180.0)
+
+
+def test_missing_or_invalid_snapshot(history):
+    assert read_snapshot() is None
+    with open(get_snapshot_path(), 'wb') as f:
+        f.write(b'XXXX' + bytes(HEADER.size))
+    assert read_snapshot() is None
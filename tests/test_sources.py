@@ -0,0 +1,138 @@
+"""Pruebas de la validación por consenso (sources.py) contra el servidor local del corpus"""
+
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from config import ScraperConfig
+from sources import (SourceResult, decide, fetch_consensus, get_plausible_change_pct, parse_json_rates,
+                     url_source)
+
+USD = 779.9522  # Tasa de bcv_actual.html y replica_latest.json
+USD_CLASES = 782.1  # bcv_rediseno_clases.html: 0,28 % por encima
+
+
+@pytest.fixture(autouse=True)
+def consensus_config(workdir, monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'CONSENSUS_MIN_AGREEING', 2)
+    monkeypatch.setattr(ScraperConfig, 'CONSENSUS_TOLERANCE_PCT', 0.5)
+    monkeypatch.setattr(ScraperConfig, 'PLAUSIBLE_CHANGE_PCT', 25.0)
+
+
+def days_ago(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+def result(name, usd):
+    return SourceResult(name, {'USD': usd} if usd else None, 0.01, None if usd else 'sin precio del dólar')
+
+
+@pytest.mark.parametrize('content, expected', [
+    (b'{"USD": 36.5, "EUR": 39.1}', {'USD': 36.5, 'EUR': 39.1}),
+    (b'{"rates": {"USD": 36.5, "XYZ": 1}}', {'USD': 36.5}),
+    (b'{"currency": "usd", "rate": 36.5}', {'USD': 36.5}),
+    (b'{"USD": true, "EUR": -1, "CNY": "5"}', {}),
+    (b'[36.5]', {}),
+    (b'<html>', {}),
+])
+def test_parse_json_rates(content, expected):
+    assert parse_json_rates(content) == expected
+
+
+def test_plausible_change_compounds_per_day_since_the_last_rate():
+    today = date(2025, 11, 10)
+    assert get_plausible_change_pct('2025-11-10', today) == 25.0  # Mismo día: al menos un día
+    assert get_plausible_change_pct('2025-11-09', today) == pytest.approx(25.0)
+    assert get_plausible_change_pct('2025-11-07', today) == pytest.approx(95.3125)
+    assert get_plausible_change_pct(None, today) == 25.0
+
+
+def test_plausible_change_disabled_with_zero(monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'PLAUSIBLE_CHANGE_PCT', 0.0)
+    assert get_plausible_change_pct('2025-11-01', date(2025, 11, 10)) == 0.0
+
+
+def test_decide_accepts_a_confirmed_jump():
+    outcome = decide([result('bcv', 1000.0), result('replica', 1001.0)], 2, last_price=500.0, max_change_pct=25.0)
+    assert outcome.rates == {'USD': 1000.0} and outcome.agreeing == ['bcv', 'replica']
+
+
+def test_decide_rejects_an_unconfirmed_jump():
+    assert decide([result('bcv', 1000.0), result('replica', None)], 2, last_price=500.0, max_change_pct=25.0) is None
+
+
+def test_consensus_with_agreeing_sources(stub_url):
+    sources = [url_source('bcv', f"{stub_url}/bcv_actual.html"),
+               url_source('replica', f"{stub_url}/replica_latest.json", 'json')]
+
+    outcome = fetch_consensus(sources, grace=1.0, timeout=5, last_price=USD, last_date=days_ago(1))
+
+    assert outcome.rates['USD'] == USD and outcome.rates['EUR'] == 905.12345678
+    assert outcome.agreeing == ['bcv', 'replica']
+    assert outcome.reason == '2 fuentes coinciden'
+
+
+def test_consensus_disagreement_beyond_tolerance_uses_the_first_plausible(stub_url, monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'CONSENSUS_TOLERANCE_PCT', 0.1)
+    sources = [url_source('clases', f"{stub_url}/bcv_rediseno_clases.html"),
+               url_source('bcv', f"{stub_url}/bcv_actual.html")]
+
+    outcome = fetch_consensus(sources, grace=0.5, timeout=5, last_price=USD, last_date=days_ago(1))
+
+    assert outcome.rates == {'USD': USD_CLASES}
+    assert outcome.agreeing == ['clases']
+    assert outcome.reason.startswith('fuentes en desacuerdo')
+
+
+def test_consensus_disagreement_with_no_plausible_rate_is_rejected(stub_url, monkeypatch):
+    monkeypatch.setattr(ScraperConfig, 'CONSENSUS_TOLERANCE_PCT', 0.1)
+    sources = [url_source('clases', f"{stub_url}/bcv_rediseno_clases.html"),
+               url_source('bcv', f"{stub_url}/bcv_actual.html")]
+
+    outcome = fetch_consensus(sources, grace=0.5, timeout=5, last_price=400.0, last_date=days_ago(1))
+
+    assert outcome.rates is None
+    assert [r.rates['USD'] for r in outcome.results] == [USD_CLASES, USD]
+
+
+def test_single_implausible_source_is_rejected(stub_url):
+    sources = [url_source('bcv', f"{stub_url}/bcv_actual.html")]
+
+    outcome = fetch_consensus(sources, timeout=5, last_price=500.0, last_date=days_ago(1))
+
+    assert outcome.rates is None
+    assert outcome.reason == 'sin consenso ni tasa plausible'
+
+
+def test_single_source_is_plausible_after_days_without_saving(stub_url):
+    sources = [url_source('bcv', f"{stub_url}/bcv_actual.html")]
+
+    outcome = fetch_consensus(sources, timeout=5, last_price=500.0, last_date=days_ago(3))  # Hasta +95 %
+
+    assert outcome.rates['USD'] == USD
+    assert outcome.reason == 'sin confirmación, variación plausible'
+
+
+def test_slow_source_within_grace_confirms(stub_url):
+    sources = [url_source('bcv', f"{stub_url}/bcv_actual.html"),
+               url_source('replica', f"{stub_url}/replica_latest.json?delay=0.3", 'json')]
+
+    started = time.monotonic()
+    outcome = fetch_consensus(sources, grace=1.0, timeout=5, last_price=USD, last_date=days_ago(1))
+
+    assert outcome.agreeing == ['bcv', 'replica']
+    assert time.monotonic() - started < 1.0  # Decide en cuanto llega la confirmación, sin agotar la gracia
+
+
+def test_slow_source_after_grace_is_not_waited_for(stub_url):
+    sources = [url_source('bcv', f"{stub_url}/bcv_actual.html"),
+               url_source('replica', f"{stub_url}/replica_latest.json?delay=1.5", 'json')]
+
+    started = time.monotonic()
+    outcome = fetch_consensus(sources, grace=0.2, timeout=5, last_price=USD, last_date=days_ago(1))
+
+    assert time.monotonic() - started < 1.2
+    assert outcome.rates['USD'] == USD
+    assert [r.name for r in outcome.results] == ['bcv']
+    assert outcome.reason == 'sin confirmación, variación plausible'
@@ -0,0 +1,88 @@
+"""Pruebas del historial en SQLite (sqlite_storage.py): upsert, migración y lecturas incrementales por seq"""
+
+import json
+
+import pytest
+
+from config import ScraperConfig
+from history import get_rate, load_index, update_index
+from sqlite_storage import has_records, load_all_records, read_new_rates, upsert_records
+from storage import append_records, ensure_history_file, read_records, store_records
+
+
+def record(date_key, price, eur=None):
+    return {'fecha_extraccion': f"{date_key} 16:00:00", 'fecha_precio': f"{date_key} 00:00:00",
+            'precio_dolar': price, 'tasas': {'EUR': eur} if eur else {}}
+
+
+@pytest.fixture
+def sqlite_workdir(workdir, monkeypatch):
+    """Directorio temporal con el backend SQLite activo"""
+    monkeypatch.setattr(ScraperConfig, 'STORAGE_BACKEND', 'sqlite')
+    return workdir
+
+
+def test_upsert_replaces_the_same_fecha_precio(sqlite_workdir):
+    assert upsert_records([record('2025-10-01', 181.0), record('2025-10-02', 182.0)])
+    assert upsert_records([record('2025-10-02', 182.5)])
+
+    assert [r['precio_dolar'] for r in load_all_records()] == [181.0, 182.5]
+    assert read_new_rates(0)[0] == [('2025-10-01', 181.0), ('2025-10-02', 182.5)]
+
+
+def test_read_new_rates_returns_only_rows_after_the_seq(sqlite_workdir):
+    upsert_records([record('2025-10-01', 181.0, eur=210.0)])
+    _, offset = read_new_rates(0)
+
+    upsert_records([record('2025-10-02', 182.0, eur=211.0)])
+
+    entries, new_offset = read_new_rates(offset)
+    assert entries == [('2025-10-02', 182.0)]
+    assert new_offset > offset
+    assert read_new_rates(new_offset) == ([], new_offset)
+    assert read_new_rates(0, 'EUR')[0] == [('2025-10-01', 210.0), ('2025-10-02', 211.0)]
+
+
+def test_legacy_json_is_migrated_through_jsonl_into_sqlite(sqlite_workdir):
+    with open(ScraperConfig.DATA_FILE, 'w', encoding='utf-8') as f:
+        json.dump([record('2025-10-01', 181.0), record('2025-10-02', 182.0)], f, indent=4)
+
+    ensure_history_file()
+
+    assert has_records()
+    assert [r['precio_dolar'] for r in read_records()] == [181.0, 182.0]
+    assert load_index().dates == ['2025-10-01', '2025-10-02']
+
+
+def test_jsonl_is_copied_only_while_the_database_is_empty(sqlite_workdir):
+    append_records([record('2025-10-01', 181.0)], ScraperConfig.HISTORY_FILE)
+    ensure_history_file()
+    store_records([record('2025-10-02', 182.0)])
+    append_records([record('2025-10-03', 183.0)], ScraperConfig.HISTORY_FILE)  # Escritura al JSON Lines ya abandonado
+
+    ensure_history_file()
+
+    assert [r['fecha_precio'][:10] for r in read_records()] == ['2025-10-01', '2025-10-02']
+
+
+def test_update_index_reads_only_new_rows_and_corrections(sqlite_workdir):
+    store_records([record('2025-10-01', 181.0), record('2025-10-02', 182.0)])
+    index = load_index()
+    offset = index.offset
+
+    store_records([record('2025-10-03', 183.0), record('2025-10-02', 182.5)])
+    index = update_index(index)
+
+    assert index.dates == ['2025-10-01', '2025-10-02', '2025-10-03']
+    assert get_rate(index, '2025-10-02') == 182.5
+    assert index.offset > offset
+    assert update_index(index) == index
+
+
+def test_update_index_merges_a_backfilled_older_date(sqlite_workdir):
+    store_records([record('2025-10-02', 182.0)])
+    index = load_index()
+
+    store_records([record('2025-09-30', 180.0)])
+
+    assert update_index(index).dates == ['2025-09-30', '2025-10-02']